@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YOLO 推理后端基准：PyTorch eager vs ONNX Runtime vs OpenVINO（CPU）
+每个后端测三项：
+  export    首次导出耗时（缓存已存在时为 0）
+  startup   从缓存加载模型 + 首帧推理（节点重启时的实际开销）
+  per-frame 预热后的单帧推理延迟 p50 / p90 与吞吐
+
+用法:
+  python3 scripts/benchmarks/bench_backends.py --model weights/yolo/yolo26n.pt
+  python3 scripts/benchmarks/bench_backends.py --model weights/yolo/yolo26n.pt --backends torch onnx --imgsz 480
+需要 ultralytics 与权重；onnx / openvino 后端另需 onnxruntime / openvino
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, "src", "perception_yolo", "src"))
+from perception_core import BACKENDS, export_model, load_model  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True, help=".pt 权重路径")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--export-cache", default=None)
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, size=(args.height, args.width, 3), dtype=np.uint8)
+              for _ in range(8)]
+    kwargs = {"imgsz": args.imgsz, "device": "cpu", "verbose": False}
+
+    print(f"{args.model}, imgsz={args.imgsz}, {args.width}x{args.height} frames, CPU")
+    print(f"{'backend':>8} | {'export (s)':>10} | {'startup (s)':>11} | {'p50 (ms)':>8} | "
+          f"{'p90 (ms)':>8} | {'FPS':>6}")
+    print("-" * 68)
+    for backend in args.backends:
+        try:
+            export_s = 0.0
+            if backend != "torch":
+                t0 = time.perf_counter()
+                export_model(args.model, backend, args.imgsz, args.export_cache)
+                export_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            model = load_model(args.model, backend, args.imgsz, args.export_cache)
+            model(frames[0], **kwargs)
+            startup_s = time.perf_counter() - t0
+        except Exception as exc:
+            print(f"{backend:>8} | unavailable: {exc}")
+            continue
+
+        for k in range(args.warmup):
+            model(frames[k % len(frames)], **kwargs)
+        ms = []
+        for k in range(args.frames):
+            t0 = time.perf_counter()
+            model(frames[k % len(frames)], **kwargs)
+            ms.append((time.perf_counter() - t0) * 1000.0)
+        p50, p90 = np.percentile(ms, [50, 90])
+        print(f"{backend:>8} | {export_s:>10.1f} | {startup_s:>11.2f} | {p50:>8.1f} | "
+              f"{p90:>8.1f} | {1000.0 / np.mean(ms):>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
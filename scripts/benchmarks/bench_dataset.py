@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RGB-D 录制格式基准：每帧一对小文件（JPEG 彩色 + PNG 深度）vs RgbdRecorder 分块 shard（npy / npz）
+每种格式测：
+  write   写入吞吐（帧/秒）与磁盘占用
+  stream  顺序读取全部帧的吞吐（帧/秒、MB/s，按解码后的数组大小计）
+  seek    按随机时间戳取最近一帧的延迟 p50 / p90
+
+用法:
+  python3 scripts/benchmarks/bench_dataset.py
+  python3 scripts/benchmarks/bench_dataset.py --frames 600 --chunk-size 64 --dir /data/tmp
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, "src", "perception_yolo", "src"))
+from perception_core import SHARD_FORMATS, RgbdDataset, RgbdRecorder  # noqa: E402
+
+
+def make_frames(n, h, w, seed=0):
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:h, 0:w]
+    base = np.stack([xs * 255 // w, ys * 255 // h, (xs + ys) * 255 // (w + h)], axis=-1)
+    ramp = 400 + ys * (2100 // h)
+    colors = [np.clip(base + rng.integers(-8, 8, size=base.shape), 0, 255).astype(np.uint8)
+              for _ in range(n)]
+    depths = [(ramp + rng.integers(-5, 5, size=ramp.shape)).astype(np.uint16) for _ in range(n)]
+    return colors, depths
+
+
+def dir_size_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total / 1e6
+
+
+def write_files(directory, colors, depths, stamps):
+    for k, stamp in enumerate(stamps):
+        name = os.path.join(directory, f"{int(stamp * 1000):010d}")
+        cv2.imwrite(name + "_color.jpg", colors[k % len(colors)])
+        cv2.imwrite(name + "_depth.png", depths[k % len(depths)])
+
+
+def read_files(directory):
+    for path in sorted(glob.glob(os.path.join(directory, "*_color.jpg"))):
+        yield cv2.imread(path), cv2.imread(path.replace("_color.jpg", "_depth.png"), cv2.IMREAD_UNCHANGED)
+
+
+def seek(ms):
+    p50, p90 = np.percentile(ms, [50, 90])
+    return f"{p50:.2f} / {p90:.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--seeks", type=int, default=200)
+    parser.add_argument("--dir", default=None, help="写入目录（默认临时目录，结束后删除）")
+    args = parser.parse_args()
+
+    colors, depths = make_frames(8, args.height, args.width)
+    stamps = np.arange(args.frames) / 30.0
+    frame_mb = (colors[0].nbytes + depths[0].nbytes) / 1e6
+    rng = np.random.default_rng(1)
+    queries = rng.uniform(stamps[0], stamps[-1], size=args.seeks)
+    root = tempfile.mkdtemp(prefix="bench_dataset_", dir=args.dir)
+
+    print(f"{args.frames} frames {args.width}x{args.height} RGB + 16-bit depth -> {root}")
+    print(f"{'format':>10} | {'write FPS':>9} | {'disk MB':>7} | {'stream FPS':>10} | "
+          f"{'stream MB/s':>11} | {'seek p50/p90 (ms)':>17}")
+    print("-" * 80)
+    try:
+        directory = os.path.join(root, "files")
+        os.makedirs(directory)
+        t0 = time.perf_counter()
+        write_files(directory, colors, depths, stamps)
+        write_fps = args.frames / (time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        n = sum(1 for _ in read_files(directory))
+        stream_fps = n / (time.perf_counter() - t0)
+        # 小文件按时间戳查找：文件名即时间戳，排序后二分，再解码两张图
+        names = sorted(glob.glob(os.path.join(directory, "*_color.jpg")))
+        file_stamps = np.array([int(os.path.basename(p)[:10]) / 1000.0 for p in names])
+        ms = []
+        for q in queries:
+            t0 = time.perf_counter()
+            i = min(int(np.searchsorted(file_stamps, q)), len(names) - 1)
+            cv2.imread(names[i])
+            cv2.imread(names[i].replace("_color.jpg", "_depth.png"), cv2.IMREAD_UNCHANGED)
+            ms.append((time.perf_counter() - t0) * 1000.0)
+        print(f"{'jpg+png':>10} | {write_fps:>9.1f} | {dir_size_mb(directory):>7.1f} | {stream_fps:>10.1f} | "
+              f"{stream_fps * frame_mb:>11.1f} | {seek(ms):>17}")
+
+        for fmt in SHARD_FORMATS:
+            directory = os.path.join(root, fmt)
+            # max_pending 足够大：这里测写盘吞吐，不测丢帧
+            recorder = RgbdRecorder(directory, chunk_size=args.chunk_size, shard_format=fmt,
+                                    max_pending=args.frames)
+            recorder.set_camera_info([554.3, 0, 320, 0, 554.3, 240, 0, 0, 1], args.width, args.height)
+            t0 = time.perf_counter()
+            for k, stamp in enumerate(stamps):
+                recorder.add(stamp, colors[k % len(colors)], depths[k % len(depths)], np.zeros(6), stamp)
+            recorder.close()
+            write_fps = args.frames / (time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            for frame in RgbdDataset(directory):
+                # 拷贝出来，mmap 的页才会真正读入（与回放时送入流水线的开销相当）
+                np.array(frame.color), np.array(frame.depth)
+            stream_fps = args.frames / (time.perf_counter() - t0)
+
+            dataset = RgbdDataset(directory)
+            ms = []
+            for q in queries:
+                t0 = time.perf_counter()
+                frame = dataset.nearest(q)
+                np.array(frame.color), np.array(frame.depth)
+                ms.append((time.perf_counter() - t0) * 1000.0)
+            print(f"{fmt + ' shard':>10} | {write_fps:>9.1f} | {dir_size_mb(directory):>7.1f} | "
+                  f"{stream_fps:>10.1f} | {stream_fps * frame_mb:>11.1f} | {seek(ms):>17}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
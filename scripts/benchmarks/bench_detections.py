@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测结果序列化基准：JSON-in-std_msgs/String vs common_msgs/YoloDetectionArray
+每帧 N 个检测，分别测生产端（结果 -> 线上字节）和消费端（线上字节 -> 可用数值）的开销
+
+  json          现有路径：detection_dicts + json.dumps；消费端 json.loads
+  typed-bridge  rosbridge 上的类型化消息：detection_array_msg + json.dumps；消费端 parse_detection_array
+  typed-genpy   ROS1 线上格式，逐检测 struct.pack / unpack（genpy 生成代码的做法）
+  typed-numpy   ROS1 线上格式，DETECTION_DTYPE 一次 tobytes / np.frombuffer
+
+用法: python3 scripts/benchmarks/bench_detections.py [--objects 1 5 20 100]
+无需 ROS / GPU / 模型权重
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, "src", "perception_yolo", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from perception_core import (  # noqa: E402
+    DETECTION_DTYPE,
+    Intrinsics,
+    detection_array_msg,
+    detection_dicts,
+    detection_records,
+    parse_detection_array,
+    postprocess,
+)
+from stub_model import StubModel  # noqa: E402
+
+# YoloDetection 的 ROS1 线上布局（与 DETECTION_DTYPE 一致）
+DETECTION_STRUCT = struct.Struct("<Hf4i2if3f3BIB")
+HEADER = {"seq": 0, "stamp": {"secs": 12, "nsecs": 345}, "frame_id": "camera_rgb_optical_frame"}
+
+
+def pack_string(s):
+    data = s.encode("utf-8")
+    return struct.pack("<I", len(data)) + data
+
+
+def ros1_header(labels):
+    """header + labels 的 ROS1 序列化（两种 typed 路径共用）"""
+    frame_id = HEADER["frame_id"].encode()
+    parts = [struct.pack("<3I", 0, 12, 345), struct.pack("<I", len(frame_id)), frame_id,
+             struct.pack("<I", len(labels))]
+    parts += [pack_string(label) for label in labels]
+    return b"".join(parts)
+
+
+def read_labels(buf):
+    offset = 12
+    (n,) = struct.unpack_from("<I", buf, offset)
+    offset += 4 + n
+    (count,) = struct.unpack_from("<I", buf, offset)
+    offset += 4
+    labels = []
+    for _ in range(count):
+        (n,) = struct.unpack_from("<I", buf, offset)
+        labels.append(buf[offset + 4:offset + 4 + n].decode("utf-8"))
+        offset += 4 + n
+    return labels, offset
+
+
+def genpy_serialize(records, labels):
+    parts = [ros1_header(labels), struct.pack("<I", len(records))]
+    for r in records.tolist():
+        parts.append(DETECTION_STRUCT.pack(r[0], r[1], *r[2], *r[3], r[4], *r[5], *r[6], r[7], r[8]))
+    return b"".join(parts)
+
+
+def genpy_deserialize(buf):
+    labels, offset = read_labels(buf)
+    (n,) = struct.unpack_from("<I", buf, offset)
+    offset += 4
+    dets = []
+    for _ in range(n):
+        v = DETECTION_STRUCT.unpack_from(buf, offset)
+        offset += DETECTION_STRUCT.size
+        dets.append((v[0], v[1], v[2:6], v[6:8], v[8], v[9:12], v[12:15], v[15], v[16]))
+    return labels, dets
+
+
+def numpy_serialize(records, labels):
+    return b"".join([ros1_header(labels), struct.pack("<I", len(records)), records.tobytes()])
+
+
+def numpy_deserialize(buf):
+    labels, offset = read_labels(buf)
+    (n,) = struct.unpack_from("<I", buf, offset)
+    return labels, np.frombuffer(buf, dtype=DETECTION_DTYPE, count=n, offset=offset + 4)
+
+
+def timeit(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1e6 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--objects", type=int, nargs="+", default=[1, 5, 20, 100])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    h, w = 480, 640
+    frame = np.random.default_rng(0).integers(0, 255, size=(h, w, 3), dtype=np.uint8)
+    depth = np.full((h, w), 1.2, dtype=np.float32)
+    intrinsics = Intrinsics(fx=554.3, fy=554.3, cx=319.5, cy=239.5)
+
+    print(f"{'objects':>7} | {'path':>12} | {'bytes':>6} | {'produce (us)':>12} | {'consume (us)':>12}")
+    print("-" * 62)
+    for n in args.objects:
+        model = StubModel(num_objects=n)
+        result = model([frame])[0]
+        dets = postprocess(result, frame, depth, intrinsics, conf_threshold=0.0)
+        names = result.names
+        labels = [names[c] for c in dets.cls.tolist()]
+
+        def produce_json():
+            return json.dumps(detection_dicts(dets, names), ensure_ascii=False)
+
+        def produce_bridge():
+            msg = detection_array_msg(detection_records(dets), names, HEADER)
+            return json.dumps({"op": "publish", "topic": "/t", "msg": msg})
+
+        paths = {
+            "json": (produce_json, lambda p: json.loads(p)),
+            "typed-bridge": (produce_bridge,
+                             lambda p: parse_detection_array(json.loads(p)["msg"]["detections"])),
+            "typed-genpy": (lambda: genpy_serialize(detection_records(dets), labels), genpy_deserialize),
+            "typed-numpy": (lambda: numpy_serialize(detection_records(dets), labels), numpy_deserialize),
+        }
+
+        reference = numpy_deserialize(numpy_serialize(detection_records(dets), labels))[1]
+        for name, (produce, consume) in paths.items():
+            payload = produce()
+            if name != "json":
+                parsed = consume(payload)
+                records = parsed if name == "typed-bridge" else parsed[1]
+                if name == "typed-genpy":
+                    records = np.array(records, dtype=DETECTION_DTYPE)
+                assert records.tobytes() == reference.tobytes(), name
+            produce_us = timeit(produce, args.repeat)
+            consume_us = timeit(lambda: consume(payload), args.repeat)
+            print(f"{n:>7} | {name:>12} | {len(payload):>6} | {produce_us:>12.1f} | {consume_us:>12.1f}")
+        print("-" * 62)
+
+
+if __name__ == "__main__":
+    main()
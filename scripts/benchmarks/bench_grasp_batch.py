@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多物体抓取推理基准：逐物体前向 vs 重采样到固定点数后合批一次前向
+  resample   grasp_core.stack_point_sets：各物体点云 -> (B, num_points, 3)（CPU，真实计时）
+  forward    --model stub：固定启动开销 + 每物体增量的模拟前向（默认，无需 torch）
+             --model pointnet：PointNet 编码器（shared MLP 3-64-128-1024 + max pool），需要 torch，可 --device cuda
+每种物体数报告整帧耗时和每物体耗时
+stub 的代价模型按构造就有利于合批（每次调用固定开销远大于每物体增量），其结果只用于检查流程，
+合批收益以 --model pointnet 或真实网络的结果为准
+
+用法:
+  python3 scripts/benchmarks/bench_grasp_batch.py
+  python3 scripts/benchmarks/bench_grasp_batch.py --model pointnet --device cuda --objects 1 2 4 8 16
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, "src", "perception_grasp", "src"))
+from grasp_core import GRASPNET_NUM_POINTS, stack_point_sets  # noqa: E402
+
+
+def make_objects(num_objects, rng, min_points=2000, max_points=40000):
+    """各物体预处理后的点数差别很大（小零件几千点，大盒子几万点）"""
+    sizes = rng.integers(min_points, max_points, size=num_objects)
+    return [rng.normal(0.0, 0.03, size=(n, 3)) + rng.uniform(-0.3, 0.3, size=3) for n in sizes]
+
+
+def stub_forward(overhead_ms, per_object_ms):
+    """GPU 前向的时间模型：一次前向的固定开销（kernel 启动、同步、Python 调度）+ 每个物体的少量增量"""
+    def forward(batch):
+        time.sleep((overhead_ms + per_object_ms * len(batch)) / 1000.0)
+        return batch.mean(axis=1)
+    return forward
+
+
+def pointnet_forward(device):
+    import torch
+
+    net = torch.nn.Sequential(
+        torch.nn.Conv1d(3, 64, 1), torch.nn.ReLU(),
+        torch.nn.Conv1d(64, 128, 1), torch.nn.ReLU(),
+        torch.nn.Conv1d(128, 1024, 1),
+    ).to(device).eval()
+
+    def forward(batch):
+        cloud = torch.from_numpy(batch).to(device)
+        with torch.no_grad():
+            feat = net(cloud.transpose(1, 2)).max(dim=2).values
+        return feat.cpu().numpy()
+    return forward
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--objects", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--num-points", type=int, default=GRASPNET_NUM_POINTS)
+    parser.add_argument("--model", choices=["stub", "pointnet"], default="stub")
+    parser.add_argument("--device", default="cpu", help="--model pointnet 时的 torch 设备")
+    parser.add_argument("--stub-overhead-ms", type=float, default=40.0)
+    parser.add_argument("--stub-per-object-ms", type=float, default=3.0)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.model == "stub":
+        forward = stub_forward(args.stub_overhead_ms, args.stub_per_object_ms)
+        print(f"stub model: {args.stub_overhead_ms:.0f} ms per forward + "
+              f"{args.stub_per_object_ms:.0f} ms per object "
+              f"(synthetic cost model, batch-friendly by construction; not a measurement)")
+    else:
+        forward = pointnet_forward(args.device)
+        forward(np.zeros((1, args.num_points, 3), dtype=np.float32))  # 预热
+        print(f"PointNet encoder on {args.device}")
+    rng = np.random.default_rng(0)
+
+    print(f"{'objects':>7} | {'mode':>10} | {'resample (ms)':>13} | {'forward (ms)':>12} | "
+          f"{'frame (ms)':>10} | {'per object (ms)':>15}")
+    print("-" * 85)
+    for num_objects in args.objects:
+        objects = make_objects(num_objects, rng)
+        buffer = np.empty((args.max_batch_size, args.num_points, 3), dtype=np.float32)
+        rows = {"per-object": ([], []), "batched": ([], [])}
+        for _ in range(args.repeat):
+            resample_ms, forward_ms = rows["per-object"]
+            for points in objects:
+                t0 = time.perf_counter()
+                batch = stack_point_sets([points], args.num_points, rng, out=buffer)
+                t1 = time.perf_counter()
+                forward(batch)
+                t2 = time.perf_counter()
+                resample_ms.append((t1 - t0) * 1000.0)
+                forward_ms.append((t2 - t1) * 1000.0)
+
+            resample_ms, forward_ms = rows["batched"]
+            for start in range(0, num_objects, args.max_batch_size):
+                chunk = objects[start:start + args.max_batch_size]
+                t0 = time.perf_counter()
+                batch = stack_point_sets(chunk, args.num_points, rng, out=buffer)
+                t1 = time.perf_counter()
+                forward(batch)
+                t2 = time.perf_counter()
+                resample_ms.append((t1 - t0) * 1000.0)
+                forward_ms.append((t2 - t1) * 1000.0)
+
+        for mode, (resample_ms, forward_ms) in rows.items():
+            resample = sum(resample_ms) / args.repeat
+            fwd = sum(forward_ms) / args.repeat
+            frame = resample + fwd
+            print(f"{num_objects:>7} | {mode:>10} | {resample:>13.2f} | {fwd:>12.1f} | "
+                  f"{frame:>10.1f} | {frame / num_objects:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图像保存与调试日志的回调开销：同步 cv2.imwrite / 每条日志 open-append-close
+vs perception_core.ImageWriterPool / AsyncJsonLogger
+按相机频率回放合成帧，统计回调耗时与丢帧：
+  同步写入时回调超过帧间隔的部分会让 queue_size=1 的订阅者丢掉下一帧（missed）
+  写入池队列满时丢弃（dropped）
+
+用法:
+  python3 scripts/benchmarks/bench_image_writer.py
+  python3 scripts/benchmarks/bench_image_writer.py --rate 30 --frames 300 --dir /data/tmp
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, "src", "perception_yolo", "src"))
+from perception_core import IMAGE_FORMATS, AsyncJsonLogger, ImageWriterPool, encode_image  # noqa: E402
+
+
+def make_frames(n, h, w, seed=0):
+    """带噪声的平滑图像（纯噪声会让 JPEG/PNG 编码慢得不真实）"""
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:h, 0:w]
+    base = np.stack([xs * 255 // w, ys * 255 // h, (xs + ys) * 255 // (w + h)], axis=-1)
+    return [np.clip(base + rng.integers(-10, 10, size=base.shape), 0, 255).astype(np.uint8)
+            for _ in range(n)]
+
+
+def replay(frames, rate, callback):
+    """按 rate 回放，返回 (回调耗时 ms 列表, 因回调超时错过的帧数)"""
+    period = 1.0 / rate
+    ms, missed = [], 0
+    t_next = time.perf_counter()
+    for frame in frames:
+        now = time.perf_counter()
+        if now > t_next + period:
+            # 上一次回调占用了这一帧的到达时间，queue_size=1 时这一帧被覆盖
+            missed += int((now - t_next) / period)
+            t_next = now
+        else:
+            time.sleep(max(0.0, t_next - now))
+        t0 = time.perf_counter()
+        callback(frame)
+        ms.append((time.perf_counter() - t0) * 1000.0)
+        t_next += period
+    return ms, missed
+
+
+def sync_writer(directory, fmt, args):
+    counter = [0]
+
+    def callback(frame):
+        counter[0] += 1
+        path = os.path.join(directory, f"sync_{counter[0]}.{fmt}")
+        with open(path, "wb") as f:
+            f.write(encode_image(frame, fmt, args.jpeg_quality, args.png_compression))
+    return callback
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--rate", type=float, default=30.0, help="相机频率（Hz）")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--formats", nargs="+", choices=IMAGE_FORMATS, default=list(IMAGE_FORMATS))
+    parser.add_argument("--jpeg-quality", type=int, default=95)
+    parser.add_argument("--png-compression", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--queue", type=int, default=64)
+    parser.add_argument("--dir", default=None, help="写入目录（默认临时目录，结束后删除）")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_writer_", dir=args.dir)
+    frames = make_frames(8, args.height, args.width)
+    stream = [frames[k % len(frames)] for k in range(args.frames)]
+    try:
+        print(f"{args.frames} frames {args.width}x{args.height} @ {args.rate:.0f} Hz -> {directory}")
+        print(f"{'format':>6} | {'mode':>5} | {'cb p50 (ms)':>11} | {'cb p99 (ms)':>11} | "
+              f"{'missed':>6} | {'dropped':>7} | {'write p50 (ms)':>14}")
+        print("-" * 80)
+        for fmt in args.formats:
+            ms, missed = replay(stream, args.rate, sync_writer(directory, fmt, args))
+            print(f"{fmt:>6} | {'sync':>5} | {np.percentile(ms, 50):>11.2f} | {np.percentile(ms, 99):>11.2f} | "
+                  f"{missed:>6} | {'-':>7} | {np.percentile(ms, 50):>14.2f}")
+
+            pool = ImageWriterPool(fmt, num_workers=args.threads, max_queue=args.queue,
+                                   jpeg_quality=args.jpeg_quality, png_compression=args.png_compression)
+            counter = [0]
+
+            def callback(frame):
+                counter[0] += 1
+                pool.submit(os.path.join(directory, f"pool_{counter[0]}"), frame)
+
+            ms, missed = replay(stream, args.rate, callback)
+            pool.close()
+            s = pool.stats()
+            print(f"{fmt:>6} | {'pool':>5} | {np.percentile(ms, 50):>11.2f} | {np.percentile(ms, 99):>11.2f} | "
+                  f"{missed:>6} | {s['dropped']:>7} | {s['write_ms_p50']:>14.2f}")
+
+        # 调试日志：每条记录 open-append-close vs 异步批量写入
+        n = 10000
+        path = os.path.join(directory, "debug.log")
+        record = {"location": "callback", "message": "skip_save_interval", "data": {"now": 1.0}}
+        t0 = time.perf_counter()
+        for _ in range(n):
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(str(record).replace("'", "\"") + "\n")
+        sync_us = (time.perf_counter() - t0) / n * 1e6
+        log = AsyncJsonLogger(path)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            log.log(record)
+        async_us = (time.perf_counter() - t0) / n * 1e6
+        log.close()
+        print(f"debug log per record: open-append-close {sync_us:.1f} us, AsyncJsonLogger.log {async_us:.2f} us")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测流水线离线基准：decode -> inference -> postprocess -> serialize -> publish
+回放录制的 RGB-D 帧（或合成帧），走与 rosbridge 脚本相同的 DetectionPipeline，
+输出每个阶段的 p50/p90/p99 和整体 FPS
+
+用法:
+  python3 scripts/benchmarks/bench_pipeline.py                      # 合成帧 + 假模型
+  python3 scripts/benchmarks/bench_pipeline.py --mode seg --stub-latency-ms 8
+  python3 scripts/benchmarks/bench_pipeline.py --stub-latency-ms 30 --detect-every 3
+  python3 scripts/benchmarks/bench_pipeline.py --stub-latency-ms 30 --imgsz-set 320 480 640 --box-size 0.2 0.4
+  python3 scripts/benchmarks/bench_pipeline.py --frames /data/rgbd --model weights/yolo/yolo26n.pt
+
+录制目录格式（--frames）:
+  camera_view_capture_node.py ~mode:=dataset 录制的 RgbdDataset 目录（含 index.json），或
+  camera_info.json   {"K": [fx, 0, cx, 0, fy, cy, 0, 0, 1]}
+  *.npz              每帧一个文件：rgb (HxWx3 uint8, RGB 顺序), depth (HxW uint16 毫米或 float32 米), stamp (秒)
+--model stub 时无需 ROS / GPU / 模型权重；其他值按 ultralytics 权重路径加载
+"""
+
+import argparse
+import base64
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, "src", "perception_yolo", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from perception_core import (  # noqa: E402
+    DetectionPipeline,
+    Intrinsics,
+    MicroBatcher,
+    PixelRays,
+    ResolutionSelector,
+    RgbdDataset,
+    StageTimer,
+    ultralytics_infer,
+)
+from stub_model import StubModel  # noqa: E402
+
+
+def load_frames(directory, limit):
+    if os.path.exists(os.path.join(directory, "index.json")):
+        dataset = RgbdDataset(directory)
+        frames = [(np.ascontiguousarray(f.color[..., ::-1]), np.asarray(f.depth), float(f.stamp))
+                  for _, f in zip(range(limit), dataset)]
+        if not frames:
+            raise FileNotFoundError(f"empty dataset: {directory}")
+        return frames, dataset.intrinsics
+
+    with open(os.path.join(directory, "camera_info.json")) as f:
+        intrinsics = Intrinsics.from_K(json.load(f)["K"])
+    frames = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.npz")))[:limit]:
+        with np.load(path) as data:
+            stamp = float(data["stamp"]) if "stamp" in data else float(len(frames)) / 30.0
+            frames.append((data["rgb"], data["depth"], stamp))
+    if not frames:
+        raise FileNotFoundError(f"no *.npz frames in {directory}")
+    return frames, intrinsics
+
+
+def synthetic_frames(n, h, w, seed=0):
+    """平滑的彩色背景 + 0.4~2.5 m 的深度斜坡，带噪声和少量空洞"""
+    rng = np.random.default_rng(seed)
+    intrinsics = Intrinsics(fx=554.3, fy=554.3, cx=(w - 1) / 2.0, cy=(h - 1) / 2.0)
+    ys, xs = np.mgrid[0:h, 0:w]
+    base = np.stack([xs * 255 // w, ys * 255 // h, (xs + ys) * 255 // (w + h)], axis=-1)
+    ramp = 400 + ys * (2100 // h)
+    frames = []
+    for k in range(n):
+        rgb = np.clip(base + rng.integers(-8, 8, size=base.shape), 0, 255).astype(np.uint8)
+        depth = (ramp + rng.integers(-5, 5, size=ramp.shape)).astype(np.uint16)
+        depth[rng.random(depth.shape) < 0.02] = 0
+        frames.append((rgb, depth, k / 30.0))
+    return frames, intrinsics
+
+
+def image_msg(array, encoding, stamp, transport):
+    """np.ndarray -> rosbridge sensor_msgs/Image dict；json 传输时 data 为 base64 字符串"""
+    data = np.ascontiguousarray(array).tobytes()
+    if transport == "json":
+        data = base64.b64encode(data).decode("ascii")
+    h, w = array.shape[:2]
+    secs = int(stamp)
+    return {
+        "header": {"seq": 0, "stamp": {"secs": secs, "nsecs": int((stamp - secs) * 1e9)},
+                   "frame_id": "camera_rgb_optical_frame"},
+        "height": h,
+        "width": w,
+        "encoding": encoding,
+        "is_bigendian": 0,
+        "step": array.strides[0],
+        "data": data,
+    }
+
+
+def encode_frames(frames, transport):
+    out = []
+    for rgb, depth, stamp in frames:
+        depth_encoding = "32FC1" if depth.dtype == np.float32 else "16UC1"
+        out.append((image_msg(rgb, "rgb8", stamp, transport),
+                    image_msg(depth, depth_encoding, stamp, transport)))
+    return out
+
+
+def publish(out):
+    """模拟 roslibpy 的 publish：把 op 帧序列化成 JSON 文本"""
+    if out.json is not None:
+        json.dumps({"op": "publish", "topic": "/perception/detections", "msg": {"data": out.json}})
+    if out.cloud is not None:
+        json.dumps({"op": "publish", "topic": "/perception/cloud", "msg": out.cloud})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", default=None, help="录制帧目录；不指定则用合成帧")
+    parser.add_argument("--num-frames", type=int, default=60)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--mode", choices=("detect", "seg"), default="detect")
+    parser.add_argument("--model", default="stub", help="stub 或 ultralytics 权重路径")
+    parser.add_argument("--objects", type=int, default=5, help="假模型每帧检测数")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="假模型每次推理的模拟耗时")
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--max-points-per-obj", type=int, default=3000)
+    parser.add_argument("--transport", choices=("json", "cbor"), default="json")
+    parser.add_argument("--box-size", type=float, nargs=2, default=(0.05, 0.3),
+                        help="假模型框边长占图像的比例范围")
+    parser.add_argument("--imgsz-set", type=int, nargs="+", default=None,
+                        help="逐帧从这些尺寸中选择推理分辨率；不指定则固定 640")
+    parser.add_argument("--latency-budget-ms", type=float, default=100.0)
+    parser.add_argument("--detect-every", type=int, default=1, help="每 N 帧跑一次网络，中间帧外推框")
+    parser.add_argument("--repeat", type=int, default=3, help="回放轮数")
+    parser.add_argument("--warmup", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.frames:
+        frames, intrinsics = load_frames(args.frames, args.num_frames)
+        source = args.frames
+    else:
+        frames, intrinsics = synthetic_frames(args.num_frames, args.height, args.width)
+        source = "synthetic"
+    msgs = encode_frames(frames, args.transport)
+    h, w = frames[0][0].shape[:2]
+    rays = PixelRays(intrinsics, w, h)
+
+    if args.model == "stub":
+        model = StubModel(num_objects=args.objects, latency_ms=args.stub_latency_ms,
+                          seg=args.mode == "seg", box_size=args.box_size)
+    else:
+        from ultralytics import YOLO
+        model = YOLO(args.model)
+    resolution = None
+    if args.imgsz_set:
+        resolution = ResolutionSelector(args.imgsz_set, args.latency_budget_ms / 1000.0)
+    batcher = MicroBatcher(ultralytics_infer(model, resolution), max_batch_size=1)
+
+    seg = args.mode == "seg"
+    pipeline = DetectionPipeline(batcher.infer, args.conf, with_color=not seg,
+                                 seg_max_points=args.max_points_per_obj if seg else None,
+                                 detect_every=args.detect_every, resolution=resolution)
+
+    for k in range(args.warmup):
+        pipeline.run(*msgs[k % len(msgs)], rays)
+    pipeline.timer = StageTimer(window=len(msgs) * args.repeat)
+
+    t_start = time.perf_counter()
+    for _ in range(args.repeat):
+        for rgb_msg, depth_msg in msgs:
+            with pipeline.timer.stage("total"):
+                out = pipeline.run(rgb_msg, depth_msg, rays)
+                with pipeline.timer.stage("publish"):
+                    publish(out)
+    elapsed = time.perf_counter() - t_start
+    batcher.close()
+
+    n = len(msgs) * args.repeat
+    print(f"{source}: {len(msgs)} frames {w}x{h} x {args.repeat}, mode={args.mode}, "
+          f"model={args.model}, transport={args.transport}, detect_every={args.detect_every}")
+    print(f"{'stage':>11} | {'mean':>7} | {'p50':>7} | {'p90':>7} | {'p99':>7}  (ms)")
+    print("-" * 52)
+    for name, row in pipeline.timer.summary().items():
+        print(f"{name:>11} | {row['mean_ms']:>7.2f} | {row['p50_ms']:>7.2f} | "
+              f"{row['p90_ms']:>7.2f} | {row['p99_ms']:>7.2f}")
+    print(f"throughput: {n / elapsed:.1f} FPS")
+    if resolution is not None:
+        print(f"resolution: {resolution.format_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PointCloud2 解析基准：pc2.read_points 逐点循环 vs grasp_core.pointcloud2_to_xyz（结构化 dtype 视图）
+合成 Gazebo 深度相机的有序点云（x, y, z, rgb，point_step 32，带 NaN 空洞）
+legacy 复现 sensor_msgs.point_cloud2.read_points(skip_nans=True) + 逐点 append 的做法
+无需 ROS / GPU
+
+用法:
+  python3 scripts/benchmarks/bench_pointcloud2_parse.py
+  python3 scripts/benchmarks/bench_pointcloud2_parse.py --sizes 320x240 640x480 1280x720
+"""
+
+import argparse
+import math
+import os
+import struct
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, "src", "perception_grasp", "src"))
+from grasp_core import pointcloud2_to_xyz  # noqa: E402
+
+# Gazebo openni_kinect 插件的布局：x y z 各 float32，4 字节填充，rgb float32，再填充到 32 字节
+FIELDS = [
+    SimpleNamespace(name="x", offset=0, datatype=7, count=1),
+    SimpleNamespace(name="y", offset=4, datatype=7, count=1),
+    SimpleNamespace(name="z", offset=8, datatype=7, count=1),
+    SimpleNamespace(name="rgb", offset=16, datatype=7, count=1),
+]
+POINT_STEP = 32
+
+
+def make_cloud(width, height, nan_ratio=0.1, seed=0):
+    rng = np.random.default_rng(seed)
+    data = np.zeros((height, width, POINT_STEP // 4), dtype=np.float32)
+    us, vs = np.meshgrid(np.arange(width), np.arange(height))
+    z = rng.uniform(0.4, 2.5, size=(height, width)).astype(np.float32)
+    data[..., 0] = (us - width / 2) * z / 554.3
+    data[..., 1] = (vs - height / 2) * z / 554.3
+    data[..., 2] = z
+    data[..., 4] = rng.random((height, width))
+    data[rng.random((height, width)) < nan_ratio, :3] = np.nan
+    return SimpleNamespace(height=height, width=width, fields=FIELDS, is_bigendian=False,
+                           point_step=POINT_STEP, row_step=POINT_STEP * width,
+                           data=data.tobytes(), is_dense=False)
+
+
+def legacy_read_points(msg, field_names=("x", "y", "z"), skip_nans=True):
+    """sensor_msgs.point_cloud2.read_points 的实现（逐点 struct.unpack_from）
+    这里的 field_names 为相邻的 float32，格式串即 "<fff"
+    """
+    offsets = {f.name: f.offset for f in msg.fields}
+    unpack_from = struct.Struct("<" + "f" * len(field_names)).unpack_from
+    isnan = math.isnan
+    data, point_step, row_step = msg.data, msg.point_step, msg.row_step
+    x_offset = offsets[field_names[0]]
+    for v in range(msg.height):
+        offset = row_step * v + x_offset
+        for _ in range(msg.width):
+            p = unpack_from(data, offset)
+            offset += point_step
+            if skip_nans and any(isnan(pv) for pv in p):
+                continue
+            yield p
+
+
+def legacy_to_numpy(msg):
+    """旧 GraspEstimatorNode._ros_pointcloud_to_numpy"""
+    points_list = []
+    for point in legacy_read_points(msg, skip_nans=True, field_names=("x", "y", "z")):
+        points_list.append([point[0], point[1], point[2]])
+    return np.array(points_list, dtype=np.float32)
+
+
+def time_it(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples)) * 1000.0, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", default=["320x240", "640x480"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--legacy-repeat", type=int, default=1, help="逐点循环很慢，默认只跑一次")
+    args = parser.parse_args()
+
+    print(f"{'cloud':>9} | {'points':>7} | {'legacy (ms)':>11} | {'numpy (ms)':>10} | "
+          f"{'organized (ms)':>14} | {'speed-up':>8}")
+    print("-" * 76)
+    for size in args.sizes:
+        width, height = (int(v) for v in size.split("x"))
+        msg = make_cloud(width, height)
+        t_legacy, ref = time_it(lambda: legacy_to_numpy(msg), args.legacy_repeat)
+        t_numpy, out = time_it(lambda: pointcloud2_to_xyz(msg), args.repeat)
+        t_org, _ = time_it(lambda: pointcloud2_to_xyz(msg, organized=True), args.repeat)
+        if not np.array_equal(ref, out):
+            raise AssertionError(f"{size}: numpy result differs from read_points")
+        print(f"{size:>9} | {len(out):>7} | {t_legacy:>11.1f} | {t_numpy:>10.2f} | "
+              f"{t_org:>14.3f} | {t_legacy / t_numpy:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+隔帧检测的精度 / 开销基准：每 N 帧检测一次，中间帧由 BoxTracker 外推框
+合成场景：若干物体在图像中匀速 + 随机加速度运动（模拟相机随机械臂移动），
+检测帧的框带像素噪声；对比每帧中外推框与真值的 IoU，
+以及不外推（沿用上次检测的框）的 IoU
+
+用法:
+  python3 scripts/benchmarks/bench_tracking.py
+  python3 scripts/benchmarks/bench_tracking.py --every 1 2 3 5 10 --speed 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, "src", "perception_yolo", "src"))
+from perception_core import BoxTracker, box_iou  # noqa: E402
+
+
+def simulate(num_frames, num_objects, fps, speed, accel, noise, w, h, seed=0):
+    """返回每帧真值框 (T, M, 4) 和带噪声的检测框"""
+    rng = np.random.default_rng(seed)
+    size = rng.uniform(40, 120, size=(num_objects, 2))
+    pos = rng.uniform([0, 0], [w, h], size=(num_objects, 2))
+    vel = rng.normal(0, speed, size=(num_objects, 2))
+    dt = 1.0 / fps
+    truth = np.empty((num_frames, num_objects, 4), dtype=np.float32)
+    for t in range(num_frames):
+        truth[t, :, :2] = pos - size / 2
+        truth[t, :, 2:] = pos + size / 2
+        vel += rng.normal(0, accel * dt, size=vel.shape)
+        pos = pos + vel * dt
+        # 碰到边界反弹，物体保持在画面内
+        for axis, limit in ((0, w), (1, h)):
+            out = (pos[:, axis] < 0) | (pos[:, axis] > limit)
+            vel[out, axis] *= -1
+            pos[:, axis] = np.clip(pos[:, axis], 0, limit)
+    detected = truth + rng.normal(0, noise, size=truth.shape).astype(np.float32)
+    return truth, detected
+
+
+def matched_iou(pred, truth):
+    """每个真值框与预测框的最大 IoU 的均值"""
+    if len(pred) == 0:
+        return 0.0
+    return float(box_iou(truth, pred).max(axis=1).mean())
+
+
+def run(truth, detected, every, fps):
+    tracker = BoxTracker()
+    cls = np.zeros(truth.shape[1], dtype=int)
+    conf = np.ones(truth.shape[1], dtype=np.float32)
+    held = None
+    iou_prop, iou_hold, predict_us = [], [], []
+    for t in range(len(truth)):
+        stamp = t / fps
+        if t % every == 0:
+            tracker.update(detected[t], cls, conf, stamp)
+            held = detected[t]
+            continue
+        t0 = time.perf_counter()
+        boxes, _, _ = tracker.predict(stamp)
+        predict_us.append((time.perf_counter() - t0) * 1e6)
+        iou_prop.append(matched_iou(boxes, truth[t]))
+        iou_hold.append(matched_iou(held, truth[t]))
+    return iou_prop, iou_hold, predict_us
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--every", type=int, nargs="+", default=[1, 2, 3, 5, 10])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--objects", type=int, default=8)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--speed", type=float, default=120.0, help="物体初速度标准差（像素/秒）")
+    parser.add_argument("--accel", type=float, default=150.0, help="随机加速度标准差（像素/秒²）")
+    parser.add_argument("--noise", type=float, default=2.0, help="检测框坐标噪声标准差（像素）")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    truth, detected = simulate(args.frames, args.objects, args.fps, args.speed, args.accel,
+                               args.noise, args.width, args.height)
+    detected_iou = np.mean([matched_iou(detected[t], truth[t]) for t in range(len(truth))])
+
+    print(f"{args.objects} objects, {args.frames} frames @ {args.fps:.0f} FPS, "
+          f"speed={args.speed:.0f}px/s, noise={args.noise:.1f}px; detected-frame IoU={detected_iou:.3f}")
+    print(f"{'every':>5} | {'net runs':>8} | {'IoU propagated':>14} | {'IoU hold-last':>13} | "
+          f"{'predict (us)':>12}")
+    print("-" * 66)
+    for every in args.every:
+        iou_prop, iou_hold, predict_us = run(truth, detected, every, args.fps)
+        runs = (args.frames + every - 1) // every
+        if not iou_prop:
+            print(f"{every:>5} | {runs:>8} | {detected_iou:>14.3f} | {detected_iou:>13.3f} | {'-':>12}")
+            continue
+        print(f"{every:>5} | {runs:>8} | {np.mean(iou_prop):>14.3f} | {np.mean(iou_hold):>13.3f} | "
+              f"{np.median(predict_us):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+rosbridge 图像传输基准：JSON/base64 vs CBOR vs CBOR-raw
+模拟 640x480 rgb8 + 16UC1 深度一对帧，从 websocket 负载到 np.ndarray 的完整接收开销
+用法: python3 scripts/benchmarks/bench_transport.py [--width 640 --height 480]
+需要 cbor2（pip install cbor2）
+"""
+
+import argparse
+import base64
+import json
+import os
+import struct
+import sys
+import time
+
+import cbor2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, "src", "perception_yolo", "src"))
+from perception_core import as_image_msg, image_buffer  # noqa: E402
+
+
+def make_image(h, w, encoding, data):
+    return {
+        "header": {"seq": 0, "stamp": {"secs": 12, "nsecs": 345}, "frame_id": "camera"},
+        "height": h,
+        "width": w,
+        "encoding": encoding,
+        "is_bigendian": 0,
+        "step": len(data) // h,
+        "data": data,
+    }
+
+
+def serialize_ros_image(msg):
+    """ROS1 序列化 sensor_msgs/Image（cbor-raw 负载）"""
+    frame_id = msg["header"]["frame_id"].encode()
+    encoding = msg["encoding"].encode()
+    stamp = msg["header"]["stamp"]
+    return b"".join([
+        struct.pack("<4I", 0, stamp["secs"], stamp["nsecs"], len(frame_id)), frame_id,
+        struct.pack("<3I", msg["height"], msg["width"], len(encoding)), encoding,
+        struct.pack("<BII", 0, msg["step"], len(msg["data"])), msg["data"],
+    ])
+
+
+def wrap(topic, msg):
+    return {"op": "publish", "topic": topic, "msg": msg}
+
+
+def receive(payload, loads):
+    """websocket 负载 -> numpy（与 decode_image/decode_depth 相同的操作）"""
+    out = []
+    for p in payload:
+        msg = as_image_msg(loads(p)["msg"])
+        data = image_buffer(msg["data"])
+        h, w = msg["height"], msg["width"]
+        if msg["encoding"] == "16UC1":
+            out.append(np.frombuffer(data, dtype=np.uint16).reshape(h, w).astype(np.float32) / 1000.0)
+        else:
+            out.append(np.frombuffer(data, dtype=np.uint8).reshape(h, w, 3))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    h, w = args.height, args.width
+    rgb = rng.integers(0, 255, size=(h, w, 3), dtype=np.uint8).tobytes()
+    depth = rng.integers(300, 3000, size=(h, w), dtype=np.uint16).tobytes()
+    rgb_msg = make_image(h, w, "rgb8", rgb)
+    depth_msg = make_image(h, w, "16UC1", depth)
+
+    def json_payload(m):
+        m = dict(m, data=base64.b64encode(m["data"]).decode("ascii"))
+        return json.dumps(wrap("/img", m)).encode("utf8")
+
+    modes = {
+        "json": ([json_payload(rgb_msg), json_payload(depth_msg)],
+                 lambda p: json.loads(p.decode("utf8"))),
+        "cbor": ([cbor2.dumps(wrap("/img", rgb_msg)), cbor2.dumps(wrap("/img", depth_msg))],
+                 cbor2.loads),
+        "cbor-raw": ([cbor2.dumps(wrap("/img", {"secs": 0, "nsecs": 0, "bytes": serialize_ros_image(m)}))
+                      for m in (rgb_msg, depth_msg)],
+                     cbor2.loads),
+    }
+
+    reference = receive(*modes["json"])
+    print(f"RGB {w}x{h} rgb8 + depth 16UC1, {args.repeat} frame pairs")
+    print(f"{'transport':>9} | {'wire (KB)':>9} | {'ms/pair':>8} | {'max Hz':>7}")
+    print("-" * 44)
+    baseline = None
+    for name, (payload, loads) in modes.items():
+        decoded = receive(payload, loads)
+        assert all(np.array_equal(a, b) for a, b in zip(decoded, reference)), name
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            receive(payload, loads)
+        ms = (time.perf_counter() - t0) * 1000.0 / args.repeat
+        baseline = baseline or ms
+        wire_kb = sum(len(p) for p in payload) / 1024.0
+        print(f"{name:>9} | {wire_kb:>9.0f} | {ms:>8.2f} | {1000.0 / ms:>7.0f}"
+              + ("" if name == "json" else f"  ({baseline / ms:.1f}x)"))
+
+
+if __name__ == "__main__":
+    main()
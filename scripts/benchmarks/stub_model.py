@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+基准用的假模型：接口与 ultralytics.YOLO 相同（model(frames, **kwargs) -> results），
+输出随机检测框（分割模式下附带框内椭圆掩码），用 sleep 模拟推理耗时
+不依赖 torch / GPU，用于在没有权重的机器上测量流水线其余阶段的开销
+"""
+
+import time
+
+import numpy as np
+
+COCO_SUBSET = {0: "person", 39: "bottle", 41: "cup", 46: "banana", 47: "apple", 49: "orange"}
+
+
+class _Tensor:
+    """只实现后处理用到的 torch.Tensor 接口：.cpu().numpy()、len、下标"""
+
+    def __init__(self, array):
+        self._array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._array
+
+    def __len__(self):
+        return len(self._array)
+
+    def __getitem__(self, index):
+        return _Tensor(self._array[index])
+
+
+class _Boxes:
+    def __init__(self, data):
+        self.data = _Tensor(data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+class _Masks:
+    def __init__(self, data):
+        self.data = _Tensor(data)
+
+
+class StubResult:
+    def __init__(self, boxes, masks, names):
+        self.boxes = _Boxes(boxes)
+        self.masks = None if masks is None else _Masks(masks)
+        self.names = names
+
+
+class StubModel:
+    """num_objects: 每帧检测数；latency_ms: 每次 forward 的固定耗时 + per_frame_ms * 帧数
+    （imgsz=640 时；传入其他 imgsz 时按 (imgsz / 640)² 缩放）
+    seg: 是否输出掩码（分辨率为原图的 1/mask_stride）
+    box_size: 框边长占图像宽 / 高的比例范围
+    """
+
+    def __init__(self, num_objects=5, latency_ms=0.0, per_frame_ms=0.0, seg=False,
+                 mask_stride=4, seed=0, box_size=(0.05, 0.3)):
+        self.num_objects = num_objects
+        self.latency = latency_ms / 1000.0
+        self.per_frame = per_frame_ms / 1000.0
+        self.seg = seg
+        self.mask_stride = mask_stride
+        self.box_size = box_size
+        self.names = {k: COCO_SUBSET.get(k, f"class_{k}") for k in range(80)}
+        self._rng = np.random.default_rng(seed)
+        self._classes = np.array(sorted(COCO_SUBSET))
+
+    def __call__(self, frames, **kwargs):
+        scale = (kwargs.get("imgsz", 640) / 640.0) ** 2
+        t_end = time.perf_counter() + (self.latency + self.per_frame * len(frames)) * scale
+        results = [self._predict(frame) for frame in frames]
+        remaining = t_end - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        return results
+
+    def _predict(self, frame):
+        h, w = frame.shape[:2]
+        n = self.num_objects
+        rng = self._rng
+
+        bw = rng.uniform(*self.box_size, n) * w
+        bh = rng.uniform(*self.box_size, n) * h
+        x1 = rng.uniform(0, w - bw)
+        y1 = rng.uniform(0, h - bh)
+        # data 列与 ultralytics 相同：x1, y1, x2, y2, conf, cls
+        boxes = np.stack([
+            x1, y1, x1 + bw, y1 + bh,
+            rng.uniform(0.3, 0.95, n),
+            rng.choice(self._classes, n),
+        ], axis=1).astype(np.float32)
+
+        masks = None
+        if self.seg:
+            mh, mw = h // self.mask_stride, w // self.mask_stride
+            ys, xs = np.mgrid[0:mh, 0:mw].astype(np.float32)
+            masks = np.zeros((n, mh, mw), dtype=np.float32)
+            for k in range(n):
+                cx = (boxes[k, 0] + boxes[k, 2]) / 2 / self.mask_stride
+                cy = (boxes[k, 1] + boxes[k, 3]) / 2 / self.mask_stride
+                rx = max(bw[k] / 2 / self.mask_stride, 1.0)
+                ry = max(bh[k] / 2 / self.mask_stride, 1.0)
+                masks[k] = (((xs - cx) / rx) ** 2 + ((ys - cy) / ry) ** 2 <= 1.0)
+        return StubResult(boxes, masks, self.names)
@@ -6,56 +6,37 @@ GPU YOLO26 推理（rosbridge 订阅图像与深度）
 """
 
 import argparse
-import base64
 import json
+import os
+import sys
 import time
 
-import cv2
-import numpy as np
 import roslibpy
-from ultralytics import YOLO
 
-
-def decode_image(msg):
-    data = msg["data"]
-    if isinstance(data, str):
-        data = base64.b64decode(data)
-    else:
-        data = bytes(data)
-
-    h = msg["height"]
-    w = msg["width"]
-    encoding = msg["encoding"]
-
-    if encoding == "rgb8":
-        img = np.frombuffer(data, dtype=np.uint8).reshape(h, w, 3)
-        return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-    if encoding == "bgr8":
-        return np.frombuffer(data, dtype=np.uint8).reshape(h, w, 3)
-    if encoding == "mono8":
-        return np.frombuffer(data, dtype=np.uint8).reshape(h, w)
-
-    raise ValueError(f"Unsupported encoding: {encoding}")
-
-
-def decode_depth(msg):
-    data = msg["data"]
-    if isinstance(data, str):
-        data = base64.b64decode(data)
-    else:
-        data = bytes(data)
-
-    h = msg["height"]
-    w = msg["width"]
-    encoding = msg["encoding"]
-
-    if encoding == "16UC1":
-        depth = np.frombuffer(data, dtype=np.uint16).reshape(h, w)
-        return depth.astype(np.float32) / 1000.0
-    if encoding == "32FC1":
-        return np.frombuffer(data, dtype=np.float32).reshape(h, w)
-
-    raise ValueError(f"Unsupported depth encoding: {encoding}")
+# perception_core 位于 src/perception_yolo/src（容器内挂载到 /workspace/src/perception_yolo）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "src", "perception_yolo", "src"))
+from perception_core import (  # noqa: E402
+    AdaptiveRateController,
+    BACKENDS,
+    CameraModel,
+    DepthRingBuffer,
+    DetectionPipeline,
+    InferenceWorker,
+    LatestFrameMailbox,
+    MicroBatcher,
+    ResolutionSelector,
+    DETECTION_FORMATS,
+    TRANSPORTS,
+    as_image_msg,
+    enable_binary_transport,
+    format_detection,
+    format_flags,
+    image_topic,
+    load_model,
+    stamp_to_sec,
+    ultralytics_infer,
+)
 
 
 def main():
@@ -67,49 +48,83 @@ def main():
     parser.add_argument("--depth", default="/camera/depth/image_raw")
     parser.add_argument("--camera-info", default="/camera/rgb/camera_info")
     parser.add_argument("--conf", type=float, default=0.5)
-    parser.add_argument("--print-interval", type=float, default=0.2)
+    parser.add_argument("--backend", choices=BACKENDS, default="torch",
+                        help="推理后端：torch(eager) / onnx / openvino（首次运行导出并缓存）")
+    parser.add_argument("--imgsz", type=int, default=640, help="推理输入尺寸（导出缓存按此区分）")
+    parser.add_argument("--imgsz-set", type=int, nargs="+", default=None,
+                        help="逐帧从这些尺寸中选择推理分辨率（如 320 480 640），按近期框尺寸与延迟预算；"
+                             "不指定则固定使用 --imgsz")
+    parser.add_argument("--export-cache", default=None,
+                        help="导出产物缓存目录（默认为权重旁的 exported/）")
+    parser.add_argument("--latency-budget-ms", type=float, default=100.0,
+                        help="端到端延迟预算（帧到达 -> 发布），处理频率按此自适应")
+    parser.add_argument("--min-rate", type=float, default=1.0, help="自适应处理频率下限（Hz）")
+    parser.add_argument("--max-rate", type=float, default=30.0, help="自适应处理频率上限（Hz）")
+    parser.add_argument("--depth-slop", type=float, default=0.1,
+                        help="RGB 与深度 header.stamp 允许的最大时间差（秒）")
+    parser.add_argument("--depth-buffer", type=int, default=10,
+                        help="按时间戳缓存的深度消息条数")
+    parser.add_argument("--depth-window", type=float, default=0.5,
+                        help="距离取检测框中心多大比例区域内有效深度的均值（1.0 = 整个框）")
+    parser.add_argument("--transport", choices=TRANSPORTS, default="json",
+                        help="图像传输方式：json(base64) / cbor / cbor-raw（需要 cbor2）")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="推理线程数；>1 时配合 --batch-size 合批")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="微批推理的最大帧数（1 = 逐帧推理）")
+    parser.add_argument("--batch-wait-ms", type=float, default=5.0,
+                        help="凑批的最长等待时间（毫秒）")
+    parser.add_argument("--stats-interval", type=float, default=5.0,
+                        help="每隔多少秒打印一次收帧/处理/丢帧统计（<=0 关闭）")
+    parser.add_argument("--detection-format", choices=DETECTION_FORMATS, default="json",
+                        help="检测结果格式：json(std_msgs/String，兼容旧工具，默认；经 rosbridge 时比 typed 更小更快) / "
+                             "typed(common_msgs/YoloDetectionArray，rosbridge 端需已编译 common_msgs) / both")
+    parser.add_argument("--detect-every", type=int, default=1,
+                        help="每 N 帧跑一次网络，中间帧按速度外推框（propagated=true）；"
+                             "向 /perception/yolo26_detect_request 发 std_msgs/Empty 可强制下一帧检测")
     args = parser.parse_args()
 
-    model = YOLO(args.model)
-    last_print = 0.0
-    latest_depth = {"msg": None, "t": 0.0}
-    cam_intrinsics = {"fx": None, "fy": None, "cx": None, "cy": None}
+    model = load_model(args.model, args.backend, args.imgsz, args.export_cache)
+    resolution = None
+    if args.imgsz_set:
+        resolution = ResolutionSelector(args.imgsz_set, args.latency_budget_ms / 1000.0)
+    batcher = MicroBatcher(ultralytics_infer(model, resolution, imgsz=args.imgsz),
+                           args.batch_size, args.batch_wait_ms)
+    with_json, with_typed = format_flags(args.detection_format)
+    pipeline = DetectionPipeline(batcher.infer, args.conf, depth_window=args.depth_window,
+                                 with_json=with_json, with_typed=with_typed,
+                                 detect_every=args.detect_every, resolution=resolution)
+    depth_buffer = DepthRingBuffer(maxlen=args.depth_buffer)
+    camera = CameraModel()
 
     ros = roslibpy.Ros(host=args.host, port=args.port)
+    if args.transport != "json":
+        enable_binary_transport(ros)
     ros.run()
 
-    depth_topic = roslibpy.Topic(ros, args.depth, "sensor_msgs/Image")
-    rgb_topic = roslibpy.Topic(ros, args.rgb, "sensor_msgs/Image")
+    depth_topic = image_topic(ros, args.depth, args.transport)
+    rgb_topic = image_topic(ros, args.rgb, args.transport)
     info_topic = roslibpy.Topic(ros, args.camera_info, "sensor_msgs/CameraInfo")
+    request_topic = roslibpy.Topic(ros, "/perception/yolo26_detect_request", "std_msgs/Empty")
     result_topic = roslibpy.Topic(ros, "/perception/yolo26_detections", "std_msgs/String")
+    rate_topic = roslibpy.Topic(ros, "/perception/yolo26_rate", "std_msgs/String")
+    typed_topic = roslibpy.Topic(ros, "/perception/yolo26_detection_array", "common_msgs/YoloDetectionArray")
 
     def on_camera_info(msg):
-        if cam_intrinsics["fx"] is None:
-            K = msg["K"]
-            cam_intrinsics["fx"] = K[0]
-            cam_intrinsics["fy"] = K[4]
-            cam_intrinsics["cx"] = K[2]
-            cam_intrinsics["cy"] = K[5]
-            print(f"Camera intrinsics: fx={K[0]:.1f} fy={K[4]:.1f} cx={K[2]:.1f} cy={K[5]:.1f}")
-
-    def pixel_to_3d(u, v, z):
-        fx = cam_intrinsics["fx"]
-        if fx is None or z is None or z <= 0:
-            return None
-        x = (u - cam_intrinsics["cx"]) * z / fx
-        y = (v - cam_intrinsics["cy"]) * z / cam_intrinsics["fy"]
-        return [round(x, 3), round(y, 3), round(z, 3)]
+        # 内参或分辨率变化时重建像素射线表，否则直接返回
+        if camera.update_from_msg(msg):
+            print(f"Camera intrinsics: {camera.rays}")
 
     def on_depth(msg):
-        latest_depth["msg"] = msg
-        latest_depth["t"] = time.time()
+        depth_buffer.push(as_image_msg(msg))
+
+    rgb_mailbox = LatestFrameMailbox()
 
     def on_rgb(msg):
-        nonlocal last_print
-        now = time.time()
-        if now - last_print < args.print_interval:
-            return
+        # 回调只存消息，推理在 worker 线程中进行
+        rgb_mailbox.put(as_image_msg(msg))
 
+    def process_rgb(msg):
         # Gazebo 仿真时间（来自图像 header）
         try:
             hdr = msg.get("header", {})
@@ -121,90 +136,58 @@ def main():
         except Exception:
             pass
 
-        frame = decode_image(msg)
-        depth_msg = latest_depth["msg"]
-        depth = None
-        if depth_msg is not None:
-            try:
-                depth = decode_depth(depth_msg)
-            except Exception:
-                depth = None
-
-        results = model(frame, verbose=False)
-        if not results:
-            return
-
-        h, w = frame.shape[:2]
-        detections = []
-        for result in results:
-            if result.boxes is None:
-                continue
-            for box in result.boxes:
-                conf = float(box.conf[0])
-                if conf < args.conf:
-                    continue
-                cls_id = int(box.cls[0])
-                label = result.names[cls_id]
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-                x1 = max(0, min(x1, w - 1))
-                x2 = max(0, min(x2, w - 1))
-                y1 = max(0, min(y1, h - 1))
-                y2 = max(0, min(y2, h - 1))
-                cx = int((x1 + x2) / 2)
-                cy = int((y1 + y2) / 2)
-
-                roi = frame[y1:y2 + 1, x1:x2 + 1]
-                if roi.size > 0:
-                    b, g, r = roi.mean(axis=(0, 1))
-                    color_text = f"avg_bgr=({int(b)},{int(g)},{int(r)})"
-                else:
-                    color_text = "avg_bgr=(n/a)"
-
-                dist = None
-                if depth is not None:
-                    try:
-                        dist = float(depth[cy, cx])
-                    except Exception:
-                        dist = None
-
-                pos_3d = pixel_to_3d(cx, cy, dist)
-
-                print(
-                    f"Detected {label} conf={conf:.2f} "
-                    f"bbox=({x1},{y1},{x2},{y2}) center=({cx},{cy}) "
-                    f"{color_text} distance={'n/a' if dist is None else f'{dist:.2f}m'} "
-                    f"pos_cam={pos_3d if pos_3d else 'n/a'}"
-                )
-
-                detections.append({
-                    "label": label,
-                    "confidence": round(conf, 2),
-                    "bbox": [int(x1), int(y1), int(x2), int(y2)],
-                    "center": [cx, cy],
-                    "distance_m": round(dist, 2) if dist is not None else None,
-                    "position_camera": pos_3d,
-                    "avg_bgr": [int(b), int(g), int(r)] if roi.size > 0 else None,
-                })
-
-        if detections:
-            result_topic.publish(roslibpy.Message({"data": json.dumps(detections, ensure_ascii=False)}))
-
-        last_print = now
+        # 取时间戳最近的深度；只有在有检测需要深度时才解码
+        depth_msg = depth_buffer.nearest(stamp_to_sec(msg), args.depth_slop)
+        out = pipeline.run(msg, depth_msg, camera.rays)
+        for det in out.detections:
+            print(format_detection(det))
+
+        with pipeline.timer.stage("publish"):
+            if out.json is not None:
+                result_topic.publish(roslibpy.Message({"data": out.json}))
+            if out.typed is not None:
+                typed_topic.publish(roslibpy.Message(out.typed))
+
+    rate_controller = AdaptiveRateController(args.latency_budget_ms / 1000.0, args.min_rate,
+                                             args.max_rate, num_threads=args.workers)
+    worker = InferenceWorker(rgb_mailbox, process_rgb, num_threads=args.workers,
+                             rate_controller=rate_controller)
+    worker.start()
 
     info_topic.subscribe(on_camera_info)
     depth_topic.subscribe(on_depth)
     rgb_topic.subscribe(on_rgb)
+    request_topic.subscribe(lambda _msg: pipeline.request_detection())
 
+    last_stats = time.time()
     try:
         while ros.is_connected:
             time.sleep(0.5)
+            # 当前目标频率与实测延迟（JSON），用于按机器调整 --latency-budget-ms
+            rate_stats = rate_controller.stats()
+            if resolution is not None:
+                rate_stats["resolution"] = resolution.stats()
+            rate_topic.publish(roslibpy.Message({"data": json.dumps(rate_stats)}))
+            if args.stats_interval > 0 and time.time() - last_stats >= args.stats_interval:
+                print(f"[stats] {worker.format_stats()}")
+                print(f"[stats] {pipeline.timer.format_summary()}")
+                print(f"[stats] {rate_controller.format_stats()}")
+                if resolution is not None:
+                    print(f"[stats] {resolution.format_stats()}")
+                last_stats = time.time()
     except KeyboardInterrupt:
         pass
     finally:
         info_topic.unsubscribe()
         depth_topic.unsubscribe()
         rgb_topic.unsubscribe()
+        request_topic.unsubscribe()
+        worker.stop()
+        batcher.close()
+        print(f"[stats] {worker.format_stats()}")
         result_topic.unadvertise()
+        typed_topic.unadvertise()
+        rate_topic.unadvertise()
         ros.terminate()
 
 
@@ -5,119 +5,43 @@ GPU YOLO26-Seg 语义分割 + 3D 掩码点云
 通过 rosbridge 订阅 RGB/Depth/CameraInfo，
 发布:
   - /perception/yolo26_seg_detections  (std_msgs/String, JSON)
+  - /perception/yolo26_seg_detection_array (common_msgs/YoloDetectionArray, --detection-format typed/both)
   - /perception/yolo26_seg_cloud       (sensor_msgs/PointCloud2, 带 label 的 3D 点云)
+  - /perception/yolo26_seg_rate        (std_msgs/String, JSON: 自适应处理频率与实测延迟，--imgsz-set 时含所选分辨率)
 """
 
 import argparse
-import base64
 import json
-import struct
+import os
+import sys
 import time
 
-import cv2
-import numpy as np
 import roslibpy
-from ultralytics import YOLO
 
-
-def decode_image(msg):
-    data = msg["data"]
-    if isinstance(data, str):
-        data = base64.b64decode(data)
-    else:
-        data = bytes(data)
-
-    h = msg["height"]
-    w = msg["width"]
-    encoding = msg["encoding"]
-
-    if encoding == "rgb8":
-        img = np.frombuffer(data, dtype=np.uint8).reshape(h, w, 3)
-        return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-    if encoding == "bgr8":
-        return np.frombuffer(data, dtype=np.uint8).reshape(h, w, 3)
-    if encoding == "mono8":
-        return np.frombuffer(data, dtype=np.uint8).reshape(h, w)
-
-    raise ValueError(f"Unsupported encoding: {encoding}")
-
-
-def decode_depth(msg):
-    data = msg["data"]
-    if isinstance(data, str):
-        data = base64.b64decode(data)
-    else:
-        data = bytes(data)
-
-    h = msg["height"]
-    w = msg["width"]
-    encoding = msg["encoding"]
-
-    if encoding == "16UC1":
-        depth = np.frombuffer(data, dtype=np.uint16).reshape(h, w)
-        return depth.astype(np.float32) / 1000.0
-    if encoding == "32FC1":
-        return np.frombuffer(data, dtype=np.float32).reshape(h, w)
-
-    raise ValueError(f"Unsupported depth encoding: {encoding}")
-
-
-def mask_to_3d_points(mask, depth, fx, fy, cx, cy, max_points=5000):
-    """将 2D 掩码 + 深度图转成 3D 点云，下采样避免数据量过大"""
-    vs, us = np.where(mask > 0)
-    if len(vs) == 0:
-        return np.empty((0, 3), dtype=np.float32)
-
-    if len(vs) > max_points:
-        indices = np.random.choice(len(vs), max_points, replace=False)
-        vs = vs[indices]
-        us = us[indices]
-
-    zs = depth[vs, us].astype(np.float32)
-    valid = (zs > 0) & (zs < 10.0)
-    vs, us, zs = vs[valid], us[valid], zs[valid]
-
-    xs = (us.astype(np.float32) - cx) * zs / fx
-    ys = (vs.astype(np.float32) - cy) * zs / fy
-
-    return np.stack([xs, ys, zs], axis=1)
-
-
-def build_pointcloud2_msg(all_points, all_labels, frame_id="camera_rgb_optical_frame"):
-    """构建 PointCloud2 消息（XYZL: float32 x3 + uint32 label）"""
-    fields = [
-        {"name": "x", "offset": 0, "datatype": 7, "count": 1},
-        {"name": "y", "offset": 4, "datatype": 7, "count": 1},
-        {"name": "z", "offset": 8, "datatype": 7, "count": 1},
-        {"name": "label", "offset": 12, "datatype": 6, "count": 1},
-    ]
-    point_step = 16
-    n = len(all_points)
-
-    buf = bytearray(n * point_step)
-    for i in range(n):
-        struct.pack_into("fffI", buf, i * point_step,
-                         all_points[i][0], all_points[i][1], all_points[i][2],
-                         all_labels[i])
-
-    now_sec = int(time.time())
-    now_nsec = int((time.time() - now_sec) * 1e9)
-
-    return {
-        "header": {
-            "seq": 0,
-            "stamp": {"secs": now_sec, "nsecs": now_nsec},
-            "frame_id": frame_id,
-        },
-        "height": 1,
-        "width": n,
-        "fields": fields,
-        "is_bigendian": False,
-        "point_step": point_step,
-        "row_step": n * point_step,
-        "data": base64.b64encode(bytes(buf)).decode("ascii"),
-        "is_dense": True,
-    }
+# perception_core 位于 src/perception_yolo/src（容器内挂载到 /workspace/src/perception_yolo）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "src", "perception_yolo", "src"))
+from perception_core import (  # noqa: E402
+    AdaptiveRateController,
+    BACKENDS,
+    CameraModel,
+    DepthRingBuffer,
+    DetectionPipeline,
+    InferenceWorker,
+    LatestFrameMailbox,
+    MicroBatcher,
+    ResolutionSelector,
+    DETECTION_FORMATS,
+    TRANSPORTS,
+    as_image_msg,
+    enable_binary_transport,
+    format_detection,
+    format_flags,
+    image_topic,
+    load_model,
+    stamp_to_sec,
+    ultralytics_infer,
+)
 
 
 def main():
@@ -129,160 +53,149 @@ def main():
     parser.add_argument("--depth", default="/camera/depth/image_raw")
     parser.add_argument("--camera-info", default="/camera/rgb/camera_info")
     parser.add_argument("--conf", type=float, default=0.5)
-    parser.add_argument("--print-interval", type=float, default=0.3)
+    parser.add_argument("--backend", choices=BACKENDS, default="torch",
+                        help="推理后端：torch(eager) / onnx / openvino（首次运行导出并缓存）")
+    parser.add_argument("--imgsz", type=int, default=640, help="推理输入尺寸（导出缓存按此区分）")
+    parser.add_argument("--imgsz-set", type=int, nargs="+", default=None,
+                        help="逐帧从这些尺寸中选择推理分辨率（如 320 480 640），按近期框尺寸与延迟预算；"
+                             "不指定则固定使用 --imgsz")
+    parser.add_argument("--export-cache", default=None,
+                        help="导出产物缓存目录（默认为权重旁的 exported/）")
+    parser.add_argument("--latency-budget-ms", type=float, default=100.0,
+                        help="端到端延迟预算（帧到达 -> 发布），处理频率按此自适应")
+    parser.add_argument("--min-rate", type=float, default=1.0, help="自适应处理频率下限（Hz）")
+    parser.add_argument("--max-rate", type=float, default=30.0, help="自适应处理频率上限（Hz）")
     parser.add_argument("--max-points-per-obj", type=int, default=3000)
+    parser.add_argument("--depth-slop", type=float, default=0.1,
+                        help="RGB 与深度 header.stamp 允许的最大时间差（秒）")
+    parser.add_argument("--depth-buffer", type=int, default=10,
+                        help="按时间戳缓存的深度消息条数")
+    parser.add_argument("--depth-window", type=float, default=0.5,
+                        help="距离取检测框中心多大比例区域内有效深度的均值（1.0 = 整个框）")
+    parser.add_argument("--transport", choices=TRANSPORTS, default="json",
+                        help="图像传输方式：json(base64) / cbor / cbor-raw（需要 cbor2）")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="推理线程数；>1 时配合 --batch-size 合批")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="微批推理的最大帧数（1 = 逐帧推理）")
+    parser.add_argument("--batch-wait-ms", type=float, default=5.0,
+                        help="凑批的最长等待时间（毫秒）")
+    parser.add_argument("--stats-interval", type=float, default=5.0,
+                        help="每隔多少秒打印一次收帧/处理/丢帧统计（<=0 关闭）")
+    parser.add_argument("--detection-format", choices=DETECTION_FORMATS, default="json",
+                        help="检测结果格式：json(std_msgs/String，兼容旧工具，默认；经 rosbridge 时比 typed 更小更快) / "
+                             "typed(common_msgs/YoloDetectionArray，rosbridge 端需已编译 common_msgs) / both")
+    parser.add_argument("--detect-every", type=int, default=1,
+                        help="每 N 帧跑一次网络，中间帧按速度外推框（propagated=true）；"
+                             "向 /perception/yolo26_seg_detect_request 发 std_msgs/Empty 可强制下一帧检测")
     args = parser.parse_args()
 
-    model = YOLO(args.model)
-    print(f"Loaded seg model: {args.model}")
-
-    last_print = 0.0
-    latest_depth = {"msg": None}
-    cam = {"fx": None, "fy": None, "cx": None, "cy": None}
+    model = load_model(args.model, args.backend, args.imgsz, args.export_cache)
+    print(f"Loaded seg model: {args.model} (backend={args.backend}, imgsz={args.imgsz})")
+    resolution = None
+    if args.imgsz_set:
+        resolution = ResolutionSelector(args.imgsz_set, args.latency_budget_ms / 1000.0)
+    batcher = MicroBatcher(ultralytics_infer(model, resolution, imgsz=args.imgsz),
+                           args.batch_size, args.batch_wait_ms)
+    with_json, with_typed = format_flags(args.detection_format)
+    pipeline = DetectionPipeline(batcher.infer, args.conf, depth_window=args.depth_window,
+                                 with_json=with_json, with_typed=with_typed,
+                                 detect_every=args.detect_every, resolution=resolution,
+                                 with_color=False, seg_max_points=args.max_points_per_obj)
+
+    depth_buffer = DepthRingBuffer(maxlen=args.depth_buffer)
+    camera = CameraModel()
 
     ros = roslibpy.Ros(host=args.host, port=args.port)
+    if args.transport != "json":
+        enable_binary_transport(ros)
     ros.run()
     print(f"Connected to rosbridge at {args.host}:{args.port}")
 
-    depth_topic = roslibpy.Topic(ros, args.depth, "sensor_msgs/Image")
-    rgb_topic = roslibpy.Topic(ros, args.rgb, "sensor_msgs/Image")
+    depth_topic = image_topic(ros, args.depth, args.transport)
+    rgb_topic = image_topic(ros, args.rgb, args.transport)
     info_topic = roslibpy.Topic(ros, args.camera_info, "sensor_msgs/CameraInfo")
+    request_topic = roslibpy.Topic(ros, "/perception/yolo26_seg_detect_request", "std_msgs/Empty")
     det_topic = roslibpy.Topic(ros, "/perception/yolo26_seg_detections", "std_msgs/String")
+    rate_topic = roslibpy.Topic(ros, "/perception/yolo26_seg_rate", "std_msgs/String")
+    typed_topic = roslibpy.Topic(ros, "/perception/yolo26_seg_detection_array", "common_msgs/YoloDetectionArray")
     cloud_topic = roslibpy.Topic(ros, "/perception/yolo26_seg_cloud", "sensor_msgs/PointCloud2")
 
     def on_camera_info(msg):
-        if cam["fx"] is None:
-            K = msg["K"]
-            cam["fx"], cam["fy"] = K[0], K[4]
-            cam["cx"], cam["cy"] = K[2], K[5]
-            print(f"Camera intrinsics: fx={cam['fx']:.1f} fy={cam['fy']:.1f} "
-                  f"cx={cam['cx']:.1f} cy={cam['cy']:.1f}")
+        # 内参或分辨率变化时重建像素射线表，否则直接返回
+        if camera.update_from_msg(msg):
+            print(f"Camera intrinsics: {camera.rays}")
 
     def on_depth(msg):
-        latest_depth["msg"] = msg
+        depth_buffer.push(as_image_msg(msg))
 
-    def on_rgb(msg):
-        nonlocal last_print
-        now = time.time()
-        if now - last_print < args.print_interval:
-            return
-        if cam["fx"] is None:
-            return
+    rgb_mailbox = LatestFrameMailbox()
 
-        frame = decode_image(msg)
-        depth_msg = latest_depth["msg"]
-        depth = None
-        if depth_msg is not None:
-            try:
-                depth = decode_depth(depth_msg)
-            except Exception:
-                depth = None
+    def on_rgb(msg):
+        # 回调只存消息，推理在 worker 线程中进行
+        rgb_mailbox.put(as_image_msg(msg))
 
-        results = model(frame, verbose=False)
-        if not results:
+    def process_rgb(msg):
+        rays = camera.rays
+        if rays is None:
             return
 
-        h, w = frame.shape[:2]
-        detections = []
-        all_cloud_points = []
-        all_cloud_labels = []
-
-        for result in results:
-            if result.boxes is None:
-                continue
-
-            masks_data = result.masks
-            for i, box in enumerate(result.boxes):
-                conf = float(box.conf[0])
-                if conf < args.conf:
-                    continue
-
-                cls_id = int(box.cls[0])
-                label = result.names[cls_id]
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-                x1 = max(0, min(x1, w - 1))
-                x2 = max(0, min(x2, w - 1))
-                y1 = max(0, min(y1, h - 1))
-                y2 = max(0, min(y2, h - 1))
-                cx_px = int((x1 + x2) / 2)
-                cy_px = int((y1 + y2) / 2)
-
-                dist = None
-                if depth is not None:
-                    try:
-                        dist = float(depth[cy_px, cx_px])
-                    except Exception:
-                        pass
-
-                pos_3d = None
-                if dist is not None and dist > 0 and cam["fx"] is not None:
-                    px = (cx_px - cam["cx"]) * dist / cam["fx"]
-                    py = (cy_px - cam["cy"]) * dist / cam["fy"]
-                    pos_3d = [round(px, 3), round(py, 3), round(dist, 3)]
-
-                mask_points_count = 0
-                if masks_data is not None and i < len(masks_data.data) and depth is not None:
-                    mask_2d = masks_data.data[i].cpu().numpy()
-                    mask_resized = cv2.resize(mask_2d, (w, h), interpolation=cv2.INTER_NEAREST)
-                    binary_mask = (mask_resized > 0.5).astype(np.uint8)
-
-                    pts_3d = mask_to_3d_points(
-                        binary_mask, depth,
-                        cam["fx"], cam["fy"], cam["cx"], cam["cy"],
-                        max_points=args.max_points_per_obj
-                    )
-                    mask_points_count = len(pts_3d)
-
-                    for pt in pts_3d:
-                        all_cloud_points.append(pt)
-                        all_cloud_labels.append(cls_id)
-
-                det = {
-                    "label": label,
-                    "confidence": round(conf, 2),
-                    "bbox": [int(x1), int(y1), int(x2), int(y2)],
-                    "center": [cx_px, cy_px],
-                    "distance_m": round(dist, 2) if dist is not None else None,
-                    "position_camera": pos_3d,
-                    "mask_3d_points": mask_points_count,
-                }
-                detections.append(det)
-
-                print(
-                    f"Detected {label} conf={conf:.2f} "
-                    f"bbox=({x1},{y1},{x2},{y2}) center=({cx_px},{cy_px}) "
-                    f"distance={'n/a' if dist is None else f'{dist:.2f}m'} "
-                    f"pos_cam={pos_3d if pos_3d else 'n/a'} "
-                    f"mask_3d_pts={mask_points_count}"
-                )
-
-        if detections:
-            det_topic.publish(roslibpy.Message({
-                "data": json.dumps(detections, ensure_ascii=False)
-            }))
-
-        if all_cloud_points:
-            pc2_msg = build_pointcloud2_msg(all_cloud_points, all_cloud_labels)
-            cloud_topic.publish(roslibpy.Message(pc2_msg))
-
-        last_print = now
+        # 取时间戳最近的深度；只有在有检测需要深度时才解码
+        depth_msg = depth_buffer.nearest(stamp_to_sec(msg), args.depth_slop)
+        out = pipeline.run(msg, depth_msg, rays)
+        for det in out.detections:
+            print(format_detection(det))
+
+        with pipeline.timer.stage("publish"):
+            if out.json is not None:
+                det_topic.publish(roslibpy.Message({"data": out.json}))
+            if out.typed is not None:
+                typed_topic.publish(roslibpy.Message(out.typed))
+            if out.cloud is not None:
+                cloud_topic.publish(roslibpy.Message(out.cloud))
+
+    rate_controller = AdaptiveRateController(args.latency_budget_ms / 1000.0, args.min_rate,
+                                             args.max_rate, num_threads=args.workers)
+    worker = InferenceWorker(rgb_mailbox, process_rgb, num_threads=args.workers,
+                             rate_controller=rate_controller)
+    worker.start()
 
     info_topic.subscribe(on_camera_info)
     depth_topic.subscribe(on_depth)
     rgb_topic.subscribe(on_rgb)
+    request_topic.subscribe(lambda _msg: pipeline.request_detection())
 
     print("Waiting for data...")
+    last_stats = time.time()
     try:
         while ros.is_connected:
             time.sleep(0.5)
+            # 当前目标频率与实测延迟（JSON），用于按机器调整 --latency-budget-ms
+            rate_stats = rate_controller.stats()
+            if resolution is not None:
+                rate_stats["resolution"] = resolution.stats()
+            rate_topic.publish(roslibpy.Message({"data": json.dumps(rate_stats)}))
+            if args.stats_interval > 0 and time.time() - last_stats >= args.stats_interval:
+                print(f"[stats] {worker.format_stats()}")
+                print(f"[stats] {pipeline.timer.format_summary()}")
+                print(f"[stats] {rate_controller.format_stats()}")
+                if resolution is not None:
+                    print(f"[stats] {resolution.format_stats()}")
+                last_stats = time.time()
     except KeyboardInterrupt:
         pass
     finally:
         info_topic.unsubscribe()
         depth_topic.unsubscribe()
         rgb_topic.unsubscribe()
+        request_topic.unsubscribe()
+        worker.stop()
+        batcher.close()
+        print(f"[stats] {worker.format_stats()}")
         det_topic.unadvertise()
         cloud_topic.unadvertise()
+        typed_topic.unadvertise()
+        rate_topic.unadvertise()
         ros.terminate()
         print("Shutdown complete.")
 
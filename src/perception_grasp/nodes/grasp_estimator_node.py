@@ -12,13 +12,19 @@ from cv_bridge import CvBridge, CvBridgeError
 
 from sensor_msgs.msg import Image, PointCloud2, CameraInfo
 from geometry_msgs.msg import PoseStamped, Pose, Point, Quaternion
-from common_msgs.msg import GraspCandidate, DetectedObject
-import sensor_msgs.point_cloud2 as pc2
+from common_msgs.msg import GraspCandidate, GraspCandidateArray, DetectedObjectArray
 
-try:
-    import open3d as o3d
-except ImportError:
-    rospy.logwarn("[Grasp] open3d not installed. Install with: pip install open3d")
+from grasp_core import (
+    GRASPNET_NUM_POINTS,
+    PREPROCESS_BACKENDS,
+    DetectionCache,
+    crop_organized,
+    crop_projected,
+    pointcloud2_to_xyz,
+    preprocess_points,
+    stack_point_sets,
+    top_k_indices,
+)
 
 
 class GraspEstimatorNode:
@@ -35,6 +41,28 @@ class GraspEstimatorNode:
         self.checkpoint_path = rospy.get_param('~checkpoint_path', 'graspnet_checkpoints/checkpoint.tar')
         self.num_grasp_candidates = rospy.get_param('~num_grasp_candidates', 5)
         self.pointcloud_topic = rospy.get_param('~pointcloud_topic', '/camera/depth/points')
+        # 检测框裁剪：每个检测物体单独预处理和推理；没有（足够新的）检测时按 full_scene_fallback 处理整幅场景
+        self.use_detection_roi = rospy.get_param('~use_detection_roi', True)
+        self.max_detection_age = rospy.get_param('~max_detection_age', 1.0)  # 检测与点云的最大时间差（秒），<= 0 不检查
+        # 检测缓存：保留最近 detection_cache_size 帧、detection_ttl 秒内的检测，点云按时间戳取最近的一帧
+        self.detection_ttl = rospy.get_param('~detection_ttl', 5.0)
+        self.detection_cache_size = rospy.get_param('~detection_cache_size', 30)
+        self.roi_padding = rospy.get_param('~roi_padding', 4)  # 检测框外扩像素（点云分辨率下）
+        self.min_roi_points = rospy.get_param('~min_roi_points', 50)
+        self.full_scene_fallback = rospy.get_param('~full_scene_fallback', True)
+        # 检测所用图像的分辨率 [宽, 高]，与点云不同时按比例换算检测框；空列表表示与点云相同
+        self.detection_image_size = rospy.get_param('~detection_image_size', [])
+        # 无序点云（height == 1）按内参投影裁剪，需要 CameraInfo；为空时无序点云只能处理整幅场景
+        self.camera_info_topic = rospy.get_param('~camera_info_topic', '/camera/depth/camera_info')
+        # 预处理：numpy（NumPy/SciPy，默认）或 open3d（未安装时回退到 numpy）
+        self.preprocess_backend = self._select_preprocess_backend(rospy.get_param('~preprocess_backend', 'numpy'))
+        self.voxel_size = rospy.get_param('~voxel_size', 0.005)  # 下采样体素大小（米），<= 0 不下采样
+        self.outlier_neighbors = rospy.get_param('~outlier_neighbors', 20)
+        self.outlier_std_ratio = rospy.get_param('~outlier_std_ratio', 2.0)
+        # 合批推理：每个物体重采样到 num_points 个点，最多 max_batch_size 个物体一次前向
+        self.num_points = rospy.get_param('~num_points', GRASPNET_NUM_POINTS)
+        self.max_batch_size = max(1, rospy.get_param('~max_batch_size', 8))
+        self.rng = np.random.default_rng()
         
         # 加载 GraspNet 模型
         self.model = self._load_graspnet_model()
@@ -54,23 +82,35 @@ class GraspEstimatorNode:
         # 订阅检测结果（可选：根据检测区域裁剪点云）
         self.detection_sub = rospy.Subscriber(
             '/perception/detected_objects',
-            DetectedObject,
+            DetectedObjectArray,
             self.detection_callback,
-            queue_size=10
+            queue_size=1
         )
         
-        # 发布抓取候选
+        self.camera_info = None
+        if self.use_detection_roi and self.camera_info_topic:
+            self.camera_info_sub = rospy.Subscriber(
+                self.camera_info_topic,
+                CameraInfo,
+                self.camera_info_callback,
+                queue_size=1
+            )
+        
+        # 发布抓取候选（每帧点云一条，按质量排序的前 num_grasp_candidates 个）
         self.grasp_pub = rospy.Publisher(
             '/perception/grasp_candidates',
-            GraspCandidate,
-            queue_size=10
+            GraspCandidateArray,
+            queue_size=1
         )
         
-        self.detected_objects = []
+        # 按时间戳缓存的检测帧（容量和存活时间有上限）
+        self.detections = DetectionCache(ttl=self.detection_ttl, max_size=self.detection_cache_size)
         
         rospy.loginfo(f"[Grasp] Device: {self.device}")
         rospy.loginfo(f"[Grasp] Checkpoint: {self.checkpoint_path}")
         rospy.loginfo(f"[Grasp] Subscribing to: {self.pointcloud_topic}")
+        rospy.loginfo(f"[Grasp] Preprocess backend: {self.preprocess_backend}")
+        rospy.loginfo(f"[Grasp] Detection ROI cropping: {'on' if self.use_detection_roi else 'off'}")
         rospy.loginfo("[Grasp] Initialization complete. Ready to estimate grasps!")
         
     def _setup_device(self):
@@ -90,6 +130,21 @@ class GraspEstimatorNode:
             
         return device
         
+    def _select_preprocess_backend(self, backend):
+        """检查预处理后端是否可用（open3d 未安装时回退到 numpy，只在启动时检查一次）"""
+        if backend not in PREPROCESS_BACKENDS:
+            rospy.logwarn(f"[Grasp] Unknown preprocess backend '{backend}', using numpy "
+                          f"(choose from {', '.join(PREPROCESS_BACKENDS)})")
+            return 'numpy'
+        if backend == 'open3d':
+            try:
+                import open3d  # noqa: F401
+            except ImportError:
+                rospy.logwarn("[Grasp] open3d not installed, using numpy preprocessing. "
+                              "Install with: pip install open3d")
+                return 'numpy'
+        return backend
+        
     def _load_graspnet_model(self):
         """加载 GraspNet-1Billion 模型"""
         # TODO: 实际集成 GraspNet-1Billion
@@ -106,111 +161,201 @@ class GraspEstimatorNode:
         return None
         
     def detection_callback(self, msg):
-        """接收检测结果，用于裁剪点云"""
-        self.detected_objects.append(msg)
-        rospy.logdebug(f"[Grasp] Received detection: {msg.label}")
+        """接收一帧检测结果（DetectedObjectArray），按时间戳存入缓存，用于裁剪点云"""
+        # 没有时间戳的检测按接收时间存入
+        stamp = msg.header.stamp.to_sec() if not msg.header.stamp.is_zero() else rospy.get_time()
+        self.detections.add(stamp, msg.objects)
+        rospy.logdebug(f"[Grasp] Received {len(msg.objects)} detections: "
+                       f"{', '.join(obj.label for obj in msg.objects)}")
+        
+    def camera_info_callback(self, msg):
+        """无序点云投影裁剪用的内参"""
+        self.camera_info = msg
         
     def pointcloud_callback(self, msg):
-        """处理点云并估计抓取姿态"""
+        """处理点云并估计抓取姿态（有检测时每个物体一组抓取）"""
         rospy.loginfo("[Grasp] Processing point cloud...")
         
         try:
-            # ROS PointCloud2 -> NumPy array
-            points = self._ros_pointcloud_to_numpy(msg)
-            
-            if points is None or len(points) == 0:
-                rospy.logwarn("[Grasp] Empty point cloud received")
+            targets = self._select_targets(msg)
+            if not targets:
+                self._publish_grasp_candidates([], [], msg.header)
                 return
                 
-            # 预处理点云（下采样、滤波等）
-            processed_points = self._preprocess_pointcloud(points)
-            
-            # 执行抓取推理
-            grasp_poses = self._estimate_grasps(processed_points)
+            labels, point_sets = [], []
+            for label, points in targets:
+                if points is None or len(points) == 0:
+                    rospy.logwarn(f"[Grasp] Empty point cloud for {label}")
+                    continue
+                    
+                # 预处理点云（下采样、滤波等）
+                processed_points = self._preprocess_pointcloud(points)
+                if len(processed_points) == 0:
+                    rospy.logwarn(f"[Grasp] No points left after preprocessing for {label}")
+                    continue
+                labels.append(label)
+                point_sets.append(processed_points)
+                
+            if not point_sets:
+                self._publish_grasp_candidates([], [], msg.header)
+                return
+                
+            # 所有物体合批推理（一次前向），结果按物体拆回
+            grasp_sets = self._estimate_grasps_batch(point_sets)
             
-            # 发布抓取候选
-            for i, (pose, quality) in enumerate(grasp_poses[:self.num_grasp_candidates]):
-                self._publish_grasp_candidate(pose, quality, msg.header.frame_id)
-                rospy.loginfo(f"[Grasp] Candidate {i+1}: quality={quality:.3f}")
+            # 每个物体各取质量最高的 num_grasp_candidates 个，合并排序后整帧发布一次
+            self._publish_grasp_candidates(grasp_sets, labels, msg.header)
                 
         except Exception as e:
             rospy.logerr(f"[Grasp] Error processing point cloud: {e}")
             
-    def _ros_pointcloud_to_numpy(self, msg):
-        """将 ROS PointCloud2 转换为 NumPy 数组"""
-        points_list = []
-        
-        for point in pc2.read_points(msg, skip_nans=True, field_names=("x", "y", "z")):
-            points_list.append([point[0], point[1], point[2]])
+    def _select_targets(self, msg):
+        """点云 -> [(label, (N, 3) 点)]
+
+        有足够新的检测时按各检测框裁剪（有序点云直接切片 H x W 视图，只解析框内的点），
+        否则整幅场景作为一个目标（full_scene_fallback 为 False 时跳过这帧）
+        """
+        objects = self._recent_detections(msg.header.stamp) if self.use_detection_roi else []
+        if not objects:
+            if self.use_detection_roi and not self.full_scene_fallback:
+                rospy.logdebug("[Grasp] No recent detections, skipping point cloud")
+                return []
+            return [("scene", self._ros_pointcloud_to_numpy(msg))]
             
-        return np.array(points_list, dtype=np.float32)
+        if msg.height > 1:
+            xyz = pointcloud2_to_xyz(msg, organized=True)
+            scale = self._roi_scale(msg.width, msg.height)
+            points = None
+        elif self.camera_info is not None:
+            info = self.camera_info
+            points = self._ros_pointcloud_to_numpy(msg)
+            scale = self._roi_scale(info.width, info.height)
+        else:
+            rospy.logwarn_throttle(10.0, "[Grasp] Unorganized point cloud and no CameraInfo, "
+                                         "cannot crop by detection ROI; using full scene")
+            return [("scene", self._ros_pointcloud_to_numpy(msg))]
+            
+        targets = []
+        for obj in objects:
+            if points is None:
+                roi_points = crop_organized(xyz, obj.roi, self.roi_padding, scale)
+            else:
+                roi_points = crop_projected(points, obj.roi, info.K, (info.width, info.height),
+                                            self.roi_padding, scale)
+            if len(roi_points) < self.min_roi_points:
+                rospy.logdebug(f"[Grasp] {obj.label}: only {len(roi_points)} points in ROI, skipped")
+                continue
+            targets.append((obj.label, roi_points))
+        return targets
+        
+    def _recent_detections(self, stamp):
+        """缓存中与点云时间戳最近、时间差不超过 max_detection_age 的一帧检测（没有则为空列表）"""
+        if stamp.is_zero():
+            entry = self.detections.latest()
+        else:
+            entry = self.detections.nearest(stamp.to_sec(),
+                                            self.max_detection_age if self.max_detection_age > 0 else None)
+        return entry[1] if entry is not None else []
+        
+    def _roi_scale(self, width, height):
+        """检测图像像素 -> 点云像素的比例"""
+        if len(self.detection_image_size) != 2:
+            return (1.0, 1.0)
+        det_width, det_height = self.detection_image_size
+        return (width / float(det_width), height / float(det_height))
+        
+    def _ros_pointcloud_to_numpy(self, msg):
+        """将 ROS PointCloud2 转换为 (N, 3) float32 数组（按 msg.fields 直接解析 msg.data，去掉 NaN 点）"""
+        return pointcloud2_to_xyz(msg, remove_nans=True)
         
     def _preprocess_pointcloud(self, points):
-        """预处理点云（下采样、去噪等）"""
+        """预处理点云（体素下采样 + 统计滤波去噪）"""
         if len(points) == 0:
             return points
             
-        # 使用 Open3D 进行预处理
         try:
-            pcd = o3d.geometry.PointCloud()
-            pcd.points = o3d.utility.Vector3dVector(points)
-            
-            # 下采样
-            pcd = pcd.voxel_down_sample(voxel_size=0.005)
-            
-            # 统计滤波去除离群点
-            pcd, _ = pcd.remove_statistical_outlier(nb_neighbors=20, std_ratio=2.0)
-            
-            return np.asarray(pcd.points)
+            return preprocess_points(points, self.voxel_size, self.outlier_neighbors,
+                                     self.outlier_std_ratio, backend=self.preprocess_backend)
         except Exception as e:
             rospy.logwarn(f"[Grasp] Preprocessing failed: {e}. Using raw points.")
             return points
             
-    def _estimate_grasps(self, points):
+    def _estimate_grasps_batch(self, point_sets):
+        """
+        多个物体合批估计抓取姿态：每个物体重采样到 num_points 个点，
+        堆叠成 (B, num_points, 3) 一个张量做一次前向（超过 max_batch_size 时分块）
+        返回: 与 point_sets 一一对应的 [[(pose, quality), ...], ...]
+        """
+        grasp_sets = []
+        for start in range(0, len(point_sets), self.max_batch_size):
+            batch = stack_point_sets(point_sets[start:start + self.max_batch_size], self.num_points, self.rng)
+            cloud = torch.from_numpy(batch).to(self.device)
+            with torch.no_grad():
+                grasp_sets.extend(self._forward_batch(cloud))
+        return grasp_sets
+        
+    def _forward_batch(self, cloud):
         """
-        使用 GraspNet 估计抓取姿态
-        返回: [(pose, quality), ...]
+        GraspNet 前向：cloud 为 (B, num_points, 3) 张量
+        返回: 长度 B 的列表，每项为该物体的 [(pose, quality), ...]
         """
-        # TODO: 实际 GraspNet 推理
-        # 伪代码:
-        # grasp_group = self.model.predict(points)
-        # return [(grasp.pose, grasp.score) for grasp in grasp_group]
+        # TODO: 实际 GraspNet 推理（整批一次前向）
+        # 伪代码（graspnet-baseline）:
+        # end_points = self.model({'point_clouds': cloud})
+        # grasp_preds = pred_decode(end_points)  # 长度 B，每行 [score, width, height, depth, R(9), t(3), object_id]
+        # return [self._grasps_from_preds(preds.cpu().numpy()) for preds in grasp_preds]
         
-        # 占位符：返回随机抓取姿态
+        # 占位符：每个物体在其点云中心附近返回随机抓取姿态
         rospy.logwarn("[Grasp] Using PLACEHOLDER grasp estimation!")
         
-        dummy_grasps = []
-        for i in range(self.num_grasp_candidates):
-            # 随机位置（在点云中心附近）
-            center = np.mean(points, axis=0)
-            position = center + np.random.randn(3) * 0.05
-            
-            # 随机姿态（四元数）
-            orientation = [0.0, 0.0, 0.0, 1.0]  # [x, y, z, w]
-            
-            pose = Pose()
-            pose.position = Point(x=position[0], y=position[1], z=position[2])
-            pose.orientation = Quaternion(x=orientation[0], y=orientation[1], 
-                                         z=orientation[2], w=orientation[3])
-            
-            quality = np.random.uniform(0.5, 1.0)
-            
-            dummy_grasps.append((pose, quality))
-            
-        return dummy_grasps
+        centers = cloud.mean(dim=1).cpu().numpy()  # (B, 3)，整批一次
+        batch, k = len(centers), self.num_grasp_candidates
+        positions = centers[:, None, :] + self.rng.standard_normal((batch, k, 3)) * 0.05
+        qualities = self.rng.uniform(0.5, 1.0, size=(batch, k))
         
-    def _publish_grasp_candidate(self, pose, quality, frame_id):
-        """发布单个抓取候选"""
-        msg = GraspCandidate()
+        # 随机姿态（四元数 [x, y, z, w]）
+        orientation = [0.0, 0.0, 0.0, 1.0]
+        return [[(self._make_pose(position, orientation), float(quality))
+                 for position, quality in zip(positions[b], qualities[b])]
+                for b in range(batch)]
         
-        msg.pose = PoseStamped()
-        msg.pose.header.stamp = rospy.Time.now()
-        msg.pose.header.frame_id = frame_id
-        msg.pose.pose = pose
+    def _make_pose(self, position, orientation):
+        """位置 [x, y, z] + 四元数 [x, y, z, w] -> geometry_msgs/Pose"""
+        pose = Pose()
+        pose.position = Point(x=position[0], y=position[1], z=position[2])
+        pose.orientation = Quaternion(x=orientation[0], y=orientation[1],
+                                      z=orientation[2], w=orientation[3])
+        return pose
         
-        msg.quality = quality
+    def _publish_grasp_candidates(self, grasp_sets, labels, header):
+        """每个物体按质量选出前 num_grasp_candidates 个抓取，合并后按质量从高到低排序，作为一条 GraspCandidateArray 发布
+
+        每个检测到的物体都有候选（不会被另一个高分物体挤掉）
+        grasp_sets: 每个物体的 [(pose, quality), ...]；labels: 与 grasp_sets 对应的物体类别；header 沿用源点云
+        """
+        grasps, grasp_labels = [], []
+        for label, grasp_poses in zip(labels, grasp_sets):
+            qualities = np.fromiter((quality for _, quality in grasp_poses), dtype=np.float64,
+                                    count=len(grasp_poses))
+            for i in top_k_indices(qualities, self.num_grasp_candidates):
+                grasps.append(grasp_poses[i])
+                grasp_labels.append(label)
+        merged = np.fromiter((quality for _, quality in grasps), dtype=np.float64, count=len(grasps))
         
-        self.grasp_pub.publish(msg)
+        array_msg = GraspCandidateArray()
+        array_msg.header = header
+        for rank, i in enumerate(top_k_indices(merged, len(grasps))):
+            pose, quality = grasps[i]
+            candidate = GraspCandidate()
+            candidate.pose = PoseStamped()
+            candidate.pose.header = header
+            candidate.pose.pose = pose
+            candidate.quality = quality
+            candidate.label = grasp_labels[i]
+            array_msg.candidates.append(candidate)
+            rospy.loginfo(f"[Grasp] Candidate {rank + 1}: {grasp_labels[i]} quality={quality:.3f}")
+            
+        self.grasp_pub.publish(array_msg)
         
     def run(self):
         """保持节点运行"""
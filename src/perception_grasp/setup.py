@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# 仅供 catkin 使用（catkin_python_setup），不要直接 pip install
+from distutils.core import setup
+
+from catkin_pkg.python_setup import generate_distutils_setup
+
+setup_args = generate_distutils_setup(
+    packages=["grasp_core"],
+    package_dir={"": "src"},
+)
+
+setup(**setup_args)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+grasp_core - 抓取估计的公共代码（不依赖 rospy）
+grasp_estimator_node 与离线基准（scripts/benchmarks/）共用
+"""
+
+from grasp_core.cloud import (
+    POINT_FIELD_TYPES,
+    pointcloud2_dtype,
+    pointcloud2_to_array,
+    pointcloud2_to_xyz,
+)
+from grasp_core.detections import DetectionCache
+from grasp_core.preprocess import (
+    PREPROCESS_BACKENDS,
+    preprocess_points,
+    remove_statistical_outlier,
+    statistical_outlier_mask,
+    voxel_downsample,
+)
+from grasp_core.roi import crop_organized, crop_projected, roi_bounds
+from grasp_core.sampling import GRASPNET_NUM_POINTS, resample_indices, resample_points, stack_point_sets
+from grasp_core.selection import top_k_indices
+
+__all__ = [
+    "DetectionCache",
+    "GRASPNET_NUM_POINTS",
+    "POINT_FIELD_TYPES",
+    "PREPROCESS_BACKENDS",
+    "crop_organized",
+    "crop_projected",
+    "pointcloud2_dtype",
+    "pointcloud2_to_array",
+    "pointcloud2_to_xyz",
+    "preprocess_points",
+    "remove_statistical_outlier",
+    "resample_indices",
+    "resample_points",
+    "roi_bounds",
+    "stack_point_sets",
+    "statistical_outlier_mask",
+    "top_k_indices",
+    "voxel_downsample",
+]
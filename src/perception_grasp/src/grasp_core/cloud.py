@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+PointCloud2 -> NumPy（零拷贝）
+按 msg.fields 构造结构化 dtype，直接以 msg.data 为缓冲区创建数组视图，不做逐点 Python 循环；
+有序点云（height > 1）保留 H x W 布局，可按像素坐标切片
+"""
+
+import numpy as np
+
+# sensor_msgs/PointField 数据类型 -> NumPy 类型码
+POINT_FIELD_TYPES = {
+    1: "i1",  # INT8
+    2: "u1",  # UINT8
+    3: "i2",  # INT16
+    4: "u2",  # UINT16
+    5: "i4",  # INT32
+    6: "u4",  # UINT32
+    7: "f4",  # FLOAT32
+    8: "f8",  # FLOAT64
+}
+
+
+def _get(obj, name):
+    """rospy 消息属性 / rosbridge dict 键"""
+    return obj[name] if isinstance(obj, dict) else getattr(obj, name)
+
+
+def _finite_points(xyz):
+    """(..., 3) -> (N, 3)，去掉含 NaN / inf 的点
+
+    三个分量之和非有限 <=> 任一分量为 NaN / inf（坐标不会大到相加溢出），
+    比 isfinite(xyz).all(-1) 少一个 (..., 3) 的布尔临时数组；按分量取点再拼接，只拷贝有效点
+    """
+    x, y, z = xyz[..., 0], xyz[..., 1], xyz[..., 2]
+    valid = np.isfinite(x + y + z)
+    return np.stack([x[valid], y[valid], z[valid]], axis=-1)
+
+
+def pointcloud2_dtype(fields, point_step, is_bigendian=False):
+    """msg.fields -> 结构化 dtype（itemsize = point_step，字段间的填充保留为空洞）"""
+    order = ">" if is_bigendian else "<"
+    names, formats, offsets = [], [], []
+    for field in fields:
+        datatype = _get(field, "datatype")
+        if datatype not in POINT_FIELD_TYPES:
+            raise ValueError(f"Unsupported PointField datatype: {datatype}")
+        count = _get(field, "count")
+        fmt = order + POINT_FIELD_TYPES[datatype]
+        names.append(_get(field, "name"))
+        formats.append(fmt if count == 1 else (fmt, (count,)))
+        offsets.append(_get(field, "offset"))
+    return np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": point_step})
+
+
+def pointcloud2_to_array(msg):
+    """PointCloud2 -> 结构化数组视图
+
+    有序点云返回 (height, width)，无序点云（height == 1）返回 (width,)
+    数组直接引用 msg.data（rospy 中为 bytes，只读）；按 row_step 处理行尾填充
+    """
+    dtype = pointcloud2_dtype(msg.fields, msg.point_step, msg.is_bigendian)
+    height, width = msg.height, msg.width
+    if height * width == 0:
+        return np.zeros((height, width) if height > 1 else (0,), dtype=dtype)
+    cloud = np.ndarray(shape=(height, width), dtype=dtype, buffer=msg.data,
+                       strides=(msg.row_step, msg.point_step))
+    return cloud if height > 1 else cloud[0]
+
+
+def _xyz_view(msg):
+    """x, y, z 为相邻的 float32（Gazebo / 大多数驱动如此）时直接返回 (H, W, 3) 视图，否则返回 None"""
+    fields = {_get(f, "name"): f for f in msg.fields}
+    if not all(name in fields for name in "xyz"):
+        raise ValueError("PointCloud2 has no x/y/z fields")
+    if any(_get(fields[name], "datatype") != 7 or _get(fields[name], "count") != 1 for name in "xyz"):
+        return None
+    x_offset = _get(fields["x"], "offset")
+    if _get(fields["y"], "offset") != x_offset + 4 or _get(fields["z"], "offset") != x_offset + 8:
+        return None
+    dtype = np.dtype(">f4" if msg.is_bigendian else "<f4")
+    return np.ndarray(shape=(msg.height, msg.width, 3), dtype=dtype, buffer=msg.data, offset=x_offset,
+                      strides=(msg.row_step, msg.point_step, 4))
+
+
+def pointcloud2_to_xyz(msg, remove_nans=True, organized=False):
+    """PointCloud2 -> 坐标
+
+    organized=False: (N, 3) float32，remove_nans 时去掉含 NaN / inf 的点（向量化，一次拷贝）
+    organized=True:  (H, W, 3)（无序点云 H = 1），无效点保持 NaN（便于按检测框像素裁剪）
+    x, y, z 为相邻 float32 时不拷贝，直接引用 msg.data；其他布局拷贝一次
+    """
+    xyz = _xyz_view(msg) if msg.height * msg.width else None
+    if xyz is None:
+        cloud = pointcloud2_to_array(msg).reshape(msg.height, msg.width)
+        xyz = np.stack([cloud["x"], cloud["y"], cloud["z"]], axis=-1).astype(np.float32)
+    elif xyz.dtype.byteorder == ">":
+        xyz = xyz.astype(np.float32)
+    if organized:
+        return xyz
+    if remove_nans:
+        return _finite_points(xyz)
+    return xyz.reshape(-1, 3)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+检测结果缓存：按时间戳保存最近若干帧 DetectedObjectArray，供点云按时间戳取对应的检测
+容量与存活时间都有上限，长时间运行内存不增长；时间以消息时间戳计（仿真时间 / 回放均可）
+"""
+
+import bisect
+import threading
+
+
+class DetectionCache:
+    """按时间戳排序的检测帧缓存（线程安全）
+
+    add(stamp, objects)    存入一帧（objects 为 DetectedObject 列表，可为空表示该帧没有检测）
+    nearest(stamp, slop)   时间上最近且 |dt| <= slop 的一帧 -> (stamp, objects)，没有返回 None
+    latest(label)          某类别最近一次出现 -> (stamp, obj)；label=None 时为最新一帧 -> (stamp, objects)
+    ttl: 比最新一帧早 ttl 秒以上的帧被淘汰（<= 0 不按时间淘汰）；max_size: 最多保留的帧数
+    按标签的索引随帧一起淘汰；查找为二分（帧数有上限，代价恒定）
+    """
+
+    def __init__(self, ttl=5.0, max_size=30):
+        self.ttl = ttl
+        self.max_size = max(1, int(max_size))
+        self._stamps = []
+        self._frames = []
+        self._by_label = {}
+        self._lock = threading.Lock()
+
+    def add(self, stamp, objects):
+        with self._lock:
+            # 通常按时间顺序到达，直接追加；乱序帧插入到对应位置，同一时间戳整帧替换
+            i = bisect.bisect_left(self._stamps, stamp)
+            if i < len(self._stamps) and self._stamps[i] == stamp:
+                self._frames[i] = list(objects)
+            else:
+                self._stamps.insert(i, stamp)
+                self._frames.insert(i, list(objects))
+            for obj in objects:
+                last = self._by_label.get(obj.label)
+                if last is None or last[0] <= stamp:
+                    self._by_label[obj.label] = (stamp, obj)
+            self._evict_locked()
+
+    def nearest(self, stamp, slop=None):
+        with self._lock:
+            n = len(self._stamps)
+            if n == 0:
+                return None
+            i = bisect.bisect_left(self._stamps, stamp)
+            if i == n or (i > 0 and stamp - self._stamps[i - 1] <= self._stamps[i] - stamp):
+                i -= 1
+            if slop is not None and abs(self._stamps[i] - stamp) > slop:
+                return None
+            return self._stamps[i], self._frames[i]
+
+    def latest(self, label=None):
+        with self._lock:
+            if label is not None:
+                return self._by_label.get(label)
+            if not self._stamps:
+                return None
+            return self._stamps[-1], self._frames[-1]
+
+    def labels(self):
+        with self._lock:
+            return sorted(self._by_label)
+
+    def clear(self):
+        with self._lock:
+            self._stamps.clear()
+            self._frames.clear()
+            self._by_label.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._stamps)
+
+    def _evict_locked(self):
+        drop = max(0, len(self._stamps) - self.max_size)
+        if self.ttl > 0:
+            drop = max(drop, bisect.bisect_left(self._stamps, self._stamps[-1] - self.ttl))
+        if not drop:
+            return
+        del self._stamps[:drop]
+        del self._frames[:drop]
+        oldest = self._stamps[0]
+        self._by_label = {label: entry for label, entry in self._by_label.items() if entry[0] >= oldest}
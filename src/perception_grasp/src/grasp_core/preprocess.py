@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+点云预处理（NumPy / SciPy，不依赖 Open3D）
+  voxel_downsample            体素下采样：点 -> 体素整数坐标 -> 线性 key，np.unique 分组后求均值
+  remove_statistical_outlier  统计滤波：cKDTree 一次批量 kNN，按平均邻居距离的均值 + std_ratio * 标准差截断
+两者与 Open3D 0.17 的 voxel_down_sample / remove_statistical_outlier 算法一致（输出点的顺序不同）
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+PREPROCESS_BACKENDS = ("numpy", "open3d")
+
+
+def voxel_downsample(points, voxel_size):
+    """(N, 3) -> (M, 3)，每个非空体素输出其中点的质心（float64，按体素 key 排序）
+
+    体素网格与 Open3D 相同：原点为 min_bound - voxel_size / 2
+    """
+    points = np.asarray(points)
+    if voxel_size <= 0 or len(points) == 0:
+        return np.asarray(points, dtype=np.float64)
+    points = points.astype(np.float64, copy=False)
+    origin = points.min(axis=0) - voxel_size * 0.5
+    keys = np.floor((points - origin) / voxel_size).astype(np.int64)
+    # 三维体素坐标压成一个 int64（各轴非负且有界），np.unique 一维排序比 axis=0 快得多
+    dims = keys.max(axis=0) + 1
+    linear = (keys[:, 0] * dims[1] + keys[:, 1]) * dims[2] + keys[:, 2]
+    _, inverse, counts = np.unique(linear, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()  # numpy 2.x 的 return_inverse 保留输入形状
+    sums = np.stack([np.bincount(inverse, weights=points[:, k], minlength=len(counts)) for k in range(3)],
+                    axis=-1)
+    return sums / counts[:, None]
+
+
+def statistical_outlier_mask(points, nb_neighbors=20, std_ratio=2.0, workers=-1):
+    """(N, 3) -> (N,) bool，True 为保留的点
+
+    每个点取 nb_neighbors 个最近邻（含自身，与 Open3D 一致）的平均距离 d_i，
+    保留 0 < d_i < mean(d) + std_ratio * std(d)
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n == 0 or nb_neighbors < 1:
+        return np.ones(n, dtype=bool)
+    k = min(int(nb_neighbors), n)
+    dist, _ = cKDTree(points).query(points, k=k, workers=workers)
+    avg = dist.reshape(n, k).mean(axis=1)
+    positive = avg > 0
+    # Open3D：均值与样本标准差只累加 d_i > 0 的点，但分母用全部点数
+    mean = avg[positive].sum() / n
+    std = np.sqrt(((avg[positive] - mean) ** 2).sum() / max(n - 1, 1))
+    return positive & (avg < mean + std_ratio * std)
+
+
+def remove_statistical_outlier(points, nb_neighbors=20, std_ratio=2.0, workers=-1):
+    """(N, 3) -> (M, 3)，去掉统计离群点"""
+    points = np.asarray(points)
+    return points[statistical_outlier_mask(points, nb_neighbors, std_ratio, workers)]
+
+
+def preprocess_points(points, voxel_size=0.005, nb_neighbors=20, std_ratio=2.0, backend="numpy"):
+    """体素下采样 + 统计滤波（GraspEstimatorNode 的预处理）
+
+    backend="open3d" 调用 Open3D（未安装时抛 ImportError，由调用者决定是否回退）
+    """
+    if backend not in PREPROCESS_BACKENDS:
+        raise ValueError(f"Unsupported preprocess backend: {backend} "
+                         f"(choose from {', '.join(PREPROCESS_BACKENDS)})")
+    if len(points) == 0:
+        return np.zeros((0, 3), dtype=np.float64)
+    if backend == "open3d":
+        import open3d as o3d
+        pcd = o3d.geometry.PointCloud()
+        pcd.points = o3d.utility.Vector3dVector(np.asarray(points, dtype=np.float64))
+        if voxel_size > 0:
+            pcd = pcd.voxel_down_sample(voxel_size=voxel_size)
+        pcd, _ = pcd.remove_statistical_outlier(nb_neighbors=nb_neighbors, std_ratio=std_ratio)
+        return np.asarray(pcd.points)
+    return remove_statistical_outlier(voxel_downsample(points, voxel_size), nb_neighbors, std_ratio)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+按检测框（sensor_msgs/RegionOfInterest）裁剪点云
+有序点云直接按像素切片 (H, W, 3) 视图，代价与框面积成正比，与整幅场景无关；
+无序点云用相机内参把点投影回像素再筛选（需要 CameraInfo）
+"""
+
+import numpy as np
+
+from grasp_core.cloud import _finite_points, _get
+
+
+def roi_bounds(roi, shape, padding=0, scale=(1.0, 1.0)):
+    """RegionOfInterest -> (y0, y1, x0, x1) 像素范围（左闭右开，已裁剪到 shape 内），空框返回 None
+
+    scale: (sx, sy) 检测图像 -> 点云的像素比例（检测用的 RGB 与深度分辨率不同时）
+    padding: 四周外扩的像素数（点云分辨率下），补偿框与深度的轻微错位
+    """
+    height, width = shape[:2]
+    sx, sy = scale
+    x0 = int(np.floor(_get(roi, "x_offset") * sx)) - padding
+    y0 = int(np.floor(_get(roi, "y_offset") * sy)) - padding
+    x1 = int(np.ceil((_get(roi, "x_offset") + _get(roi, "width")) * sx)) + padding
+    y1 = int(np.ceil((_get(roi, "y_offset") + _get(roi, "height")) * sy)) + padding
+    x0, y0 = max(x0, 0), max(y0, 0)
+    x1, y1 = min(x1, width), min(y1, height)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return y0, y1, x0, x1
+
+
+def crop_organized(xyz, roi, padding=0, scale=(1.0, 1.0)):
+    """有序点云 (H, W, 3) 按检测框切片，返回框内有效点 (N, 3) float32（框在图像外时为空）"""
+    bounds = roi_bounds(roi, xyz.shape, padding, scale)
+    if bounds is None:
+        return np.zeros((0, 3), dtype=np.float32)
+    y0, y1, x0, x1 = bounds
+    return _finite_points(xyz[y0:y1, x0:x1])
+
+
+def crop_projected(points, roi, K, image_size, padding=0, scale=(1.0, 1.0)):
+    """无序点云 (N, 3)（相机光学坐标系）按内参投影到像素，保留落在检测框内的点
+
+    K: 3x3 内参（CameraInfo.K，长度 9 的序列即可）；image_size: (width, height) 为 CameraInfo 的分辨率
+    """
+    K = np.asarray(K, dtype=np.float64).reshape(3, 3)
+    width, height = image_size
+    bounds = roi_bounds(roi, (height, width), padding, scale)
+    if bounds is None or len(points) == 0:
+        return np.zeros((0, 3), dtype=np.float32)
+    y0, y1, x0, x1 = bounds
+    z = points[:, 2]
+    front = z > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = K[0, 0] * points[:, 0] / z + K[0, 2]
+        v = K[1, 1] * points[:, 1] / z + K[1, 2]
+    inside = front & (u >= x0) & (u < x1) & (v >= y0) & (v < y1)
+    return np.ascontiguousarray(points[inside], dtype=np.float32)
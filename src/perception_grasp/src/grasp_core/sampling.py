@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+定点数重采样与多物体合批
+GraspNet baseline 的输入是固定点数（20000）的点云：点多时无放回随机抽样，点少时全部保留再有放回补足。
+每个物体重采样到同样的点数后即可堆叠成 (B, N, 3)，一次前向处理多个物体
+"""
+
+import numpy as np
+
+GRASPNET_NUM_POINTS = 20000
+
+
+def resample_indices(n, num_points=GRASPNET_NUM_POINTS, rng=None):
+    """n 个点 -> num_points 个下标（与 graspnet-baseline demo.py 的采样方式相同）"""
+    if n == 0:
+        raise ValueError("Cannot resample an empty point set")
+    rng = np.random.default_rng() if rng is None else rng
+    if n >= num_points:
+        return rng.choice(n, num_points, replace=False)
+    extra = rng.choice(n, num_points - n, replace=True)
+    return np.concatenate([np.arange(n), extra])
+
+
+def resample_points(points, num_points=GRASPNET_NUM_POINTS, rng=None):
+    """(n, 3) -> (num_points, 3) float32"""
+    points = np.asarray(points)
+    return points[resample_indices(len(points), num_points, rng)].astype(np.float32, copy=False)
+
+
+def stack_point_sets(point_sets, num_points=GRASPNET_NUM_POINTS, rng=None, out=None):
+    """多个物体的点 [(n_i, 3)] -> (B, num_points, 3) float32，直接写入预分配的数组
+
+    out: 可复用的 (>= B, num_points, 3) float32 缓冲（例如 pinned memory 的 numpy 视图），返回其前 B 个
+    空点集不能重采样，调用者应先去掉
+    """
+    batch = len(point_sets)
+    if out is None:
+        out = np.empty((batch, num_points, 3), dtype=np.float32)
+    elif out.shape[0] < batch or out.shape[1:] != (num_points, 3):
+        raise ValueError(f"Buffer shape {out.shape} cannot hold {batch} x {num_points} x 3")
+    for b, points in enumerate(point_sets):
+        points = np.asarray(points)
+        out[b] = points[resample_indices(len(points), num_points, rng)]
+    return out[:batch]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+按质量选取前 K 个抓取候选
+np.argpartition 先在 O(n) 内找出最大的 K 个，再只对这 K 个排序；候选数远多于 K 时比整体排序快
+"""
+
+import numpy as np
+
+
+def top_k_indices(scores, k):
+    """scores 中最大的 k 个元素的下标，按分数从高到低（NaN 排在最后）"""
+    scores = np.asarray(scores, dtype=np.float64)
+    n = len(scores)
+    k = min(int(k), n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    neg = -scores
+    idx = np.argpartition(neg, k - 1)[:k] if k < n else np.arange(n)
+    return idx[np.argsort(neg[idx], kind="stable")]
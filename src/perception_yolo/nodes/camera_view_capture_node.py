@@ -2,37 +2,47 @@
 # -*- coding: utf-8 -*-
 """
 获取 Gazebo 相机视角并保存图像
-订阅: /camera/rgb/image_raw
-保存: /tmp/camera_view_*.jpg
+~mode=images（默认）:
+  订阅: /camera/rgb/image_raw
+  保存: /tmp/camera_view_*.jpg（~image_format: jpg / png / npy）
+~mode=dataset: 同步录制 RGB + 深度 + CameraInfo + JointState
+  保存: <save_dir>/rgbd_<时间>/（按 ~chunk_size 帧一个 shard，~shard_format: npy / npz），
+  用 perception_core.RgbdDataset 按时间戳读取
+  每帧的关节角取 RGB 时间戳之前最近的 JointState（保留最近 ~joint_history 条）
+图像编码与写盘在后台线程中完成，回调不等待磁盘
 """
 
 import os
 import time
 import atexit
+import bisect
+import collections
 import sys
+import threading
+import message_filters
 import rospy
-import cv2
 from cv_bridge import CvBridge, CvBridgeError
-from sensor_msgs.msg import Image
+from sensor_msgs.msg import CameraInfo, Image, JointState
+
+from perception_core import AsyncJsonLogger, ImageWriterPool, RgbdRecorder
 
 # #region agent log
+# 调试日志：后台线程批量写入，文件只打开一次；回调中调用只是入队
+_DEBUG_LOGGER = AsyncJsonLogger("/home/liufazhan/robocup_ur5e/.cursor/debug.log", name="debug-log")
+atexit.register(_DEBUG_LOGGER.close)
+
+
 def _debug_log(hypothesis_id, location, message, data=None, run_id="run1"):
-    try:
-        payload = {
-            "id": f"log_{int(time.time()*1000)}",
-            "timestamp": int(time.time() * 1000),
-            "location": location,
-            "message": message,
-            "data": data or {},
-            "runId": run_id,
-            "hypothesisId": hypothesis_id,
-        }
-        log_path = "/home/liufazhan/robocup_ur5e/.cursor/debug.log"
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(str(payload).replace("'", "\"") + "\n")
-    except Exception:
-        pass
+    now_ms = int(time.time() * 1000)
+    _DEBUG_LOGGER.log({
+        "id": f"log_{now_ms}",
+        "timestamp": now_ms,
+        "location": location,
+        "message": message,
+        "data": data or {},
+        "runId": run_id,
+        "hypothesisId": hypothesis_id,
+    })
 # #endregion agent log
 
 # #region agent log
@@ -80,11 +90,39 @@ class CameraViewCapture:
         self.save_dir = rospy.get_param('~save_dir', '/tmp')
         self.save_interval = float(rospy.get_param('~save_interval', 1.0))
         self.last_save_time = 0.0
+        self.mode = rospy.get_param('~mode', 'images')
+        self.writer = None
+        self.recorder = None
+        self.image_format = None
+        self.shard_format = None
+        if self.mode == 'dataset':
+            self.shard_format = rospy.get_param('~shard_format', 'npy')
+            self.recorder = RgbdRecorder(
+                os.path.join(self.save_dir, time.strftime('rgbd_%Y%m%d_%H%M%S')),
+                chunk_size=int(rospy.get_param('~chunk_size', 64)),
+                shard_format=self.shard_format,
+            )
+        elif self.mode == 'images':
+            # 写入线程池：队列满（磁盘持续跟不上）时丢弃新帧并计数，回调从不阻塞
+            self.image_format = rospy.get_param('~image_format', 'jpg')
+            self.writer = ImageWriterPool(
+                fmt=self.image_format,
+                num_workers=int(rospy.get_param('~writer_threads', 2)),
+                max_queue=int(rospy.get_param('~writer_queue', 64)),
+                jpeg_quality=int(rospy.get_param('~jpeg_quality', 95)),
+                png_compression=int(rospy.get_param('~png_compression', 3)),
+            )
+        else:
+            raise ValueError(f"Unsupported mode: {self.mode} (images / dataset)")
+        rospy.on_shutdown(self._shutdown)
         # #region agent log
         _debug_log("H2", "camera_view_capture_node.py:__init__", "params_loaded", {
             "image_topic": self.image_topic,
             "save_dir": self.save_dir,
-            "save_interval": self.save_interval
+            "save_interval": self.save_interval,
+            "mode": self.mode,
+            "image_format": self.image_format,
+            "shard_format": self.shard_format
         })
         # #endregion agent log
 
@@ -92,6 +130,7 @@ class CameraViewCapture:
         rospy.loginfo("订阅图像话题: %s", self.image_topic)
         rospy.loginfo("保存目录: %s", self.save_dir)
         rospy.loginfo("保存间隔: %.2f 秒", self.save_interval)
+        rospy.loginfo("保存模式: %s, 格式: %s", self.mode, self.shard_format or self.image_format)
         # #region agent log
         _debug_log("H2", "camera_view_capture_node.py:config", "config_loaded", {
             "topic": self.image_topic,
@@ -100,7 +139,10 @@ class CameraViewCapture:
         })
         # #endregion agent log
 
-        self.sub = rospy.Subscriber(self.image_topic, Image, self.callback, queue_size=1)
+        if self.recorder is not None:
+            self._subscribe_dataset()
+        else:
+            self.sub = rospy.Subscriber(self.image_topic, Image, self.callback, queue_size=1)
         # #region agent log
         _debug_log("H3", "camera_view_capture_node.py:__init__", "subscriber_created", {"topic": self.image_topic})
         # #endregion agent log
@@ -158,15 +200,95 @@ class CameraViewCapture:
         sim_stamp = getattr(msg, "header", None).stamp if hasattr(msg, "header") else now_time
         sim_time = sim_stamp.to_sec()
 
-        filename = os.path.join(self.save_dir, f"camera_view_{int(sim_time*1000)}.jpg")
-        cv2.imwrite(filename, frame)
+        stem = os.path.join(self.save_dir, f"camera_view_{int(sim_time*1000)}")
+        filename = self.writer.submit(stem, frame)
         self.last_save_time = now
-        rospy.loginfo("已保存图像: %s | sim_time=%.3f (sec=%d, nsec=%d)",
-                      filename, sim_time, sim_stamp.secs, sim_stamp.nsecs)
+        if filename is None:
+            rospy.logwarn_throttle(5.0, "写入队列已满，丢弃图像（%s）", self.writer.format_stats())
+            return
+        rospy.loginfo_throttle(1.0, "已提交图像: %s | sim_time=%.3f (sec=%d, nsec=%d)",
+                               filename, sim_time, sim_stamp.secs, sim_stamp.nsecs)
         # #region agent log
         _debug_log("H6", "camera_view_capture_node.py:callback", "saved_image", {"filename": filename})
         # #endregion agent log
 
+    def _subscribe_dataset(self):
+        depth_topic = rospy.get_param('~depth_topic', '/camera/depth/image_raw')
+        camera_info_topic = rospy.get_param('~camera_info_topic', '/camera/rgb/camera_info')
+        joint_states_topic = rospy.get_param('~joint_states_topic', '/joint_states')
+        rospy.loginfo("录制数据集: %s", self.recorder.root)
+        rospy.loginfo("订阅深度 / 内参 / 关节: %s, %s, %s", depth_topic, camera_info_topic, joint_states_topic)
+
+        # 最近的 JointState（按时间排序），录制时按 RGB 时间戳二分查找，而不是取回调时刻最新的一条
+        history = int(rospy.get_param('~joint_history', 1000))
+        self._joint_names = None
+        self._joint_stamps = collections.deque(maxlen=history)
+        self._joint_positions = collections.deque(maxlen=history)
+        self._joint_lock = threading.Lock()
+        rospy.Subscriber(camera_info_topic, CameraInfo, self._camera_info_callback, queue_size=1)
+        rospy.Subscriber(joint_states_topic, JointState, self._joint_state_callback, queue_size=10)
+        rgb_sub = message_filters.Subscriber(self.image_topic, Image)
+        depth_sub = message_filters.Subscriber(depth_topic, Image)
+        self.sync = message_filters.ApproximateTimeSynchronizer(
+            [rgb_sub, depth_sub], queue_size=10, slop=float(rospy.get_param('~sync_slop', 0.05))
+        )
+        self.sync.registerCallback(self.record_callback)
+
+    def _camera_info_callback(self, msg):
+        self.recorder.set_camera_info(msg.K, msg.width, msg.height, D=msg.D, frame_id=msg.header.frame_id)
+
+    def _joint_state_callback(self, msg):
+        stamp = msg.header.stamp.to_sec()
+        with self._joint_lock:
+            if list(msg.name) != self._joint_names:
+                # 关节变化后旧样本的列与新名字不对应
+                self._joint_names = list(msg.name)
+                self._joint_stamps.clear()
+                self._joint_positions.clear()
+                self.recorder.set_joint_names(msg.name)
+            elif self._joint_stamps and stamp < self._joint_stamps[-1]:
+                # 时间回退（bag 循环回放、仿真重置）：按新序列处理
+                self._joint_stamps.clear()
+                self._joint_positions.clear()
+            self._joint_stamps.append(stamp)
+            self._joint_positions.append(tuple(msg.position))
+
+    def _joint_state_at(self, stamp):
+        """stamp 之前（含）最近的 JointState -> (position, joint_stamp)；没有时为 (None, None)"""
+        with self._joint_lock:
+            i = bisect.bisect_right(self._joint_stamps, stamp)
+            if i == 0:
+                return None, None
+            return self._joint_positions[i - 1], self._joint_stamps[i - 1]
+
+    def record_callback(self, rgb_msg, depth_msg):
+        self._received_count += 1
+        now = rospy.Time.now().to_sec()
+        if now - self.last_save_time < self.save_interval:
+            return
+        try:
+            color = self.bridge.imgmsg_to_cv2(rgb_msg, desired_encoding='bgr8')
+            depth = self.bridge.imgmsg_to_cv2(depth_msg, desired_encoding='passthrough')
+        except CvBridgeError as e:
+            rospy.logerr("CvBridge 转换失败: %s", str(e))
+            return
+
+        stamp = rgb_msg.header.stamp.to_sec()
+        position, joint_stamp = self._joint_state_at(stamp)
+        if not self.recorder.add(stamp, color, depth, position, joint_stamp):
+            rospy.logwarn_throttle(5.0, "写盘跟不上，丢弃帧（%s）", self.recorder.stats())
+            return
+        self.last_save_time = now
+
+    def _shutdown(self):
+        # 写完队列中剩余的图像 / shard
+        if self.writer is not None:
+            self.writer.close()
+            rospy.loginfo("图像写入统计: %s", self.writer.format_stats())
+        if self.recorder is not None:
+            self.recorder.close()
+            rospy.loginfo("数据集录制统计: %s", self.recorder.stats())
+
 
 if __name__ == '__main__':
     try:
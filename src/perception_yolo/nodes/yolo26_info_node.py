@@ -8,15 +8,29 @@ YOLO26 检测节点（终端输出）
 """
 
 import json
+import logging
 import os
 import time
 
 import message_filters
-import numpy as np
 import rospy
 from cv_bridge import CvBridge, CvBridgeError
 from sensor_msgs.msg import CameraInfo, Image
-from std_msgs.msg import String
+from std_msgs.msg import Empty, String
+
+from common_msgs.msg import YoloDetection, YoloDetectionArray
+
+from perception_core import (
+    AdaptiveRateController,
+    CameraModel,
+    DetectionPipeline,
+    ResolutionSelector,
+    detection_rows,
+    format_detection,
+    format_flags,
+    load_model,
+    ultralytics_infer,
+)
 
 
 class Yolo26InfoNode:
@@ -28,32 +42,64 @@ class Yolo26InfoNode:
         self.conf_threshold = float(rospy.get_param("~confidence_threshold", 0.5))
         self.image_topic = rospy.get_param("~image_topic", "/camera/rgb/image_raw")
         self.depth_topic = rospy.get_param("~depth_topic", "/camera/depth/image_raw")
-        self.print_interval = float(rospy.get_param("~print_interval", 0.2))
-        self._last_print = 0.0
+        # 自适应处理频率：按实测处理耗时选择频率，使每帧处理延迟不超过预算
+        self.rate_controller = AdaptiveRateController(
+            float(rospy.get_param("~latency_budget_ms", 100.0)) / 1000.0,
+            min_rate=float(rospy.get_param("~min_rate", 1.0)),
+            max_rate=float(rospy.get_param("~max_rate", 30.0)),
+        )
+        self.depth_window = float(rospy.get_param("~depth_window", 0.5))
+        # json: std_msgs/String（兼容旧工具）；typed: common_msgs/YoloDetectionArray；both: 同时发布
+        self.detection_format = rospy.get_param("~detection_format", "both")
+        self.publish_json, self.publish_typed = format_flags(self.detection_format)
+        self._next_start = 0.0
 
-        try:
-            from ultralytics import YOLO
-        except Exception as exc:
-            raise RuntimeError(f"ultralytics not installed: {exc}")
+        # torch: eager；onnx / openvino: 首次运行导出并按 (权重哈希, imgsz) 缓存
+        self.backend = rospy.get_param("~backend", "torch")
+        self.imgsz = int(rospy.get_param("~imgsz", 640))
 
         if not os.path.exists(self.model_path):
             raise FileNotFoundError(self.model_path)
 
-        self.model = YOLO(self.model_path)
-        rospy.loginfo("YOLO model: %s", self.model_path)
+        try:
+            self.model = load_model(self.model_path, self.backend, self.imgsz,
+                                    rospy.get_param("~export_cache", None))
+        except ImportError as exc:
+            # onnx / openvino 后端缺的通常是 onnxruntime / openvino，而不是 ultralytics
+            raise RuntimeError(f"{exc.name or exc} not installed (backend={self.backend}): {exc}")
+        # 逐帧选择推理分辨率（如 [320, 480, 640]）；空列表时固定使用 ~imgsz
+        self.resolution = None
+        imgsz_set = rospy.get_param("~imgsz_set", [])
+        if imgsz_set:
+            self.resolution = ResolutionSelector(imgsz_set, self.rate_controller.latency_budget)
+        # 同步器回调逐帧串行调用，凑不成批（MicroBatcher 只会多等 max_wait），直接单帧推理
+        infer_batch = ultralytics_infer(self.model, self.resolution, imgsz=self.imgsz)
+        # 每 N 帧跑一次网络，中间帧按速度外推框；/perception/yolo26_detect_request 上的 Empty 强制下一帧检测
+        self.detect_every = int(rospy.get_param("~detect_every", 1))
+        self.pipeline = DetectionPipeline(lambda frame: infer_batch([frame])[0], self.conf_threshold,
+                                          depth_window=self.depth_window,
+                                          with_json=self.publish_json,
+                                          detect_every=self.detect_every,
+                                          resolution=self.resolution)
+        rospy.loginfo("YOLO model: %s (backend=%s, imgsz=%d)", self.model_path, self.backend, self.imgsz)
         rospy.loginfo("Subscribing RGB: %s", self.image_topic)
         rospy.loginfo("Subscribing Depth: %s", self.depth_topic)
         rospy.loginfo("Confidence threshold: %.2f", self.conf_threshold)
+        rospy.loginfo("Detect every %d frame(s)", self.detect_every)
 
         self.camera_info_topic = rospy.get_param("~camera_info_topic", "/camera/rgb/camera_info")
-        self.fx = None
-        self.fy = None
-        self.cx_cam = None
-        self.cy_cam = None
+        self.camera = CameraModel()
         rospy.Subscriber(self.camera_info_topic, CameraInfo, self._camera_info_cb)
         rospy.loginfo("Subscribing CameraInfo: %s", self.camera_info_topic)
 
         self.detection_pub = rospy.Publisher("/perception/yolo26_detections", String, queue_size=10)
+        self.detection_array_pub = rospy.Publisher("/perception/yolo26_detection_array",
+                                                   YoloDetectionArray, queue_size=10)
+        # 当前目标频率与实测延迟（JSON），用于按机器调整 ~latency_budget_ms
+        self.rate_pub = rospy.Publisher("/perception/yolo26_rate", String, queue_size=1)
+        rospy.Timer(rospy.Duration(1.0), self._publish_rate)
+        rospy.Subscriber("/perception/yolo26_detect_request", Empty,
+                         lambda _msg: self.pipeline.request_detection())
 
         rgb_sub = message_filters.Subscriber(self.image_topic, Image)
         depth_sub = message_filters.Subscriber(self.depth_topic, Image)
@@ -63,26 +109,15 @@ class Yolo26InfoNode:
         self.sync.registerCallback(self.image_callback)
 
     def _camera_info_cb(self, msg):
-        if self.fx is None:
-            K = msg.K
-            self.fx = K[0]
-            self.fy = K[4]
-            self.cx_cam = K[2]
-            self.cy_cam = K[5]
-            rospy.loginfo("Camera intrinsics: fx=%.1f fy=%.1f cx=%.1f cy=%.1f",
-                          self.fx, self.fy, self.cx_cam, self.cy_cam)
-
-    def _pixel_to_3d(self, u, v, z):
-        if self.fx is None or z is None or z <= 0:
-            return None
-        x = (u - self.cx_cam) * z / self.fx
-        y = (v - self.cy_cam) * z / self.fy
-        return [round(x, 3), round(y, 3), round(z, 3)]
+        # 内参或分辨率变化时重建像素射线表，否则直接返回
+        if self.camera.update_from_msg(msg):
+            rospy.loginfo("Camera intrinsics: %s", self.camera.rays)
 
     def image_callback(self, rgb_msg, depth_msg):
-        now = time.time()
-        if now - self._last_print < self.print_interval:
+        start = time.monotonic()
+        if start < self._next_start:
             return
+        self._next_start = start + self.rate_controller.interval
 
         # Gazebo 仿真时间（来自图像消息的 header）
         sim_stamp = rgb_msg.header.stamp
@@ -91,81 +126,44 @@ class Yolo26InfoNode:
                       sim_time, sim_stamp.secs, sim_stamp.nsecs)
 
         try:
-            frame = self.bridge.imgmsg_to_cv2(rgb_msg, desired_encoding="bgr8")
-            depth = self.bridge.imgmsg_to_cv2(depth_msg, desired_encoding="passthrough")
+            with self.pipeline.timer.stage("decode"):
+                frame = self.bridge.imgmsg_to_cv2(rgb_msg, desired_encoding="bgr8")
+                depth = self.bridge.imgmsg_to_cv2(depth_msg, desired_encoding="passthrough")
         except CvBridgeError as exc:
             rospy.logerr("CvBridge error: %s", str(exc))
             return
 
-        results = self.model(frame, verbose=False)
-        if not results:
-            return
-
-        h, w = frame.shape[:2]
-        detections = []
-        for result in results:
-            if result.boxes is None:
-                continue
-            for box in result.boxes:
-                conf = float(box.conf[0])
-                if conf < self.conf_threshold:
-                    continue
-                cls_id = int(box.cls[0])
-                label = result.names[cls_id]
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-
-                x1 = max(0, min(x1, w - 1))
-                x2 = max(0, min(x2, w - 1))
-                y1 = max(0, min(y1, h - 1))
-                y2 = max(0, min(y2, h - 1))
-
-                cx = int((x1 + x2) / 2)
-                cy = int((y1 + y2) / 2)
-
-                dist = None
-                try:
-                    d = depth[cy, cx]
-                    if np.issubdtype(depth.dtype, np.integer):
-                        dist = float(d) / 1000.0
-                    else:
-                        dist = float(d)
-                except Exception:
-                    dist = None
-
-                roi = frame[y1:y2 + 1, x1:x2 + 1]
-                if roi.size > 0:
-                    b, g, r = roi.mean(axis=(0, 1))
-                    avg_bgr = [int(b), int(g), int(r)]
-                else:
-                    avg_bgr = None
-
-                pos_3d = self._pixel_to_3d(cx, cy, dist)
-
-                det = {
-                    "label": label,
-                    "confidence": round(conf, 2),
-                    "bbox": [int(x1), int(y1), int(x2), int(y2)],
-                    "center": [cx, cy],
-                    "distance_m": round(dist, 2) if dist is not None else None,
-                    "position_camera": pos_3d,
-                    "avg_bgr": avg_bgr,
-                }
-                detections.append(det)
-
-                rospy.loginfo(
-                    "Detected %s conf=%.2f bbox=(%d,%d,%d,%d) center=(%d,%d) avg_bgr=%s distance=%s pos_cam=%s",
-                    label, conf, x1, y1, x2, y2, cx, cy,
-                    str(avg_bgr) if avg_bgr else "n/a",
-                    f"{dist:.2f}m" if dist is not None else "n/a",
-                    str(pos_3d) if pos_3d else "n/a"
-                )
-
-        if detections:
-            msg = String()
-            msg.data = json.dumps(detections, ensure_ascii=False)
-            self.detection_pub.publish(msg)
-
-        self._last_print = now
+        out = self.pipeline.run_arrays(frame, depth, self.camera.rays,
+                                       stamp=sim_time or None)
+        for det in out.detections:
+            rospy.loginfo(format_detection(det))
+
+        with self.pipeline.timer.stage("publish"):
+            if out.json is not None:
+                self.detection_pub.publish(String(data=out.json))
+            if self.publish_typed:
+                self.detection_array_pub.publish(self._detection_array(out, rgb_msg.header))
+
+        # 同步回调中没有排队环节，端到端延迟即处理耗时
+        elapsed = time.monotonic() - start
+        self.rate_controller.update(elapsed, elapsed)
+
+    def _publish_rate(self, event):
+        # 各阶段分位数每秒汇总一次（不在每帧回调里算，避免计时本身的开销）
+        if logging.getLogger("rosout").isEnabledFor(logging.DEBUG):
+            rospy.logdebug("YOLO26 stages: %s", self.pipeline.timer.format_summary())
+        stats = self.rate_controller.stats()
+        if self.resolution is not None:
+            stats["resolution"] = self.resolution.stats()
+            rospy.logdebug("YOLO26 %s", self.resolution.format_stats())
+        self.rate_pub.publish(String(data=json.dumps(stats)))
+
+    def _detection_array(self, out, header):
+        """结构化数组 -> YoloDetectionArray（每帧一条，header 沿用 RGB 图像）"""
+        msg = YoloDetectionArray(header=header)
+        msg.labels = [det["label"] for det in out.detections]
+        msg.detections = [YoloDetection(**fields) for fields in detection_rows(out.records)]
+        return msg
 
     def run(self):
         rospy.spin()
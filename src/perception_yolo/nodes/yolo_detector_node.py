@@ -13,7 +13,15 @@ import numpy as np
 from cv_bridge import CvBridge, CvBridgeError
 
 from sensor_msgs.msg import Image, RegionOfInterest
-from common_msgs.msg import DetectedObject
+from common_msgs.msg import DetectedObject, DetectedObjectArray
+from perception_core import (
+    InferenceWorker,
+    LatestFrameMailbox,
+    MicroBatcher,
+    extract_detections,
+    load_model,
+    ultralytics_infer,
+)
 
 
 class YOLODetectorNode:
@@ -30,23 +38,37 @@ class YOLODetectorNode:
         self.model_path = rospy.get_param('~model_path', '/workspace/weights/yolo/yolov8n.pt')
         self.confidence_threshold = rospy.get_param('~confidence_threshold', 0.5)
         self.image_topic = rospy.get_param('~image_topic', '/camera/color/image_raw')
+        # 多相机：每个话题一个订阅线程，同时到达的帧合成一个 batch 推理
+        self.image_topics = rospy.get_param('~image_topics', [self.image_topic])
+        # 推理后端：torch（eager，使用 self.device）/ onnx / openvino（CPU，导出产物缓存在磁盘）
+        self.backend = rospy.get_param('~backend', 'torch')
+        self.imgsz = int(rospy.get_param('~imgsz', 640))
         
         # 加载 YOLO 模型
         self.model = self._load_model()
+        self.batcher = MicroBatcher(
+            ultralytics_infer(self.model, imgsz=self.imgsz),
+            max_batch_size=int(rospy.get_param('~max_batch_size', len(self.image_topics))),
+            max_wait_ms=float(rospy.get_param('~max_batch_wait_ms', 5.0))
+        )
         
         # ROS 接口
         self.bridge = CvBridge()
-        self.image_sub = rospy.Subscriber(
-            self.image_topic,
-            Image,
-            self.image_callback,
-            queue_size=1,
-            buff_size=2**24  # 16MB buffer
-        )
+        self.image_subs = [
+            rospy.Subscriber(
+                topic,
+                Image,
+                self.image_callback,
+                queue_size=1,
+                buff_size=2**24  # 16MB buffer
+            )
+            for topic in self.image_topics
+        ]
         
+        # 每帧发布一条 DetectedObjectArray（含该帧全部检测）
         self.detection_pub = rospy.Publisher(
             '/perception/detected_objects',
-            DetectedObject,
+            DetectedObjectArray,
             queue_size=10
         )
         
@@ -56,9 +78,24 @@ class YOLODetectorNode:
             queue_size=1
         )
         
+        # 可视化：只在有订阅者时绘制，在独立的低优先级线程中限频执行，不占用检测延迟
+        self.viz_max_rate = float(rospy.get_param('~viz_max_rate', 5.0))
+        self.viz_scale = float(rospy.get_param('~viz_scale', 1.0))
+        self.viz_mailbox = LatestFrameMailbox()
+        self.viz_worker = InferenceWorker(
+            self.viz_mailbox,
+            self._draw_visualization,
+            min_interval=1.0 / self.viz_max_rate if self.viz_max_rate > 0 else 0.0,
+            name='detection-viz',
+            niceness=10
+        )
+        self.viz_worker.start()
+        
         rospy.loginfo(f"[YOLO] Device: {self.device}")
         rospy.loginfo(f"[YOLO] Model: {self.model_path}")
-        rospy.loginfo(f"[YOLO] Subscribing to: {self.image_topic}")
+        rospy.loginfo(f"[YOLO] Subscribing to: {', '.join(self.image_topics)}")
+        rospy.loginfo(f"[YOLO] Max batch size: {self.batcher.max_batch_size}")
+        rospy.loginfo(f"[YOLO] Visualization: <= {self.viz_max_rate:.1f} Hz, scale {self.viz_scale:.2f}")
         rospy.loginfo("[YOLO] Initialization complete. Ready to detect!")
         
     def _setup_device(self):
@@ -80,13 +117,15 @@ class YOLODetectorNode:
     def _load_model(self):
         """加载 YOLO 模型（支持 YOLOv8 或其他版本）"""
         try:
-            from ultralytics import YOLO
-            model = YOLO(self.model_path)
-            model.to(self.device)
-            rospy.loginfo(f"[YOLO] Model loaded successfully: {self.model_path}")
+            model = load_model(self.model_path, self.backend, self.imgsz,
+                               rospy.get_param('~export_cache', None))
+            if self.backend == 'torch':
+                model.to(self.device)
+            rospy.loginfo(f"[YOLO] Model loaded successfully: {self.model_path} (backend={self.backend})")
             return model
-        except ImportError:
-            rospy.logerr("[YOLO] ultralytics not installed. Install with: pip install ultralytics")
+        except ImportError as exc:
+            rospy.logerr(f"[YOLO] {exc.name or exc} not installed (backend={self.backend}). "
+                         f"Install with: pip install {exc.name or 'ultralytics'}")
             raise
         except Exception as e:
             rospy.logerr(f"[YOLO] Failed to load model: {e}")
@@ -101,57 +140,58 @@ class YOLODetectorNode:
             rospy.logerr(f"[YOLO] CV Bridge Error: {e}")
             return
             
-        # 执行推理
-        results = self.model(cv_image, verbose=False)
+        # 执行推理（经 MicroBatcher，与其他相机的帧合批）
+        results = [self.batcher.infer(cv_image)]
         
-        # 解析结果并发布
+        # 解析结果，整帧发布一次
         for result in results:
-            boxes = result.boxes
-            
-            if boxes is None or len(boxes) == 0:
-                continue
-                
-            for box in boxes:
-                # 提取检测信息
-                conf = float(box.conf[0])
-                
-                if conf < self.confidence_threshold:
-                    continue
-                    
-                cls_id = int(box.cls[0])
-                label = result.names[cls_id]
-                
-                # 边界框 (xyxy format)
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+            self.detection_pub.publish(self._build_detection_array(result, msg.header, cv_image.shape))
                 
-                # 构造 ROI 消息
-                roi = RegionOfInterest()
-                roi.x_offset = int(x1)
-                roi.y_offset = int(y1)
-                roi.width = int(x2 - x1)
-                roi.height = int(y2 - y1)
-                roi.do_rectify = False
-                
-                # 发布 DetectedObject
-                detection_msg = DetectedObject()
-                detection_msg.label = label
-                detection_msg.score = conf
-                detection_msg.roi = roi
-                
-                self.detection_pub.publish(detection_msg)
-                rospy.loginfo(f"[YOLO] Detected: {label} ({conf:.2f})")
-                
-        # 可视化（可选）
-        self._publish_visualization(cv_image, results)
+        # 可视化（可选）：没有订阅者时完全跳过，否则交给可视化线程
+        if self.viz_pub.get_num_connections() > 0:
+            self.viz_mailbox.put((results[0], msg.header))
+        
+    def _build_detection_array(self, result, header, shape):
+        """单帧结果 -> DetectedObjectArray（header 沿用源图像）"""
+        dets = extract_detections(result, self.confidence_threshold, shape)
+        array_msg = DetectedObjectArray()
+        array_msg.header = header
         
-    def _publish_visualization(self, image, results):
-        """发布带检测框的可视化图像"""
+        for k in range(len(dets)):
+            x1, y1, x2, y2 = (int(v) for v in dets.xyxy[k])
+            roi = RegionOfInterest()
+            roi.x_offset = x1
+            roi.y_offset = y1
+            roi.width = x2 - x1
+            roi.height = y2 - y1
+            roi.do_rectify = False
+            
+            detection_msg = DetectedObject()
+            detection_msg.label = result.names[int(dets.cls[k])]
+            detection_msg.score = float(dets.conf[k])
+            detection_msg.roi = roi
+            array_msg.objects.append(detection_msg)
+            
+        if array_msg.objects:
+            rospy.loginfo("[YOLO] Detected: " + ", ".join(
+                f"{obj.label} ({obj.score:.2f})" for obj in array_msg.objects))
+        return array_msg
+        
+    def _draw_visualization(self, item):
+        """可视化线程：绘制检测框，按 viz_scale 缩小后发布"""
+        result, header = item
+        if self.viz_pub.get_num_connections() == 0:
+            return
         try:
             # 使用 ultralytics 的内置绘图
-            annotated_frame = results[0].plot()
+            annotated_frame = result.plot()
+            if 0 < self.viz_scale < 1.0:
+                annotated_frame = cv2.resize(annotated_frame, None, fx=self.viz_scale, fy=self.viz_scale,
+                                             interpolation=cv2.INTER_AREA)
             
             # OpenCV -> ROS Image
             viz_msg = self.bridge.cv2_to_imgmsg(annotated_frame, encoding='bgr8')
+            viz_msg.header = header
             self.viz_pub.publish(viz_msg)
         except Exception as e:
             rospy.logwarn(f"[YOLO] Visualization failed: {e}")
@@ -159,6 +199,8 @@ class YOLODetectorNode:
     def run(self):
         """保持节点运行"""
         rospy.spin()
+        self.viz_worker.stop()
+        self.batcher.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+perception_core - YOLO 感知的公共代码
+rosbridge 脚本（scripts/）与 ROS 节点（nodes/）共用，不依赖 rospy
+"""
+
+from perception_core.backends import BACKENDS, export_model, load_model, weight_hash
+from perception_core.batching import MicroBatcher, ultralytics_infer
+from perception_core.dataset import SHARD_FORMATS, RgbdDataset, RgbdFrame, RgbdRecorder
+from perception_core.detection_msg import (
+    DETECTION_DTYPE,
+    DETECTION_FIELDS,
+    detection_array_msg,
+    detection_records,
+    detection_rows,
+    parse_detection_array,
+)
+from perception_core.geometry import (
+    DISTORTION_MODELS,
+    CameraModel,
+    Intrinsics,
+    PixelRays,
+    mask_roi_to_3d_points,
+    mask_to_3d_points,
+    pixels_to_3d,
+    upsample_mask_roi,
+)
+from perception_core.image import decode_depth, decode_image
+from perception_core.integral import SummedAreaTable, box_mean_colors, box_mean_depth
+from perception_core.pipeline import DETECTION_FORMATS, DetectionPipeline, FrameOutput, format_flags
+from perception_core.pointcloud import XYZL_DTYPE, build_pointcloud2_msg, pack_xyzl
+from perception_core.postprocess import (
+    Detections,
+    detection_dicts,
+    enrich_detections,
+    extract_detections,
+    format_detection,
+    postprocess,
+    propagated_detections,
+)
+from perception_core.rate import AdaptiveRateController
+from perception_core.resolution import ResolutionSelector
+from perception_core.sync import DepthRingBuffer, LazyDepth, stamp_to_sec
+from perception_core.timing import STAGES, StageTimer
+from perception_core.tracking import BoxTracker, box_iou, center_affinity, extrapolate_boxes, greedy_match
+from perception_core.transport import (
+    TRANSPORTS,
+    as_image_msg,
+    enable_binary_transport,
+    image_buffer,
+    image_topic,
+    unpack_raw_image,
+)
+from perception_core.worker import InferenceWorker, LatestFrameMailbox
+from perception_core.writer import (
+    IMAGE_FORMATS,
+    AsyncJsonLogger,
+    ImageWriterPool,
+    encode_image,
+    write_atomic,
+)
+
+__all__ = [
+    "AdaptiveRateController",
+    "AsyncJsonLogger",
+    "BACKENDS",
+    "BoxTracker",
+    "CameraModel",
+    "DETECTION_DTYPE",
+    "DETECTION_FIELDS",
+    "DETECTION_FORMATS",
+    "DISTORTION_MODELS",
+    "DepthRingBuffer",
+    "DetectionPipeline",
+    "Detections",
+    "FrameOutput",
+    "IMAGE_FORMATS",
+    "ImageWriterPool",
+    "InferenceWorker",
+    "Intrinsics",
+    "LatestFrameMailbox",
+    "LazyDepth",
+    "MicroBatcher",
+    "PixelRays",
+    "ResolutionSelector",
+    "RgbdDataset",
+    "RgbdFrame",
+    "RgbdRecorder",
+    "SHARD_FORMATS",
+    "STAGES",
+    "StageTimer",
+    "SummedAreaTable",
+    "TRANSPORTS",
+    "XYZL_DTYPE",
+    "as_image_msg",
+    "box_iou",
+    "box_mean_colors",
+    "box_mean_depth",
+    "build_pointcloud2_msg",
+    "center_affinity",
+    "decode_depth",
+    "decode_image",
+    "detection_array_msg",
+    "detection_dicts",
+    "detection_records",
+    "detection_rows",
+    "enable_binary_transport",
+    "encode_image",
+    "enrich_detections",
+    "export_model",
+    "extract_detections",
+    "extrapolate_boxes",
+    "format_detection",
+    "format_flags",
+    "greedy_match",
+    "image_buffer",
+    "image_topic",
+    "load_model",
+    "mask_roi_to_3d_points",
+    "mask_to_3d_points",
+    "pack_xyzl",
+    "parse_detection_array",
+    "pixels_to_3d",
+    "postprocess",
+    "propagated_detections",
+    "stamp_to_sec",
+    "ultralytics_infer",
+    "unpack_raw_image",
+    "upsample_mask_roi",
+    "weight_hash",
+    "write_atomic",
+]
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+YOLO 推理后端：PyTorch eager / ONNX Runtime / OpenVINO
+非 torch 后端第一次使用时把 .pt 导出一次，按 (权重哈希, imgsz) 缓存到磁盘，之后直接加载导出产物；
+权重文件变化（哈希不同）或 imgsz 不同都会重新导出
+ultralytics 只在调用时导入，perception_core 本身不依赖它
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "openvino")
+
+# ultralytics export 的产物：onnx 为单个文件，openvino 为目录
+_EXPORT_SUFFIX = {"onnx": ".onnx", "openvino": "_openvino_model"}
+
+
+def weight_hash(path, chunk_size=1 << 20):
+    """权重文件内容的 sha256（前 12 位）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def default_cache_dir(model_path):
+    """默认缓存目录：权重旁的 exported/（如 weights/yolo/exported/）"""
+    return os.path.join(os.path.dirname(os.path.abspath(model_path)), "exported")
+
+
+def export_cache_path(model_path, backend, imgsz, cache_dir=None):
+    """导出产物的缓存路径：<cache_dir>/<stem>-<hash>-<imgsz><suffix>"""
+    if backend not in _EXPORT_SUFFIX:
+        raise ValueError(f"Unsupported export backend: {backend}")
+    cache_dir = cache_dir or default_cache_dir(model_path)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    name = f"{stem}-{weight_hash(model_path)}-{int(imgsz)}{_EXPORT_SUFFIX[backend]}"
+    return os.path.join(cache_dir, name)
+
+
+def export_model(model_path, backend, imgsz, cache_dir=None):
+    """导出（已缓存则跳过），返回缓存中的产物路径"""
+    target = export_cache_path(model_path, backend, imgsz, cache_dir)
+    if os.path.exists(target):
+        return target
+
+    from ultralytics import YOLO
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # 在临时目录中导出，再整体 rename 到缓存，避免中断时留下半个产物
+    tmp_dir = tempfile.mkdtemp(prefix=".export-", dir=os.path.dirname(target))
+    try:
+        tmp_weights = os.path.join(tmp_dir, os.path.basename(model_path))
+        shutil.copy2(model_path, tmp_weights)
+        logger.info("exporting %s to %s (imgsz=%d)", model_path, backend, imgsz)
+        # dynamic=True：MicroBatcher 合批时 batch 维可变
+        exported = YOLO(tmp_weights).export(format=backend, imgsz=int(imgsz), dynamic=True)
+        if os.path.exists(target):
+            return target
+        os.replace(str(exported), target)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return target
+
+
+def load_model(model_path, backend="torch", imgsz=640, cache_dir=None):
+    """按后端加载 ultralytics 模型；非 torch 后端推理时需传相同的 imgsz（见 ultralytics_infer）"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported backend: {backend} (choose from {', '.join(BACKENDS)})")
+
+    from ultralytics import YOLO
+
+    if backend == "torch":
+        return YOLO(model_path)
+    return YOLO(export_model(model_path, backend, imgsz, cache_dir))
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+微批推理：凑够 max_batch_size 帧或等待 max_wait_ms 后做一次 batched forward，
+结果按请求顺序返回给各自的调用者（Future）
+
+多个相机订阅 / 多个推理线程同时调用 infer() 时才会真正合批；
+max_batch_size <= 1 时直接在调用线程里推理，不经过批处理线程
+"""
+
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+def ultralytics_infer(model, resolution=None, **kwargs):
+    """ultralytics.YOLO -> 批推理函数 frames(list) -> results(list)
+
+    resolution: ResolutionSelector；给定时每批推理前由它选择 imgsz（覆盖 kwargs 中的 imgsz），
+    并把该尺寸的推理耗时反馈给它
+    """
+    kwargs.setdefault("verbose", False)
+
+    def infer_batch(frames):
+        return model(frames, **kwargs)
+
+    def infer_batch_resized(frames):
+        imgsz = resolution.choose()
+        t0 = time.perf_counter()
+        results = model(frames, **dict(kwargs, imgsz=imgsz))
+        resolution.record(imgsz, time.perf_counter() - t0, len(frames))
+        return results
+
+    return infer_batch if resolution is None else infer_batch_resized
+
+
+class MicroBatcher:
+    def __init__(self, infer_batch, max_batch_size=4, max_wait_ms=5.0, name="micro-batcher"):
+        self.infer_batch = infer_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.batches = 0
+        self.items = 0
+
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+        if self.max_batch_size > 1:
+            self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+            self._thread.start()
+
+    def submit(self, item):
+        """提交一帧，返回 concurrent.futures.Future"""
+        future = Future()
+        if self._thread is None:
+            self._run_batch([item], [future])
+            return future
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.append((item, future))
+            self._cond.notify()
+        return future
+
+    def infer(self, item, timeout=None):
+        """提交一帧并阻塞等待该帧的结果"""
+        return self.submit(item).result(timeout)
+
+    def close(self, timeout=2.0):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def mean_batch_size(self):
+        with self._cond:
+            return self.items / self.batches if self.batches else 0.0
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+
+                # 第一帧到达后最多再等 max_wait 凑批
+                deadline = time.monotonic() + self.max_wait
+                while len(self._queue) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                n = min(len(self._queue), self.max_batch_size)
+                batch = [self._queue.popleft() for _ in range(n)]
+
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            self._run_batch(items, futures)
+
+    def _run_batch(self, items, futures):
+        try:
+            results = list(self.infer_batch(items))
+            if len(results) != len(items):
+                raise RuntimeError(f"batch returned {len(results)} results for {len(items)} inputs")
+        except Exception as exc:
+            logger.exception("batched inference failed")
+            for future in futures:
+                future.set_exception(exc)
+            return
+
+        # 单帧路径在各调用线程中直接执行，计数需加锁
+        with self._cond:
+            self.batches += 1
+            self.items += len(items)
+        for future, result in zip(futures, results):
+            future.set_result(result)
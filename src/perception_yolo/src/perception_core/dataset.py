@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""
+同步 RGB-D 数据集：按块（shard）写入，按时间戳随机读取
+录制时每 chunk_size 帧合成一个 shard，由后台线程写盘；回放 / 基准按 shard 顺序流式读取，
+不再逐个解码成千上万的小文件
+
+目录结构:
+  index.json            格式、相机内参、关节名、每个 shard 的帧数与时间范围
+  shard_00000/          shard_format="npy"：每个字段一个 .npy，读取时 mmap，不解码不拷贝
+    stamp.npy           (N,) float64 秒（RGB header.stamp）
+    color.npy           (N, H, W, 3) uint8，BGR 顺序（cv_bridge bgr8）
+    depth.npy           (N, H, W) uint16 毫米或 float32 米（与相机原始编码一致）
+    joint_position.npy  (N, J) float64，RGB 时刻之前最近的 JointState；没有时为 NaN
+    joint_stamp.npy     (N,) float64，该 JointState 的时间戳（没有时为 NaN）
+  shard_00001.npz       shard_format="npz"：同样的字段压缩在一个文件中（体积小，读取需解压整个 shard，
+                        适合归档和顺序回放；随机访问用 npy）
+"""
+
+import collections
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import zipfile
+
+import numpy as np
+
+from perception_core.writer import write_atomic
+
+logger = logging.getLogger(__name__)
+
+SHARD_FORMATS = ("npy", "npz")
+INDEX_FILE = "index.json"
+FIELDS = ("stamp", "color", "depth", "joint_position", "joint_stamp")
+
+RgbdFrame = collections.namedtuple("RgbdFrame", FIELDS)
+
+
+class RgbdRecorder:
+    """add() 把一帧拷入当前 shard 的预分配缓冲；满 chunk_size 帧（或图像尺寸变化）时交给写盘线程
+
+    写盘线程落后 max_pending 个 shard 时，add() 丢弃新帧并计入 dropped，调用者不阻塞
+    close() 写出未满的最后一个 shard 并更新 index.json；写盘线程在 timeout 内跟不上时，
+    未能入队的帧计入 dropped，且不再写最终索引（索引仍由写盘线程在每个 shard 写完后更新）
+    compress_level: npz 的 zlib 压缩级别（1 最快）
+    """
+
+    def __init__(self, root, chunk_size=64, shard_format="npy", max_pending=2, compress_level=1,
+                 name="rgbd-recorder"):
+        if shard_format not in SHARD_FORMATS:
+            raise ValueError(f"Unsupported shard format: {shard_format} (choose from {', '.join(SHARD_FORMATS)})")
+        self.root = root
+        self.chunk_size = max(1, int(chunk_size))
+        self.shard_format = shard_format
+        self.compress_level = compress_level
+        self.frames = 0
+        self.dropped = 0
+        self.camera_info = None
+        self.joint_names = []
+
+        os.makedirs(root, exist_ok=True)
+        self._shards = []
+        self._next_shard = 0
+        self._buffer = None
+        self._count = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def set_camera_info(self, K, width, height, D=None, frame_id=""):
+        with self._lock:
+            self.camera_info = {
+                "K": [float(v) for v in K],
+                "D": [float(v) for v in (D if D is not None else ())],
+                "width": int(width),
+                "height": int(height),
+                "frame_id": frame_id,
+            }
+
+    def set_joint_names(self, names):
+        with self._lock:
+            self.joint_names = list(names)
+
+    def add(self, stamp, color, depth, joint_position=None, joint_stamp=None):
+        """返回 False 表示该帧被丢弃（写盘跟不上）"""
+        with self._lock:
+            if joint_position is not None:
+                num_joints = len(joint_position)
+            elif self._buffer is not None:
+                num_joints = self._buffer["joint_position"].shape[1]
+            else:
+                num_joints = len(self.joint_names)
+            if self._buffer is not None and not self._fits(color, depth, num_joints):
+                if not self._flush_locked():
+                    self.dropped += 1
+                    return False
+            if self._buffer is None:
+                self._buffer = self._allocate(color, depth, num_joints)
+
+            k = self._count
+            buf = self._buffer
+            buf["stamp"][k] = stamp
+            buf["color"][k] = color
+            buf["depth"][k] = depth
+            if joint_position is not None:
+                buf["joint_position"][k] = joint_position
+                buf["joint_stamp"][k] = joint_stamp if joint_stamp is not None else np.nan
+            self._count += 1
+            self.frames += 1
+
+            if self._count == self.chunk_size and not self._flush_locked():
+                # 写盘线程落后：撤回这一帧，缓冲保持满，之后的帧继续丢弃直到队列有空位
+                self._count -= 1
+                self.frames -= 1
+                self.dropped += 1
+                return False
+            return True
+
+    def close(self, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        self._closed = True
+        # 入队在锁外进行：写盘线程写完 shard 后也要取 self._lock
+        with self._lock:
+            item = self._take_locked() if self._buffer is not None and self._count else None
+        if item is not None:
+            try:
+                self._queue.put(item, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                n = len(item[1]["stamp"])
+                with self._lock:
+                    self.frames -= n
+                    self.dropped += n
+                logger.warning("recorder %s: writer did not catch up, dropped last %d frames", self.root, n)
+        try:
+            self._queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Full:
+            logger.warning("recorder %s: writer still busy after %.1fs, index not finalized", self.root, timeout)
+            return
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        if self._thread.is_alive():
+            # 写盘线程仍在写 shard，再写索引会与它竞争同一个 index.json.tmp
+            logger.warning("recorder %s: writer still busy after %.1fs, index not finalized", self.root, timeout)
+            return
+        self._write_index()
+
+    def _fits(self, color, depth, num_joints):
+        buf = self._buffer
+        return (buf["color"].shape[1:] == color.shape and buf["color"].dtype == color.dtype
+                and buf["depth"].shape[1:] == depth.shape and buf["depth"].dtype == depth.dtype
+                and buf["joint_position"].shape[1] == num_joints)
+
+    def _allocate(self, color, depth, num_joints):
+        n = self.chunk_size
+        self._count = 0
+        return {
+            "stamp": np.zeros(n, dtype=np.float64),
+            "color": np.empty((n,) + color.shape, dtype=color.dtype),
+            "depth": np.empty((n,) + depth.shape, dtype=depth.dtype),
+            "joint_position": np.full((n, num_joints), np.nan),
+            "joint_stamp": np.full(n, np.nan),
+        }
+
+    def _take_locked(self):
+        name = f"shard_{self._next_shard:05d}"
+        self._next_shard += 1
+        arrays = {key: value[:self._count] for key, value in self._buffer.items()}
+        self._buffer = None
+        self._count = 0
+        return name, arrays
+
+    def _flush_locked(self):
+        """当前缓冲交给写盘线程；队列满时返回 False（缓冲保留）"""
+        if self._queue.full():
+            return False
+        self._queue.put_nowait(self._take_locked())
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                # close() 未能放入结束标记（队列满）时，写完剩余 shard 后自行退出
+                if self._closed:
+                    return
+                continue
+            if item is None:
+                return
+            name, arrays = item
+            try:
+                filename = self._write_shard(name, arrays)
+            except Exception:
+                logger.exception("failed to write shard %s", name)
+                continue
+            stamps = arrays["stamp"]
+            with self._lock:
+                self._shards.append({
+                    "name": filename,
+                    "count": int(len(stamps)),
+                    "t0": float(stamps.min()),
+                    "t1": float(stamps.max()),
+                })
+            # 每个 shard 写完都更新索引，录制中断时已写出的 shard 仍可读
+            self._write_index()
+
+    def _write_shard(self, name, arrays):
+        if self.shard_format == "npz":
+            filename = name + ".npz"
+            tmp = os.path.join(self.root, name + ".tmp.npz")
+            # np.savez_compressed 固定 zlib 级别 6，640x480 下约 10 帧/秒，跟不上相机；
+            # 级别 1 体积相近，快数倍
+            with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED, compresslevel=self.compress_level) as zf:
+                for key, value in arrays.items():
+                    with zf.open(key + ".npy", "w", force_zip64=True) as f:
+                        np.lib.format.write_array(f, np.ascontiguousarray(value), allow_pickle=False)
+            os.replace(tmp, os.path.join(self.root, filename))
+            return filename
+
+        tmp_dir = os.path.join(self.root, name + ".tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        for key, value in arrays.items():
+            np.save(os.path.join(tmp_dir, key + ".npy"), value, allow_pickle=False)
+        os.replace(tmp_dir, os.path.join(self.root, name))
+        return name
+
+    def _write_index(self):
+        with self._lock:
+            index = {
+                "version": 1,
+                "format": self.shard_format,
+                "camera_info": self.camera_info,
+                "joint_names": self.joint_names,
+                "shards": sorted(self._shards, key=lambda s: s["name"]),
+            }
+        write_atomic(os.path.join(self.root, INDEX_FILE),
+                     json.dumps(index, indent=1).encode("utf-8"))
+
+    def stats(self):
+        with self._lock:
+            return {"frames": self.frames, "dropped": self.dropped,
+                    "shards": len(self._shards), "pending": self._queue.qsize()}
+
+
+class RgbdDataset:
+    """RgbdRecorder 目录的读取器
+
+    dataset[i]            第 i 帧（按时间排序）
+    nearest(stamp, slop)  时间上最近的一帧，超出 slop 返回 None
+    range(t0, t1)         [t0, t1] 内的帧（按 shard 顺序流式读取）
+    for frame in dataset  顺序读取全部帧
+    npy shard 以 mmap 打开，返回的数组是只读视图；npz shard 整块解压，最近 cache_shards 个保留在内存中
+    """
+
+    def __init__(self, root, cache_shards=2):
+        self.root = root
+        with open(os.path.join(root, INDEX_FILE), encoding="utf-8") as f:
+            index = json.load(f)
+        self.shard_format = index["format"]
+        self.camera_info = index.get("camera_info")
+        self.joint_names = index.get("joint_names", [])
+        self.shards = index["shards"]
+        self.cache_shards = max(1, cache_shards)
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        stamps = [self._load_stamps(k) for k in range(len(self.shards))]
+        counts = [len(s) for s in stamps]
+        self._shard_of = np.repeat(np.arange(len(counts)), counts)
+        self._offset = np.concatenate([np.arange(c) for c in counts]) if counts else np.zeros(0, dtype=int)
+        all_stamps = np.concatenate(stamps) if stamps else np.zeros(0)
+        # 按时间排序的全局索引（shard 内一般已有序，跨 shard 可能交叠）
+        self._order = np.argsort(all_stamps, kind="stable")
+        self.stamps = all_stamps[self._order]
+
+    def __len__(self):
+        return len(self.stamps)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        j = self._order[i]
+        return self._frame(self._shard_of[j], self._offset[j])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def intrinsics(self):
+        """Intrinsics（无 CameraInfo 时为 None）"""
+        if not self.camera_info:
+            return None
+        from perception_core.geometry import Intrinsics
+        return Intrinsics.from_K(self.camera_info["K"])
+
+    def index_of(self, stamp):
+        """时间上最近的帧下标（数据集为空时为 None）"""
+        if len(self) == 0:
+            return None
+        i = int(np.searchsorted(self.stamps, stamp))
+        if i == len(self) or (i > 0 and stamp - self.stamps[i - 1] <= self.stamps[i] - stamp):
+            i -= 1
+        return i
+
+    def nearest(self, stamp, slop=None):
+        i = self.index_of(stamp)
+        if i is None or (slop is not None and abs(self.stamps[i] - stamp) > slop):
+            return None
+        return self[i]
+
+    def range(self, t0, t1):
+        lo = int(np.searchsorted(self.stamps, t0, side="left"))
+        hi = int(np.searchsorted(self.stamps, t1, side="right"))
+        for i in range(lo, hi):
+            yield self[i]
+
+    def _frame(self, shard, offset):
+        arrays = self._shard(shard)
+        return RgbdFrame(*(arrays[key][offset] for key in FIELDS))
+
+    def _load_stamps(self, k):
+        """只读 stamp 字段（npz 按成员解压，不读图像）"""
+        path = os.path.join(self.root, self.shards[k]["name"])
+        if self.shard_format == "npz":
+            with np.load(path, allow_pickle=False) as data:
+                return data["stamp"]
+        return np.load(os.path.join(path, "stamp.npy"), allow_pickle=False)
+
+    def _shard(self, k):
+        with self._lock:
+            arrays = self._cache.get(k)
+            if arrays is not None:
+                self._cache.move_to_end(k)
+                return arrays
+        path = os.path.join(self.root, self.shards[k]["name"])
+        if self.shard_format == "npz":
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {key: data[key] for key in FIELDS}
+        else:
+            arrays = {key: np.load(os.path.join(path, key + ".npy"), mmap_mode="r", allow_pickle=False)
+                      for key in FIELDS}
+        with self._lock:
+            self._cache[k] = arrays
+            # mmap 几乎不占内存，全部保留；解压后的 npz 只保留最近几个
+            if self.shard_format == "npz":
+                while len(self._cache) > self.cache_shards:
+                    self._cache.popitem(last=False)
+        return arrays
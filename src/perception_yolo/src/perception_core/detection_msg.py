@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+common_msgs/YoloDetectionArray 的 NumPy 表示
+YoloDetection 全部字段定长，DETECTION_DTYPE 与其 ROS1 序列化布局逐字节一致（小端、无填充），
+一帧检测即一个结构化数组：生产端不做逐字段格式化，消费端可 np.frombuffer 直接解析
+"""
+
+import base64
+
+import numpy as np
+
+from perception_core.pointcloud import ros_stamp
+
+# 与 YoloDetection.msg 字段顺序一致，紧凑排列（54 字节）；ROS1 bool 按 uint8 序列化
+DETECTION_DTYPE = np.dtype([
+    ("class_id", "<u2"),
+    ("confidence", "<f4"),
+    ("bbox", "<i4", (4,)),
+    ("center", "<i4", (2,)),
+    ("distance", "<f4"),
+    ("position", "<f4", (3,)),
+    ("avg_bgr", "u1", (3,)),
+    ("mask_points", "<u4"),
+    ("propagated", "u1"),
+])
+
+DETECTION_FIELDS = DETECTION_DTYPE.names
+
+
+def detection_records(dets, mask_points=None):
+    """Detections -> (N,) DETECTION_DTYPE；数值保持 float32 原值，不做舍入"""
+    records = np.zeros(len(dets), dtype=DETECTION_DTYPE)
+    if len(dets) == 0:
+        return records
+    records["class_id"] = dets.cls
+    records["confidence"] = dets.conf
+    records["bbox"] = dets.xyxy
+    records["center"] = dets.centers
+    records["distance"] = dets.distance
+    records["position"] = dets.position
+    if dets.avg_bgr is not None:
+        records["avg_bgr"] = np.clip(dets.avg_bgr, 0, 255)
+    if mask_points is not None:
+        records["mask_points"] = mask_points
+    records["propagated"] = dets.propagated
+    return records
+
+
+def detection_array_msg(records, names, header=None):
+    """结构化数组 -> rosbridge YoloDetectionArray dict
+
+    names: 模型的 {class_id: name}；header 缺省时使用当前时间
+    """
+    if header is None:
+        header = {"seq": 0, "stamp": ros_stamp(), "frame_id": "camera_rgb_optical_frame"}
+    rows = detection_rows(records)
+    return {
+        "header": header,
+        "labels": [names[row["class_id"]] for row in rows],
+        "detections": rows,
+    }
+
+
+def detection_rows(records):
+    """结构化数组 -> 每个检测一个 {字段: Python 值} dict（按列 tolist，避免逐元素转换）"""
+    columns = [records[name].tolist() for name in DETECTION_FIELDS]
+    return [dict(zip(DETECTION_FIELDS, row)) for row in zip(*columns)]
+
+
+def parse_detection_array(detections):
+    """YoloDetectionArray.detections（rosbridge dict 列表或 rospy 消息列表）-> 结构化数组"""
+    rows = [tuple(_field(det, name) for name in DETECTION_FIELDS) for det in detections]
+    return np.array(rows, dtype=DETECTION_DTYPE).reshape(-1)
+
+
+def _field(det, name):
+    value = det[name] if isinstance(det, dict) else getattr(det, name)
+    # uint8[]：rospy 反序列化为 bytes，rosbridge JSON 为 base64 字符串
+    if isinstance(value, str):
+        value = base64.b64decode(value)
+    return list(value) if isinstance(value, (bytes, bytearray)) else value
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+rosbridge sensor_msgs/Image (dict) -> NumPy
+"""
+
+import cv2
+import numpy as np
+
+from perception_core.transport import image_buffer
+
+
+def decode_image(msg):
+    """彩色图 -> BGR（mono8 返回单通道）"""
+    data = image_buffer(msg["data"])
+
+    h = msg["height"]
+    w = msg["width"]
+    encoding = msg["encoding"]
+
+    if encoding == "rgb8":
+        img = np.frombuffer(data, dtype=np.uint8).reshape(h, w, 3)
+        return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+    if encoding == "bgr8":
+        return np.frombuffer(data, dtype=np.uint8).reshape(h, w, 3)
+    if encoding == "mono8":
+        return np.frombuffer(data, dtype=np.uint8).reshape(h, w)
+
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def decode_depth(msg):
+    """深度图 -> float32，单位米"""
+    data = image_buffer(msg["data"])
+
+    h = msg["height"]
+    w = msg["width"]
+    encoding = msg["encoding"]
+
+    if encoding == "16UC1":
+        depth = np.frombuffer(data, dtype=np.uint16).reshape(h, w)
+        return depth.astype(np.float32) / 1000.0
+    if encoding == "32FC1":
+        return np.frombuffer(data, dtype=np.float32).reshape(h, w)
+
+    raise ValueError(f"Unsupported depth encoding: {encoding}")
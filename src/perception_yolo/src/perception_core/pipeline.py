@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+单帧检测流水线：decode -> inference（或 propagate）-> postprocess -> serialize
+rosbridge 脚本、ROS 节点和离线基准（scripts/benchmarks/bench_pipeline.py）走同一份代码，
+每个阶段的耗时记录在 StageTimer 中；publish 由调用者计时
+"""
+
+import json
+import threading
+import time
+
+import numpy as np
+
+from perception_core.detection_msg import detection_array_msg, detection_records
+from perception_core.geometry import mask_roi_to_3d_points
+from perception_core.image import decode_depth, decode_image
+from perception_core.pointcloud import build_pointcloud2_msg
+from perception_core.postprocess import (
+    detection_dicts,
+    enrich_detections,
+    extract_detections,
+    propagated_detections,
+)
+from perception_core.sync import LazyDepth, stamp_to_sec
+from perception_core.timing import StageTimer
+from perception_core.tracking import BoxTracker
+
+
+# 检测结果的发布格式：json = std_msgs/String 中的 JSON（兼容旧工具），typed = common_msgs/YoloDetectionArray
+DETECTION_FORMATS = ("json", "typed", "both")
+
+
+def format_flags(detection_format):
+    """DETECTION_FORMATS 之一 -> (with_json, with_typed)"""
+    if detection_format not in DETECTION_FORMATS:
+        raise ValueError(f"Unsupported detection format: {detection_format}")
+    return detection_format in ("json", "both"), detection_format in ("typed", "both")
+
+
+class FrameOutput:
+    """一帧的输出；detections 为 dict 列表，json 为序列化后的字符串，cloud 为 PointCloud2 dict
+    records 为 DETECTION_DTYPE 结构化数组，typed 为 YoloDetectionArray dict（rosbridge）
+    """
+
+    def __init__(self, detections, json_str=None, cloud=None, records=None, typed=None):
+        self.detections = detections
+        self.json = json_str
+        self.cloud = cloud
+        self.records = records
+        self.typed = typed
+
+
+class DetectionPipeline:
+    """infer: frame -> 单帧结果（如 MicroBatcher.infer）
+    seg_max_points: 不为 None 时为分割模式，额外输出每个物体的掩码 3D 点云（带 label）
+    with_json / with_typed: serialize 阶段是否生成 JSON 字符串 / rosbridge YoloDetectionArray dict；
+    records（结构化数组）总是生成，rospy 节点可直接用它构造消息
+    detect_every: 每 N 帧跑一次网络，中间帧由 BoxTracker 按速度外推框（propagated=True），
+                  颜色 / 距离 / 3D 位置仍按当前帧计算；分割模式下外推帧不输出掩码点云
+                  1（默认）为每帧检测；request_detection() 强制下一帧检测
+    resolution: ResolutionSelector（与 ultralytics_infer 共用）；检测帧把框尺寸和推理以外的耗时反馈给它
+    """
+
+    def __init__(self, infer, conf_threshold, depth_window=0.5, with_color=True,
+                 seg_max_points=None, timer=None, with_json=True, with_typed=False,
+                 detect_every=1, tracker=None, resolution=None):
+        self.infer = infer
+        self.conf_threshold = conf_threshold
+        self.depth_window = depth_window
+        self.with_color = with_color
+        self.seg_max_points = seg_max_points
+        self.timer = timer if timer is not None else StageTimer()
+        self.with_json = with_json
+        self.with_typed = with_typed
+        self.detect_every = max(1, int(detect_every))
+        self.tracker = tracker if tracker is not None else BoxTracker()
+        self.resolution = resolution
+        self._frame_count = 0
+        self._detect_requested = False
+        self._names = None
+        self._lock = threading.Lock()
+
+    def request_detection(self):
+        """下一帧强制跑网络（如机械臂即将抓取，需要最新检测）"""
+        with self._lock:
+            self._detect_requested = True
+
+    def _should_detect(self):
+        with self._lock:
+            detect = (self._detect_requested or self._names is None
+                      or self._frame_count % self.detect_every == 0)
+            self._frame_count += 1
+            if detect:
+                self._detect_requested = False
+            return detect
+
+    def run(self, rgb_msg, depth_msg, intrinsics):
+        """rosbridge Image dict（深度可为 None，延迟解码）"""
+        with self.timer.stage("decode"):
+            frame = decode_image(rgb_msg)
+        depth = LazyDepth(depth_msg, decode_depth) if depth_msg is not None else None
+        return self.run_arrays(frame, depth, intrinsics, header=rgb_msg.get("header"),
+                               stamp=stamp_to_sec(rgb_msg) or None)
+
+    def run_arrays(self, frame, depth, intrinsics, header=None, stamp=None):
+        """已解码的 BGR 图像 + 深度（ndarray / LazyDepth / None）
+
+        header: 类型化消息沿用的源图像 header（rosbridge dict）；None 时用当前时间
+        stamp:  图像时间戳（秒），用于框的速度估计与外推；None 时用到达时间
+        """
+        timer = self.timer
+        if stamp is None:
+            stamp = time.monotonic()
+        t_start = time.perf_counter()
+
+        result = None
+        inference_s = 0.0
+        if self._should_detect():
+            with timer.stage("inference"):
+                result = self.infer(frame)
+            inference_s = time.perf_counter() - t_start
+        else:
+            with timer.stage("propagate"):
+                xyxy, cls, conf = self.tracker.predict(stamp)
+
+        with timer.stage("postprocess"):
+            if result is not None:
+                dets = extract_detections(result, self.conf_threshold, frame.shape)
+                self.tracker.update(dets.xyxy, dets.cls, dets.conf, stamp)
+                names = self._names = result.names
+            else:
+                dets = propagated_detections(xyxy, cls, conf, frame.shape)
+                names = self._names
+            dets = enrich_detections(dets, frame, depth, intrinsics,
+                                     with_color=self.with_color, depth_window=self.depth_window)
+            detections = detection_dicts(dets, names)
+            cloud_points, cloud_labels = [], []
+            if self.seg_max_points is not None:
+                cloud_points, cloud_labels = self._mask_clouds(result, dets, depth, intrinsics, detections)
+
+        with timer.stage("serialize"):
+            json_str = None
+            if self.with_json and detections:
+                json_str = json.dumps(detections, ensure_ascii=False)
+            mask_points = [det["mask_3d_points"] for det in detections] if self.seg_max_points is not None else None
+            records = detection_records(dets, mask_points)
+            typed = detection_array_msg(records, names, header) if self.with_typed else None
+            cloud = None
+            if cloud_points:
+                cloud = build_pointcloud2_msg(np.concatenate(cloud_points), np.concatenate(cloud_labels))
+
+        if self.resolution is not None and result is not None:
+            self.resolution.observe(dets.xyxy, frame.shape, time.perf_counter() - t_start - inference_s)
+        return FrameOutput(detections, json_str, cloud, records, typed)
+
+    def _mask_clouds(self, result, dets, depth, intrinsics, detections):
+        for det in detections:
+            det["mask_3d_points"] = 0
+
+        if isinstance(depth, LazyDepth):
+            depth = depth.array if len(dets) else None
+        if result is None or result.masks is None or depth is None or intrinsics is None:
+            return [], []
+
+        # 只拷贝通过阈值的掩码，一次 device -> host
+        masks = result.masks.data[dets.index.tolist()].cpu().numpy()
+        cloud_points, cloud_labels = [], []
+        for k, det in enumerate(detections):
+            # 只在检测框内放大掩码、读取深度，开销与物体大小成正比
+            pts_3d = mask_roi_to_3d_points(masks[k], dets.xyxy[k], depth, intrinsics,
+                                           max_points=self.seg_max_points)
+            det["mask_3d_points"] = len(pts_3d)
+            if len(pts_3d):
+                cloud_points.append(pts_3d)
+                cloud_labels.append(np.full(len(pts_3d), dets.cls[k], dtype=np.uint32))
+        return cloud_points, cloud_labels
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+PointCloud2 序列化（rosbridge JSON 格式）
+点云直接由 NumPy 数组打包，不做逐点 Python 循环
+"""
+
+import base64
+import time
+
+import numpy as np
+
+# sensor_msgs/PointField 数据类型
+FLOAT32 = 7
+UINT32 = 6
+
+# XYZL: float32 x3 + uint32 label，与 PointCloud2 的 fields 一一对应
+XYZL_DTYPE = np.dtype({
+    "names": ["x", "y", "z", "label"],
+    "formats": ["<f4", "<f4", "<f4", "<u4"],
+    "offsets": [0, 4, 8, 12],
+    "itemsize": 16,
+})
+
+XYZL_FIELDS = [
+    {"name": "x", "offset": 0, "datatype": FLOAT32, "count": 1},
+    {"name": "y", "offset": 4, "datatype": FLOAT32, "count": 1},
+    {"name": "z", "offset": 8, "datatype": FLOAT32, "count": 1},
+    {"name": "label", "offset": 12, "datatype": UINT32, "count": 1},
+]
+
+
+def pack_xyzl(points, labels):
+    """(N, 3) 坐标 + (N,) 标签 -> 单个 XYZL 结构化数组"""
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    labels = np.asarray(labels, dtype=np.uint32).reshape(-1)
+    if len(points) != len(labels):
+        raise ValueError(f"points/labels length mismatch: {len(points)} vs {len(labels)}")
+
+    cloud = np.empty(len(points), dtype=XYZL_DTYPE)
+    cloud["x"] = points[:, 0]
+    cloud["y"] = points[:, 1]
+    cloud["z"] = points[:, 2]
+    cloud["label"] = labels
+    return cloud
+
+
+def ros_stamp(t=None):
+    """秒 -> rosbridge 的 {secs, nsecs}"""
+    if t is None:
+        t = time.time()
+    secs = int(t)
+    return {"secs": secs, "nsecs": int((t - secs) * 1e9)}
+
+
+def build_pointcloud2_msg(points, labels, frame_id="camera_rgb_optical_frame", stamp=None):
+    """构建 PointCloud2 消息（XYZL: float32 x3 + uint32 label）"""
+    cloud = pack_xyzl(points, labels)
+    n = len(cloud)
+    point_step = XYZL_DTYPE.itemsize
+
+    return {
+        "header": {
+            "seq": 0,
+            "stamp": stamp if stamp is not None else ros_stamp(),
+            "frame_id": frame_id,
+        },
+        "height": 1,
+        "width": n,
+        "fields": XYZL_FIELDS,
+        "is_bigendian": False,
+        "point_step": point_step,
+        "row_step": n * point_step,
+        "data": base64.b64encode(cloud.tobytes()).decode("ascii"),
+        "is_dense": True,
+    }
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+YOLO 结果后处理（向量化）
+每帧只做一次 result.boxes.data 的 device -> host 拷贝，之后对所有框统一用 NumPy 计算：
+阈值过滤、裁剪到图像内、中心点、深度、3D 位置、平均颜色
+颜色与深度均值走积分图（integral.py），与检测数量无关
+"""
+
+import numpy as np
+
+from perception_core.geometry import pixels_to_3d
+from perception_core.integral import box_mean_colors, box_mean_depth
+from perception_core.sync import LazyDepth
+
+
+class Detections:
+    """一帧中通过置信度阈值的检测，所有字段都是按框对齐的数组
+
+    index:    在 result.boxes 中的下标（用于取对应的 mask）
+    xyxy:     (N, 4) int，已裁剪到图像内
+    conf:     (N,) float32
+    cls:      (N,) int
+    centers:  (N, 2) int，框中心像素 (u, v)
+    distance: (N,) float32，框中心区域的平均深度（米）；无有效深度为 NaN
+    position: (N, 3) float32，相机坐标系；无深度为 NaN
+    avg_bgr:  (N, 3) int 或 None（未计算）
+    propagated: (N,) bool，True 表示框由跟踪器外推而来（本帧未跑网络）
+    """
+
+    def __init__(self, index, xyxy, conf, cls):
+        n = len(index)
+        self.index = index
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+        self.centers = (xyxy[:, 0:2] + xyxy[:, 2:4]) // 2
+        self.distance = np.full(n, np.nan, dtype=np.float32)
+        self.position = np.full((n, 3), np.nan, dtype=np.float32)
+        self.avg_bgr = None
+        self.propagated = np.zeros(n, dtype=bool)
+
+    def __len__(self):
+        return len(self.index)
+
+
+def extract_detections(result, conf_threshold, shape):
+    """result.boxes -> Detections（单次 .cpu()）"""
+    h, w = shape[:2]
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        data = np.empty((0, 6), dtype=np.float32)
+    else:
+        # data 列为 xyxy, [track_id,] conf, cls
+        data = boxes.data.cpu().numpy()
+
+    conf = data[:, -2].astype(np.float32)
+    index = np.nonzero(conf >= conf_threshold)[0]
+    data = data[index]
+
+    xyxy = _clip_boxes(data[:, :4], shape)
+    return Detections(index, xyxy, conf[index], data[:, -1].astype(int))
+
+
+def propagated_detections(xyxy, cls, conf, shape):
+    """跟踪器外推的框 -> Detections（propagated 全为 True，index 为 -1，没有对应的 mask）
+
+    角点顺序按 x1 <= x2、y1 <= y2 整理后再裁剪（box_mean_colors 按面积求均值）
+    """
+    n = len(xyxy)
+    xyxy = np.asarray(xyxy).reshape(-1, 4)
+    xyxy = np.concatenate([np.minimum(xyxy[:, :2], xyxy[:, 2:]), np.maximum(xyxy[:, :2], xyxy[:, 2:])], axis=1)
+    dets = Detections(np.full(n, -1, dtype=int), _clip_boxes(xyxy, shape),
+                      np.asarray(conf, dtype=np.float32), np.asarray(cls, dtype=int))
+    dets.propagated[:] = True
+    return dets
+
+
+def _clip_boxes(xyxy, shape):
+    h, w = shape[:2]
+    xyxy = np.asarray(xyxy).reshape(-1, 4).astype(int)
+    xyxy[:, 0::2] = np.clip(xyxy[:, 0::2], 0, w - 1)
+    xyxy[:, 1::2] = np.clip(xyxy[:, 1::2], 0, h - 1)
+    return xyxy
+
+
+def postprocess(result, frame, depth, intrinsics, conf_threshold, with_color=True, depth_window=0.5):
+    """一帧结果的完整后处理
+
+    depth 可以是 ndarray、LazyDepth 或 None；没有检测通过阈值时不会触发深度解码
+    intrinsics（Intrinsics 或 PixelRays）为 None 时只有 distance，没有 position
+    depth_window: 距离取框中心多大比例区域内有效深度的均值（1.0 = 整个框）
+    """
+    dets = extract_detections(result, conf_threshold, frame.shape)
+    return enrich_detections(dets, frame, depth, intrinsics, with_color, depth_window)
+
+
+def enrich_detections(dets, frame, depth, intrinsics, with_color=True, depth_window=0.5):
+    """为已有的框补充平均颜色、距离和 3D 位置（检测帧与外推帧共用）"""
+    if len(dets) == 0:
+        return dets
+
+    if with_color and frame.ndim == 3:
+        dets.avg_bgr = box_mean_colors(frame, dets.xyxy)
+
+    if isinstance(depth, LazyDepth):
+        depth = depth.array
+    if depth is not None:
+        dets.distance = box_mean_depth(depth, dets.xyxy, depth_window)
+        if intrinsics is not None:
+            dets.position = pixels_to_3d(dets.centers[:, 0], dets.centers[:, 1],
+                                         dets.distance, intrinsics.for_shape(frame.shape))
+    return dets
+
+
+def detection_dicts(dets, names):
+    """Detections -> JSON 可序列化的 dict 列表（与原 /perception/yolo26_* 格式一致）"""
+    out = []
+    for k in range(len(dets)):
+        dist = float(dets.distance[k])
+        pos = dets.position[k]
+        det = {
+            "label": names[int(dets.cls[k])],
+            "confidence": round(float(dets.conf[k]), 2),
+            "bbox": [int(v) for v in dets.xyxy[k]],
+            "center": [int(v) for v in dets.centers[k]],
+            "distance_m": None if np.isnan(dist) else round(dist, 2),
+            "position_camera": None if np.isnan(pos[0]) else [round(float(v), 3) for v in pos],
+        }
+        if dets.avg_bgr is not None:
+            det["avg_bgr"] = [int(v) for v in dets.avg_bgr[k]]
+        det["propagated"] = bool(dets.propagated[k])
+        out.append(det)
+    return out
+
+
+def format_detection(det):
+    """单个检测 dict -> 日志行"""
+    dist = det["distance_m"]
+    pos = det["position_camera"]
+    parts = [
+        f"Detected {det['label']} conf={det['confidence']:.2f}",
+        "bbox=({},{},{},{})".format(*det["bbox"]),
+        "center=({},{})".format(*det["center"]),
+    ]
+    if "avg_bgr" in det:
+        parts.append("avg_bgr=({},{},{})".format(*det["avg_bgr"]))
+    parts.append("distance=" + ("n/a" if dist is None else f"{dist:.2f}m"))
+    parts.append(f"pos_cam={pos if pos else 'n/a'}")
+    if "mask_3d_points" in det:
+        parts.append(f"mask_3d_pts={det['mask_3d_points']}")
+    if det.get("propagated"):
+        parts.append("(propagated)")
+    return " ".join(parts)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+自适应处理频率：按在线测得的延迟选择处理频率，使端到端延迟落在预算内
+替代固定的 print_interval 节流；机器越快，处理的帧越多
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateController:
+    """乘性增减的频率控制，从 max_rate 开始
+
+    每处理完一帧调用 update(latency, processing)：
+      latency    端到端延迟（秒）：帧到达 -> 结果发布，含排队等待
+      processing 处理耗时（秒）：decode -> publish
+    只有排队部分（latency - processing）能靠降频消除：延迟 EWMA 超出预算时频率乘以 backoff，
+    否则除以 backoff，但不超过处理耗时允许的上限 num_threads / processing 与 max_rate
+    处理耗时本身超过预算时降频无济于事（没有排队时延迟就等于处理耗时），
+    频率保持在 num_threads / processing 并警告一次，而不是一路降到 min_rate
+    """
+
+    def __init__(self, latency_budget, min_rate=1.0, max_rate=30.0, num_threads=1,
+                 alpha=0.2, backoff=0.8):
+        if latency_budget <= 0:
+            raise ValueError(f"latency_budget must be positive: {latency_budget}")
+        self.latency_budget = latency_budget
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.num_threads = max(1, num_threads)
+        self.alpha = alpha
+        self.backoff = backoff
+
+        self.rate = self.max_rate
+        self.latency = None
+        self.processing = None
+        self.over_budget = False
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self):
+        """两次处理之间的最小间隔（秒）"""
+        return 1.0 / self.rate
+
+    def update(self, latency, processing):
+        with self._lock:
+            self.latency = self._ewma(self.latency, latency)
+            self.processing = self._ewma(self.processing, processing)
+
+            ceiling = self.num_threads / self.processing if self.processing > 0 else self.max_rate
+            over_budget = self.processing > self.latency_budget
+            if over_budget:
+                # 处理耗时本身超预算：按处理能力跑满，排队部分仍由 ceiling 保证不增长
+                if not self.over_budget:
+                    logger.warning("processing time %.0f ms exceeds the latency budget %.0f ms; "
+                                   "holding the rate at %.1f Hz", self.processing * 1000.0,
+                                   self.latency_budget * 1000.0, ceiling)
+                rate = ceiling
+            elif self.latency > self.latency_budget:
+                # 超出部分来自排队：降频
+                rate = self.rate * self.backoff
+            else:
+                rate = min(self.rate / self.backoff, ceiling)
+            self.over_budget = over_budget
+            self.rate = min(self.max_rate, max(self.min_rate, rate))
+            return self.rate
+
+    def _ewma(self, old, new):
+        return new if old is None else old + self.alpha * (new - old)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "target_rate_hz": self.rate,
+                "latency_ms": (self.latency or 0.0) * 1000.0,
+                "processing_ms": (self.processing or 0.0) * 1000.0,
+                "queueing_ms": max(0.0, (self.latency or 0.0) - (self.processing or 0.0)) * 1000.0,
+                "over_budget": self.over_budget,
+                "budget_ms": self.latency_budget * 1000.0,
+            }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"target_rate={s['target_rate_hz']:.1f}Hz latency={s['latency_ms']:.1f}ms "
+                f"processing={s['processing_ms']:.1f}ms budget={s['budget_ms']:.0f}ms")
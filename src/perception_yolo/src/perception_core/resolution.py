@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+逐帧选择推理分辨率：物体在画面中较大时（机械臂靠近桌面）用较小的 imgsz，
+推理耗时约与 imgsz² 成正比；同时保证所选尺寸的推理耗时不超过剩余的延迟预算
+"""
+
+import collections
+import threading
+
+
+class ResolutionSelector:
+    """从 sizes（如 320 / 480 / 640，须为 32 的倍数）中为每次推理选择 imgsz
+
+    observe(): 检测帧调用，记录框尺寸与推理以外的处理耗时（overhead）
+    record():  推理后调用，记录该尺寸的单帧推理耗时（EWMA）
+    choose():  满足两个条件的最小尺寸：
+      1. 最近 window 个检测帧中最小的框缩放到网络输入后短边不小于 min_box_px
+      2. 估计推理耗时 <= latency_budget - overhead（剩余预算）；没有尺寸满足时取最小尺寸
+    最近没有检测时用预算内的最大尺寸；每 probe_every 次推理用一次最大尺寸，
+    避免低分辨率下漏检的小物体永远看不到
+    """
+
+    def __init__(self, sizes, latency_budget, min_box_px=32, window=10, probe_every=30, alpha=0.3):
+        sizes = sorted({int(s) for s in sizes})
+        if not sizes or any(s <= 0 or s % 32 for s in sizes):
+            raise ValueError(f"sizes must be positive multiples of 32: {sizes}")
+        self.sizes = sizes
+        self.latency_budget = latency_budget
+        self.min_box_px = min_box_px
+        self.probe_every = probe_every
+        self.alpha = alpha
+
+        self.current = sizes[-1]
+        self.overhead = None
+        self._min_sides = collections.deque(maxlen=window)
+        self._frame_long_side = None
+        self._latency = {}
+        self._counts = collections.Counter()
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def observe(self, xyxy, shape, overhead=None):
+        """xyxy: 本帧检测框（原图像素）；shape: 原图 shape；overhead: 本帧推理以外的处理耗时（秒）"""
+        with self._lock:
+            self._frame_long_side = max(shape[:2])
+            if len(xyxy):
+                sides = [min(x2 - x1, y2 - y1) for x1, y1, x2, y2 in xyxy]
+                self._min_sides.append(max(min(sides), 1))
+            else:
+                self._min_sides.append(None)
+            if overhead is not None:
+                self.overhead = self._ewma(self.overhead, overhead)
+
+    def record(self, imgsz, seconds, num_frames=1):
+        """一次（批）推理的耗时，按帧数平摊"""
+        with self._lock:
+            self._latency[imgsz] = self._ewma(self._latency.get(imgsz), seconds / max(1, num_frames))
+            self._counts[imgsz] += num_frames
+
+    def choose(self):
+        with self._lock:
+            self._calls += 1
+            budget = self.latency_budget - (self.overhead or 0.0)
+            affordable = [s for s in self.sizes if self._estimate(s) <= budget] or self.sizes[:1]
+
+            required = self._required_size()
+            if required is None or (self.probe_every and self._calls % self.probe_every == 0):
+                size = affordable[-1]
+            else:
+                size = next((s for s in affordable if s >= required), affordable[-1])
+            self.current = size
+            return size
+
+    def _required_size(self):
+        """最近检测中最小框所需的输入尺寸；最近没有检测时返回 None"""
+        sides = [s for s in self._min_sides if s is not None]
+        if not sides or not self._frame_long_side:
+            return None
+        return self.min_box_px * self._frame_long_side / min(sides)
+
+    def _estimate(self, imgsz):
+        """单帧推理耗时估计：测过的直接用，否则按最近的已测尺寸 ∝ imgsz² 外推；都没测过时为 0"""
+        if imgsz in self._latency:
+            return self._latency[imgsz]
+        if not self._latency:
+            return 0.0
+        ref = min(self._latency, key=lambda s: abs(s - imgsz))
+        return self._latency[ref] * (imgsz / ref) ** 2
+
+    def _ewma(self, old, new):
+        return new if old is None else old + self.alpha * (new - old)
+
+    def stats(self):
+        """当前尺寸、各尺寸的帧数 / 推理耗时 / 对应吞吐，以及相对最大尺寸的加速比"""
+        with self._lock:
+            largest = self._estimate(self.sizes[-1])
+            sizes = {}
+            for s in self.sizes:
+                ms = self._estimate(s) * 1000.0
+                sizes[str(s)] = {
+                    "frames": self._counts[s],
+                    "inference_ms": ms,
+                    "fps": 1000.0 / ms if ms > 0 else 0.0,
+                }
+            total = sum(self._counts.values())
+            mean = sum(self._estimate(s) * n for s, n in self._counts.items()) / total if total else 0.0
+            return {
+                "imgsz": self.current,
+                "sizes": sizes,
+                "overhead_ms": (self.overhead or 0.0) * 1000.0,
+                "speedup": largest / mean if mean > 0 else 1.0,
+            }
+
+    def format_stats(self):
+        s = self.stats()
+        parts = " ".join(f"{size}:{row['frames']}@{row['inference_ms']:.1f}ms"
+                         for size, row in s["sizes"].items())
+        return f"imgsz={s['imgsz']} [{parts}] speedup={s['speedup']:.2f}x vs {self.sizes[-1]}"
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+RGB/Depth 时间戳配对（rosbridge 消息为 dict）
+深度消息按 header.stamp 存入小环形缓冲区，RGB 帧取时间上最近且在 slop 内的深度；
+深度图只在真正需要时才解码
+"""
+
+import collections
+import threading
+
+
+def stamp_to_sec(msg):
+    """rosbridge 消息 header.stamp -> 秒（float）"""
+    stamp = msg.get("header", {}).get("stamp", {})
+    return stamp.get("secs", 0) + stamp.get("nsecs", 0) * 1e-9
+
+
+class DepthRingBuffer:
+    """按时间戳保存最近 maxlen 条深度消息（线程安全）"""
+
+    def __init__(self, maxlen=10):
+        self._buf = collections.deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def push(self, msg):
+        with self._lock:
+            self._buf.append((stamp_to_sec(msg), msg))
+
+    def nearest(self, stamp, slop):
+        """返回与 stamp 时间差最小且 <= slop 的深度消息，没有则返回 None"""
+        with self._lock:
+            entries = list(self._buf)
+        best, best_dt = None, slop
+        for t, msg in entries:
+            dt = abs(t - stamp)
+            if dt <= best_dt:
+                best, best_dt = msg, dt
+        return best
+
+    def __len__(self):
+        with self._lock:
+            return len(self._buf)
+
+
+class LazyDepth:
+    """延迟解码的深度图：第一次访问 .array 时才解码，结果缓存"""
+
+    def __init__(self, msg, decoder):
+        self.msg = msg
+        self._decoder = decoder
+        self._array = None
+        self._failed = False
+
+    @property
+    def decoded(self):
+        return self._array is not None
+
+    @property
+    def array(self):
+        """解码后的深度图（米），解码失败返回 None"""
+        if self._array is None and not self._failed:
+            try:
+                self._array = self._decoder(self.msg)
+            except Exception:
+                self._failed = True
+        return self._array
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+分阶段计时：decode / inference (或 propagate) / postprocess / serialize / publish
+保留每个阶段最近 window 次耗时，用于在线统计和离线基准
+"""
+
+import collections
+import contextlib
+import threading
+import time
+
+import numpy as np
+
+STAGES = ("decode", "inference", "propagate", "postprocess", "serialize", "publish")
+
+
+class StageTimer:
+    def __init__(self, window=1000):
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._samples[name].append(seconds)
+
+    def samples(self, name):
+        """某阶段的耗时（秒）数组"""
+        with self._lock:
+            return np.array(self._samples.get(name, ()), dtype=np.float64)
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """{stage: {"n", "mean_ms", "p50_ms", ...}}，按 STAGES 顺序，其余阶段排在后面"""
+        with self._lock:
+            names = [s for s in STAGES if s in self._samples]
+            names += sorted(s for s in self._samples if s not in STAGES)
+        out = collections.OrderedDict()
+        for name in names:
+            ms = self.samples(name) * 1000.0
+            if len(ms) == 0:
+                continue
+            row = {"n": len(ms), "mean_ms": float(ms.mean())}
+            for p, v in zip(percentiles, np.percentile(ms, percentiles)):
+                row[f"p{p}_ms"] = float(v)
+            out[name] = row
+        return out
+
+    def format_summary(self):
+        return " ".join(
+            f"{name}={row['p50_ms']:.1f}/{row['p90_ms']:.1f}ms"
+            for name, row in self.summary().items()
+        ) + " (p50/p90)"
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+检测帧之间的框传播：IoU 关联 + 匀速模型
+每 N 帧跑一次网络，中间帧用上次检测的框和估计的速度外推，开销为微秒级
+"""
+
+import threading
+
+import numpy as np
+
+
+def box_iou(a, b):
+    """(M, 4) x (N, 4) xyxy -> (M, N) IoU"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+def center_affinity(a, b):
+    """(M, 4) x (N, 4) -> (M, N)，1 - 中心距离 / 平均对角线长度（不小于 0）
+    小物体隔帧位移超过自身尺寸时 IoU 为 0，用它作为第二轮关联的依据
+    """
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    ca = (a[:, :2] + a[:, 2:]) / 2
+    cb = (b[:, :2] + b[:, 2:]) / 2
+    dist = np.linalg.norm(ca[:, None] - cb[None, :], axis=-1)
+    diag = (np.linalg.norm(a[:, 2:] - a[:, :2], axis=-1)[:, None]
+            + np.linalg.norm(b[:, 2:] - b[:, :2], axis=-1)[None, :]) / 2
+    return np.clip(1.0 - dist / np.maximum(diag, 1e-6), 0.0, None)
+
+
+def extrapolate_boxes(xyxy, velocity, dt, min_size=1.0):
+    """按角点速度外推 dt 秒；中心与宽高分别外推，宽高不小于 min_size
+
+    各角点独立外推时，缩小中的框会出现 x1 > x2 / y1 > y2（面积为负，后续求均值除以它）
+    """
+    moved = xyxy + velocity * dt
+    center = (moved[:, :2] + moved[:, 2:]) / 2
+    half = np.maximum(moved[:, 2:] - moved[:, :2], min_size) / 2
+    return np.concatenate([center - half, center + half], axis=1).astype(np.float32, copy=False)
+
+
+def greedy_match(iou, threshold):
+    """按 IoU 从大到小贪心配对，返回 (rows, cols)"""
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    used_r, used_c = set(), set()
+    matched_r, matched_c = [], []
+    for k in order:
+        r, c = rows[k], cols[k]
+        if r in used_r or c in used_c:
+            continue
+        used_r.add(r)
+        used_c.add(c)
+        matched_r.append(r)
+        matched_c.append(c)
+    return np.array(matched_r, dtype=int), np.array(matched_c, dtype=int)
+
+
+class BoxTracker:
+    """保存最近一次检测的框，并估计每个框的速度（像素 / 秒）
+
+    update(): 检测帧调用，把上一次检测外推到本帧，按 IoU（同类别）关联，未关联的再按中心距离关联，
+              更新速度；未关联的新框速度为 0，
+              上一次检测中没有被关联的框直接丢弃（检测帧为准）
+    predict(): 中间帧调用，按匀速外推（中心与宽高分别外推，宽高至少 1 像素）；
+               外推时长不超过 max_horizon 秒，避免框漂移过远
+    """
+
+    def __init__(self, iou_threshold=0.3, center_threshold=0.5, smoothing=0.5, max_horizon=1.0):
+        self.iou_threshold = iou_threshold
+        self.center_threshold = center_threshold
+        self.smoothing = smoothing
+        self.max_horizon = max_horizon
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.velocity = np.zeros((0, 4), dtype=np.float32)
+        self.cls = np.zeros(0, dtype=int)
+        self.conf = np.zeros(0, dtype=np.float32)
+        self.stamp = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def update(self, xyxy, cls, conf, stamp):
+        xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        cls = np.asarray(cls, dtype=int)
+        velocity = np.zeros_like(xyxy)
+        with self._lock:
+            if self.stamp is not None and self.stamp - self.max_horizon <= stamp < self.stamp:
+                # 多线程推理时较早的帧可能后完成，不覆盖更新的检测；
+                # 时间大幅回退（bag 循环回放、仿真重置）则按新序列处理
+                return
+            dt = stamp - self.stamp if self.stamp is not None else 0.0
+            if 0 < dt <= self.max_horizon and len(self.boxes) and len(xyxy):
+                # 与外推后的框关联：隔帧检测时物体位移可能已超过框尺寸
+                predicted = extrapolate_boxes(self.boxes, self.velocity, dt)
+                same_cls = self.cls[:, None] == cls[None, :]
+                rows, cols = greedy_match(np.where(same_cls, box_iou(predicted, xyxy), 0.0),
+                                          self.iou_threshold)
+                affinity = np.where(same_cls, center_affinity(predicted, xyxy), 0.0)
+                affinity[rows, :] = 0.0
+                affinity[:, cols] = 0.0
+                rows2, cols2 = greedy_match(affinity, self.center_threshold)
+                rows, cols = np.concatenate([rows, rows2]), np.concatenate([cols, cols2])
+                if len(rows):
+                    measured = (xyxy[cols] - self.boxes[rows]) / dt
+                    s = self.smoothing
+                    velocity[cols] = s * self.velocity[rows] + (1.0 - s) * measured
+            self.boxes = xyxy
+            self.velocity = velocity
+            self.cls = cls
+            self.conf = np.asarray(conf, dtype=np.float32)
+            self.stamp = stamp
+
+    def predict(self, stamp):
+        """外推到 stamp 时刻，返回 (xyxy float32, cls, conf)"""
+        with self._lock:
+            if self.stamp is None:
+                return self.boxes.copy(), self.cls.copy(), self.conf.copy()
+            dt = min(max(stamp - self.stamp, 0.0), self.max_horizon)
+            return extrapolate_boxes(self.boxes, self.velocity, dt), self.cls.copy(), self.conf.copy()
+
+    def reset(self):
+        with self._lock:
+            self.boxes = np.zeros((0, 4), dtype=np.float32)
+            self.velocity = np.zeros((0, 4), dtype=np.float32)
+            self.cls = np.zeros(0, dtype=int)
+            self.conf = np.zeros(0, dtype=np.float32)
+            self.stamp = None
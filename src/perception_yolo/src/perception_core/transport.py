@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+rosbridge 图像传输模式
+  - json:     默认，uint8[] 以 base64 字符串传输
+  - cbor:     rosbridge CBOR 压缩，uint8[] 以二进制 byte string 到达
+  - cbor-raw: rosbridge 发送 ROS 序列化后的原始字节，这里直接解析 sensor_msgs/Image
+
+roslibpy 本身只支持文本帧和 png/none 压缩，二进制模式需要在 ros.run() 之前调用
+enable_binary_transport(ros)，需要安装 cbor2
+"""
+
+import base64
+import logging
+import struct
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TRANSPORTS = ("json", "cbor", "cbor-raw")
+
+
+def enable_binary_transport(ros):
+    """让 roslibpy 连接能处理 rosbridge 的二进制（CBOR）帧，必须在 ros.run() 之前调用"""
+    try:
+        import cbor2
+    except ImportError:
+        raise RuntimeError("cbor transport requires cbor2: pip install cbor2")
+
+    import roslibpy
+
+    base = ros.factory.protocol
+    if getattr(base, "handles_cbor", False):
+        return
+
+    class CborRosBridgeProtocol(base):
+        handles_cbor = True
+
+        def onMessage(self, payload, isBinary):
+            if not isBinary:
+                return super(CborRosBridgeProtocol, self).onMessage(payload, isBinary)
+            try:
+                message = roslibpy.Message(cbor2.loads(payload))
+                handler = self._message_handlers.get(message["op"], None)
+                if handler:
+                    handler(message)
+            except Exception:
+                logger.exception("Failed to handle binary rosbridge message. Message skipped.")
+
+    ros.factory.protocol = CborRosBridgeProtocol
+
+
+def image_topic(ros, name, transport="json", message_type="sensor_msgs/Image"):
+    """创建图像订阅 Topic；transport 为 cbor/cbor-raw 时在 subscribe 请求中带上对应 compression"""
+    import roslibpy
+
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unsupported transport: {transport} (expected one of {TRANSPORTS})")
+
+    topic = roslibpy.Topic(ros, name, message_type)
+    if transport != "json":
+        # roslibpy 构造时只接受 png/none，compression 字段只在 subscribe 时原样发送
+        topic.compression = transport
+    return topic
+
+
+def unpack_raw_image(raw):
+    """解析 ROS1 序列化的 sensor_msgs/Image，data 为 memoryview 切片（不拷贝）"""
+    buf = memoryview(raw)
+    seq, secs, nsecs, n = struct.unpack_from("<4I", buf, 0)
+    off = 16
+    frame_id = bytes(buf[off:off + n]).decode("utf-8")
+    off += n
+    height, width, n = struct.unpack_from("<3I", buf, off)
+    off += 12
+    encoding = bytes(buf[off:off + n]).decode("ascii")
+    off += n
+    is_bigendian, step, n = struct.unpack_from("<BII", buf, off)
+    off += 9
+
+    return {
+        "header": {
+            "seq": seq,
+            "stamp": {"secs": secs, "nsecs": nsecs},
+            "frame_id": frame_id,
+        },
+        "height": height,
+        "width": width,
+        "encoding": encoding,
+        "is_bigendian": is_bigendian,
+        "step": step,
+        "data": buf[off:off + n],
+    }
+
+
+def as_image_msg(msg):
+    """把 cbor-raw 的 {secs, nsecs, bytes} 转成普通 Image dict，其余模式原样返回"""
+    if "data" not in msg and "bytes" in msg:
+        return unpack_raw_image(msg["bytes"])
+    return msg
+
+
+def image_buffer(data):
+    """Image.data -> 可直接交给 np.frombuffer 的缓冲区
+
+    json 模式为 base64 字符串；cbor 模式为 bytes，直接返回不再拷贝；
+    部分 rosbridge 配置会发送 int 列表
+    """
+    if isinstance(data, str):
+        return base64.b64decode(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return data
+    return np.asarray(data, dtype=np.uint8)
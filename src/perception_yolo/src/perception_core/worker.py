@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+推理线程 + 单槽邮箱（latest frame wins）
+订阅回调只负责 put，推理在独立线程中进行；推理慢于相机时旧帧被覆盖并计数，
+延迟不会随消息堆积而无限增长
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LatestFrameMailbox:
+    """单槽邮箱：新消息覆盖未被取走的旧消息，被覆盖的计入 dropped"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._put_time = 0.0
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._put_time = time.monotonic()
+            self.received += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """取走最新消息；超时或邮箱已关闭时返回 None"""
+        return self.get_timed(timeout)[0]
+
+    def get_timed(self, timeout=None):
+        """取走最新消息及其 put 时刻（time.monotonic）"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._item is not None or self._closed, timeout)
+            item, self._item = self._item, None
+            return item, self._put_time
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class InferenceWorker:
+    """从邮箱取最新帧并调用 handler(item)
+
+    min_interval: 两次处理之间的最小间隔（秒）；
+    等待期间到达的帧在邮箱中互相覆盖，只处理最新的一帧
+    rate_controller: AdaptiveRateController；给定时每帧上报延迟，间隔由它决定（忽略 min_interval）
+    num_threads: 推理线程数；>1 时多个线程同时推理，配合 MicroBatcher 合批
+    niceness: >0 时降低工作线程的调度优先级（仅 Linux），用于可视化等非关键任务
+    """
+
+    def __init__(self, mailbox, handler, min_interval=0.0, num_threads=1, name="inference-worker",
+                 niceness=0, rate_controller=None):
+        self.mailbox = mailbox
+        self.handler = handler
+        self.min_interval = min_interval
+        self.rate_controller = rate_controller
+        self.niceness = niceness
+        self.processed = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._next_start = 0.0
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            for i in range(max(1, num_threads))
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self):
+        if self.niceness > 0:
+            self._lower_priority()
+        while not self._stop_event.is_set():
+            with self._lock:
+                wait = self._next_start - time.monotonic()
+            if wait > 0 and self._stop_event.wait(wait):
+                break
+
+            item, put_time = self.mailbox.get_timed(timeout=0.5)
+            if item is None:
+                continue
+
+            start = time.monotonic()
+            with self._lock:
+                self._next_start = start + self._interval()
+            try:
+                self.handler(item)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                logger.exception("inference handler failed")
+            end = time.monotonic()
+            if self.rate_controller is not None:
+                self.rate_controller.update(end - put_time, end - start)
+            with self._lock:
+                self.processed += 1
+
+    def _interval(self):
+        if self.rate_controller is not None:
+            return self.rate_controller.interval
+        return self.min_interval
+
+    def _lower_priority(self):
+        # Linux 上 setpriority 作用于单个线程（native id）
+        try:
+            tid = threading.get_native_id()
+            os.setpriority(os.PRIO_PROCESS, tid, os.getpriority(os.PRIO_PROCESS, tid) + self.niceness)
+        except (AttributeError, OSError):
+            logger.debug("cannot lower priority of %s", threading.current_thread().name)
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self.mailbox.close()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stats(self):
+        return {
+            "received": self.mailbox.received,
+            "processed": self.processed,
+            "dropped": self.mailbox.dropped,
+            "errors": self.errors,
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"frames received={s['received']} processed={s['processed']} "
+                f"dropped={s['dropped']} errors={s['errors']}")
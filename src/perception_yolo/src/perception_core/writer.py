@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+后台磁盘写入：图像写入线程池 + 缓冲的异步日志
+订阅回调只把数据放入有界队列，编码和写盘在后台线程中完成，回调耗时与磁盘速度无关
+"""
+
+import collections
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# jpg: cv2.IMWRITE_JPEG_QUALITY；png: cv2.IMWRITE_PNG_COMPRESSION；npy: 原始数组（无编码，最快，文件最大）
+IMAGE_FORMATS = ("jpg", "png", "npy")
+
+
+def encode_image(frame, fmt="jpg", jpeg_quality=95, png_compression=3):
+    """ndarray -> 文件内容 bytes"""
+    if fmt == "npy":
+        buf = io.BytesIO()
+        np.save(buf, frame, allow_pickle=False)
+        return buf.getvalue()
+    if fmt == "jpg":
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+    elif fmt == "png":
+        params = [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+    else:
+        raise ValueError(f"Unsupported image format: {fmt} (choose from {', '.join(IMAGE_FORMATS)})")
+    ok, data = cv2.imencode("." + fmt, frame, params)
+    if not ok:
+        raise RuntimeError(f"cv2.imencode failed for .{fmt}")
+    return data.tobytes()
+
+
+def write_atomic(path, data):
+    """先写临时文件再 rename，读取方不会看到写了一半的图像"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class ImageWriterPool:
+    """有界队列 + num_workers 个写入线程
+
+    submit(path_stem, frame) 立即返回：放入队列返回完整路径，队列满时丢弃该帧并返回 None
+    （丢帧计入 dropped；队列长度决定能吸收多长的磁盘卡顿）
+    调用者不能在 submit 之后原地修改 frame（cv_bridge 每条消息返回新数组，无需拷贝）
+    """
+
+    def __init__(self, fmt="jpg", num_workers=2, max_queue=64, jpeg_quality=95, png_compression=3,
+                 name="image-writer"):
+        if fmt not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format: {fmt} (choose from {', '.join(IMAGE_FORMATS)})")
+        self.fmt = fmt
+        self.jpeg_quality = jpeg_quality
+        self.png_compression = png_compression
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.bytes_written = 0
+        self._write_times = collections.deque(maxlen=200)
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{name}-{k}", daemon=True)
+            for k in range(max(1, int(num_workers)))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, path_stem, frame):
+        path = f"{path_stem}.{self.fmt}"
+        try:
+            self._queue.put_nowait((path, frame))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return None
+        return path
+
+    def close(self, timeout=10.0):
+        """写完队列中剩余的帧后停止"""
+        for _ in self._threads:
+            self._queue.put((None, None))
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def _run(self):
+        while True:
+            path, frame = self._queue.get()
+            if path is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                data = encode_image(frame, self.fmt, self.jpeg_quality, self.png_compression)
+                write_atomic(path, data)
+            except Exception:
+                logger.exception("failed to write %s", path)
+                with self._lock:
+                    self.failed += 1
+                continue
+            with self._lock:
+                self.written += 1
+                self.bytes_written += len(data)
+                self._write_times.append(time.perf_counter() - t0)
+
+    def stats(self):
+        with self._lock:
+            ms = np.array(self._write_times) * 1000.0
+            return {
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "queued": self._queue.qsize(),
+                "mb_written": self.bytes_written / 1e6,
+                "write_ms_p50": float(np.percentile(ms, 50)) if len(ms) else 0.0,
+            }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"written={s['written']} dropped={s['dropped']} failed={s['failed']} "
+                f"queued={s['queued']} {s['mb_written']:.1f}MB write_p50={s['write_ms_p50']:.1f}ms")
+
+
+class AsyncJsonLogger:
+    """JSON Lines 日志：log() 只入队，后台线程保持文件打开，批量写入并每 flush_interval 秒 flush 一次
+    队列满时丢弃新记录（计入 dropped），不阻塞调用者
+    写盘失败（磁盘满等）时丢弃该批记录（计入 failed），后台线程继续消费队列
+    """
+
+    def __init__(self, path, flush_interval=1.0, max_queue=10000, name="json-logger"):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._closed = False
+        self._write_error_logged = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def log(self, record):
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=2.0):
+        if self._closed:
+            return
+        self._closed = True
+        deadline = time.monotonic() + timeout
+        try:
+            # 写入线程异常退出时队列不会再被消费，put(None) 无超时会卡住 atexit
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("json logger %s did not drain its queue, %d records lost",
+                           self.path, self._queue.qsize())
+            return
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+
+    def _run(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            f = open(self.path, "a", encoding="utf-8")
+        except OSError:
+            logger.exception("cannot open log file %s", self.path)
+            # 无法写日志时继续消费队列，避免调用者阻塞
+            while self._queue.get() is not None:
+                pass
+            return
+
+        try:
+            self._drain(f)
+        finally:
+            try:
+                f.close()
+            except OSError:
+                logger.exception("failed to close %s", self.path)
+
+    def _drain(self, f):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                record = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                record = False
+            if record is None:
+                break
+            if record is not False:
+                lines = [record]
+                # 一次取走队列中已有的全部记录，合并为一次 write
+                while len(lines) < 1000:
+                    try:
+                        lines.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in lines
+                lines = [rec for rec in lines if rec is not None]
+                self._write(f, lines)
+                if stop:
+                    break
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self._write(f, None)
+                last_flush = time.monotonic()
+
+    def _write(self, f, lines):
+        """写入一批记录（lines 为 None 时只 flush）；失败只记日志，线程继续消费队列"""
+        try:
+            if lines is None:
+                f.flush()
+            else:
+                f.write("".join(json.dumps(rec, ensure_ascii=False, default=str) + "\n" for rec in lines))
+        except Exception:
+            # 磁盘满时每批都会失败，只在首次失败时打印堆栈
+            if not self._write_error_logged:
+                self._write_error_logged = True
+                logger.exception("failed to write %s", self.path)
+            if lines:
+                self.failed += len(lines)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+upsample_mask_roi 与整帧 cv2.resize(INTER_NEAREST) 后裁剪的结果逐像素一致
+
+用法:
+  python3 -m pytest src/perception_yolo/test
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+from perception_core.geometry import upsample_mask_roi  # noqa: E402
+
+
+@pytest.mark.parametrize("mask_shape, frame_shape", [
+    ((368, 640), (480, 640)),   # letterbox 掩码，非整数比例
+    ((160, 160), (480, 640)),
+    ((100, 133), (481, 639)),
+    ((640, 640), (480, 640)),   # 缩小
+])
+def test_upsample_mask_roi_matches_cv2_resize(mask_shape, frame_shape):
+    rng = np.random.default_rng(0)
+    mask = rng.random(mask_shape).astype(np.float32)
+    h, w = frame_shape
+    full = cv2.resize(mask, (w, h), interpolation=cv2.INTER_NEAREST) > 0.5
+
+    np.testing.assert_array_equal(upsample_mask_roi(mask, (0, 0, w - 1, h - 1), frame_shape), full)
+    x1, y1, x2, y2 = 37, 11, w // 2 + 3, h - 5
+    np.testing.assert_array_equal(upsample_mask_roi(mask, (x1, y1, x2, y2), frame_shape),
+                                  full[y1:y2 + 1, x1:x2 + 1])
@@ -10,7 +10,7 @@ import py_trees
 import py_trees_ros
 from py_trees.common import Status
 
-from common_msgs.msg import DetectedObject, GraspCandidate
+from common_msgs.msg import DetectedObjectArray, GraspCandidateArray
 from geometry_msgs.msg import PoseStamped
 from moveit_msgs.msg import MoveGroupAction, MoveGroupGoal
 import actionlib
@@ -40,27 +40,38 @@ class SearchBehavior(py_trees.behaviour.Behaviour):
 class DetectBehavior(py_trees.behaviour.Behaviour):
     """检测行为 - 等待感知模块发布检测结果"""
     
-    def __init__(self, name="Detect"):
+    def __init__(self, name="Detect", max_age=1.0):
         super(DetectBehavior, self).__init__(name)
         self.detected_objects = []
+        self.detection_stamp = None
+        # 超过 max_age 秒的检测帧视为过期（<= 0 不检查）
+        self.max_age = max_age
         self.sub = None
         
     def setup(self):
         rospy.loginfo("[Brain] DetectBehavior: Setup")
         self.sub = rospy.Subscriber(
             "/perception/detected_objects",
-            DetectedObject,
-            self._detection_callback
+            DetectedObjectArray,
+            self._detection_callback,
+            queue_size=1
         )
         return True
         
     def _detection_callback(self, msg):
-        """接收检测到的物体"""
-        self.detected_objects.append(msg)
-        rospy.loginfo(f"[Brain] Detected: {msg.label} (score: {msg.score:.2f})")
+        """接收一帧检测结果，整帧替换上一帧"""
+        self.detected_objects = msg.objects
+        self.detection_stamp = msg.header.stamp
+        for obj in msg.objects:
+            rospy.loginfo(f"[Brain] Detected: {obj.label} (score: {obj.score:.2f})")
+            
+    def _is_stale(self):
+        if self.detection_stamp is None or self.max_age <= 0 or self.detection_stamp.is_zero():
+            return False
+        return (rospy.Time.now() - self.detection_stamp).to_sec() > self.max_age
         
     def update(self):
-        if len(self.detected_objects) > 0:
+        if len(self.detected_objects) > 0 and not self._is_stale():
             # 将检测到的物体存储到黑板
             self.feedback_message = f"Found {len(self.detected_objects)} objects"
             return Status.SUCCESS
@@ -74,29 +85,41 @@ class DetectBehavior(py_trees.behaviour.Behaviour):
 class PlanGraspBehavior(py_trees.behaviour.Behaviour):
     """规划抓取行为 - 等待抓取候选姿态"""
     
-    def __init__(self, name="PlanGrasp"):
+    def __init__(self, name="PlanGrasp", max_age=2.0):
         super(PlanGraspBehavior, self).__init__(name)
         self.grasp_candidates = []
+        self.grasp_stamp = None
+        # 超过 max_age 秒的候选帧视为过期（<= 0 不检查）
+        self.max_age = max_age
         self.sub = None
         
     def setup(self):
         rospy.loginfo("[Brain] PlanGraspBehavior: Setup")
         self.sub = rospy.Subscriber(
             "/perception/grasp_candidates",
-            GraspCandidate,
-            self._grasp_callback
+            GraspCandidateArray,
+            self._grasp_callback,
+            queue_size=1
         )
         return True
         
     def _grasp_callback(self, msg):
-        """接收抓取候选姿态"""
-        self.grasp_candidates.append(msg)
-        rospy.loginfo(f"[Brain] GraspCandidate received (quality: {msg.quality:.2f})")
+        """接收一帧抓取候选（已按质量从高到低排序），整帧替换上一帧"""
+        self.grasp_candidates = msg.candidates
+        self.grasp_stamp = msg.header.stamp
+        if msg.candidates:
+            rospy.loginfo(f"[Brain] {len(msg.candidates)} grasp candidates received "
+                          f"(best: {msg.candidates[0].label}, quality: {msg.candidates[0].quality:.2f})")
+            
+    def _is_stale(self):
+        if self.grasp_stamp is None or self.max_age <= 0 or self.grasp_stamp.is_zero():
+            return False
+        return (rospy.Time.now() - self.grasp_stamp).to_sec() > self.max_age
         
     def update(self):
-        if len(self.grasp_candidates) > 0:
-            # 选择最佳抓取姿态
-            best_grasp = max(self.grasp_candidates, key=lambda x: x.quality)
+        if len(self.grasp_candidates) > 0 and not self._is_stale():
+            # 候选已按质量排序，第一个即最佳抓取姿态
+            best_grasp = self.grasp_candidates[0]
             self.feedback_message = f"Best grasp quality: {best_grasp.quality:.2f}"
             # 存储到黑板供执行行为使用
             self.blackboard = py_trees.blackboard.Blackboard()